@@ -17,18 +17,26 @@ Implementation
 """
 
 from __future__ import print_function
-from utils import make_tuple, is_local_gdb
+from utils import make_tuple, is_local_gdb, validate_geodata_batch, forget_database_stamps
 from sys import exc_info
 from traceback import format_exception
 from os import environ, makedirs
-from os.path import join, exists
+from os.path import join, exists, split
 from contextlib import contextmanager
 from functools import wraps
 import arcpy
 import logging
 from base.results import GgResult
+from base.cache import ResultCache, row_key, environment_values
+from base.schedule import CostModel, longest_first
+from base.metrics import RunMetrics, metric_fields
+from base.profiling import Profiler, profile_modes
+from base.log import QueueHandler, QueueListener, BatchFileHandler, ArcMessageForwarder, LevelSampler, EventFilter, JsonLinesHandler, parse_failure
+from Queue import Queue
+from timeit import default_timer
 from datetime import datetime
 from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 
 
 debug = print  # updated to logger.debug after logging is configured
@@ -109,54 +117,6 @@ def log_error(f):
     return log_wrap
 
 
-class ArcStreamHandler(logging.StreamHandler):
-    """  Logging handler to send messages to ArcGIS tool window
-    """
-
-    def __init__(self, messages):
-        """
-
-        Args:
-            messages (object): ArcGIS tool messages object
-        """
-
-        logging.StreamHandler.__init__(self)
-
-        self.messages = messages
-
-    def emit(self, record):
-        """Emit the record to the ArcGIS messages object
-
-        Args:
-            record:
-
-        Returns:
-            :
-        """
-
-        try:
-            msg = self.format(record).replace("\n", ", ").replace("\t", " ").replace("  ", " ")
-        except:
-            msg = record
-
-        lvl = record.levelno
-
-        if self.messages:
-
-            if lvl in [logging.ERROR, logging.CRITICAL]:
-                self.messages.addErrorMessage(msg)
-
-            elif lvl == logging.WARNING:
-                self.messages.addWarningMessage(msg)
-
-            else:
-                self.messages.addMessage(msg)
-
-        self.flush()
-
-        return
-
-
 class BaseTool(object):
     """ Tool base class
     """
@@ -177,12 +137,20 @@ class BaseTool(object):
         self.run_id = "{0}_{1}".format(self.tool_name, self.time_stamp)
 
         # logging attributes
+        self.logger_name = self.tool_name  # pipeline stages each have their own, see base.pipeline
         self.log_file = join(self.appdata_path, self.tool_name + ".log")
+        self.json_log_file = join(self.appdata_path, self.tool_name + ".jsonl")
+        self.json_log = False  # set from the json_log parameter, see log_event
         self.logger = None
         self.debug = None
         self.info = None
         self.warn = None
         self.error = None
+        self.log_listener = None
+        self.log_forwarder = None  # sends forwarded records to ArcMap from the tool's thread, see forward_messages
+        self.log_sampler = None
+        self.log_sampling = {logging.DEBUG: 10, logging.INFO: 5}  # level: keep one record in N while a level is busy
+        self.log_sample_rate = 50  # records per second of a level before it is sampled
 
         # basic tool settings
         self.label = settings.get("label", "label not set")
@@ -197,6 +165,12 @@ class BaseTool(object):
         # other attributes
         self.execution_list = []
         self.result = GgResult()
+        self.workers = 1  # rows are processed in parallel if a tool sets more
+        self.row_validation = None  # (field, validate_geodata kwargs) to validate all rows before processing
+        self.row_source = None  # iterable of records processed instead of the input table, see base.pipeline
+        self.cache_parameters = None  # names of the parameters that determine a row's result, set (even empty) to cache results
+        self.metrics = None  # per row metrics of the latest iteration
+        self.profiler = Profiler()
 
         return
 
@@ -216,7 +190,7 @@ class BaseTool(object):
         else:
             self.messages.addMessage("Initialising logging...")
 
-        logger = logging.getLogger(self.tool_name)
+        logger = logging.getLogger(self.logger_name)
         logger.handlers = []
 
         # convenience aliases
@@ -231,34 +205,131 @@ class BaseTool(object):
 
         logger.setLevel(logging.DEBUG)
 
-        # add the ArcMap stream handler
-        ah = ArcStreamHandler(self.messages)
-        ah.setLevel(logging.INFO)
-        logger.addHandler(ah)
-        logger.info("ArcMap stream handler configured")
-
         # create log file if necessary
         if not exists(self.log_file):
 
             if not exists(self.appdata_path):
-
-                logger.info("Creating app data path {}".format(self.appdata_path))
                 makedirs(self.appdata_path)
 
-            logger.info("Creating log file {}".format(self.log_file))
             open(self.log_file, 'a').close()
 
-        # add the file stream handler
-        file_handler = logging.FileHandler(self.log_file)
+        # records go on a queue, a background thread writes them to the file and queues them for ArcMap
+        ah = self.log_forwarder = ArcMessageForwarder(self.messages)
+        ah.setLevel(logging.INFO)
+
+        file_handler = BatchFileHandler(self.log_file)
         file_handler.setLevel(logging.DEBUG)
         formatter = logging.Formatter(fmt="%(asctime)s.%(msecs)03d %(levelname)s %(module)s %(funcName)s %(lineno)s %(message)s", datefmt="%Y%m%d %H%M%S")
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        logger.info("File stream handler configured")
+
+        # structured events only go to the JSON-lines log, if the run has one
+        ah.addFilter(EventFilter(False))
+        file_handler.addFilter(EventFilter(False))
+        handlers = [ah, file_handler]
+
+        json_log = self.get_parameter("json_log")
+        self.json_log = bool(json_log and json_log.valueAsText == "true")
+        if self.json_log:
+            handlers.append(JsonLinesHandler(self.json_log_file))
+
+        log_queue = Queue()
+        self.log_sampler = LevelSampler(self.log_sampling, self.log_sample_rate)
+        qh = QueueHandler(log_queue)
+        qh.addFilter(self.log_sampler)
+        logger.addHandler(qh)
+
+        self.log_listener = QueueListener(log_queue, *handlers)
+        self.log_listener.start()
+        logger.info("Queued logging configured")
 
         # convenience alias
         self.logger = logger
         logger.info("Debugging log file is located at '{}'".format(self.log_file))
+        if self.json_log:
+            logger.info("Run events are logged to '{}'".format(self.json_log_file))
+
+        return
+
+    def log_event(self, event, **fields):
+        """ Write a structured event to the JSON-lines log, if the run has one
+
+        Args:
+            event (str): Event name, e.g. 'run', 'step' or 'row'
+            **fields: Event values
+
+        Returns:
+            :
+        """
+
+        if not self.json_log or not self.logger:
+            return
+
+        fields.update(event=event, run_id=self.run_id, tool=self.tool_name)
+        self.logger.info(event, extra={"event": fields})
+
+        return
+
+    def log_row_event(self, row_num, failure):
+        """ Write the outcome and timings of a row to the JSON-lines log
+
+        Args:
+            row_num (int): Row number
+            failure (str): Failure description, None if the row succeeded
+
+        Returns:
+            :
+        """
+
+        m = (self.metrics.get(row_num) if self.metrics else None) or {}
+        exc_type, message = parse_failure(failure)
+
+        self.log_event("row", row=row_num, key=m.get("geodata"), outcome=m.get("status", "failed" if failure else "passed"),
+                       seconds=m.get("wall_seconds"), validation_seconds=m.get("validation_seconds"), main_seconds=m.get("main_seconds"),
+                       write_seconds=m.get("write_seconds"), exception=exc_type, message=message)
+
+        return
+
+    def stop_logging(self):
+        """ Write out the queued log records and stop the log thread
+
+        Returns:
+            :
+        """
+
+        if not self.log_listener:
+            return
+
+        if self.log_sampler and self.log_sampler.dropped:
+            self.info("{} log records were sampled out at high row rates".format(self.log_sampler.dropped))
+
+        self.log_listener.stop()
+
+        for h in self.log_listener.handlers:
+            h.close()
+
+        self.forward_messages()
+
+        self.log_listener = None
+        self.log_forwarder = None
+        self.logger.handlers = [logging.NullHandler()]
+
+        return
+
+    def forward_messages(self):
+        """ Send the log records queued for ArcMap, from the tool's own thread
+
+        The geoprocessing messages object is not safe to call from the log
+        thread, so records for it wait until a row, step or run ends.
+
+        Returns:
+            :
+        """
+
+        if self.log_forwarder:
+            try:
+                self.log_forwarder.drain()
+            except Exception as e:
+                debug("messages not forwarded: {}".format(e))
 
         return
 
@@ -445,30 +516,79 @@ class BaseTool(object):
         if not self.messages:  # stop run errors during ide tests
             return
 
+        forget_database_stamps()  # databases are listed again once per run, see utils.database_fingerprint
+
         # self.info(["\n", "Parameter summary: {}".format(["{} ({}): {}".format(p.DisplayName, p.name, p.valueAsText) for p in self.parameters]), "\n"])
 
-        # set the input parameters as local attributes
-        [setattr(self, k, v) for k, v in self.get_parameter_dict().iteritems()]  # nb side-effect
-        # self.info(["\n", "Tool attributes set {}".format(self.__dict__), "\n"])
+        t_run = default_timer()
+        outcome, exc_type = "failed", None
 
         try:
-            self.result.initialise(self.get_parameter("result_table"), self.get_parameter("fail_table"), self.get_parameter("output_workspace").value, self.get_parameter("result_table_name").value, self.logger)
+            # set the input parameters as local attributes
+            [setattr(self, k, v) for k, v in self.get_parameter_dict().iteritems()]  # nb side-effect
+            # self.info(["\n", "Tool attributes set {}".format(self.__dict__), "\n"])
+            self.log_event("run", phase="start")
 
-            if hasattr(self, "output_file_workspace") and self.output_file_workspace in [None, "", "#"]:
-                    self.output_file_workspace = self.result.output_workspace
+            try:
+                self.result.initialise(self.get_parameter("result_table"), self.get_parameter("fail_table"), self.get_parameter("output_workspace").value, self.get_parameter("result_table_name").value, self.logger)
 
-        except AttributeError:
-            pass
+                if hasattr(self, "output_file_workspace") and self.output_file_workspace in [None, "", "#"]:
+                        self.output_file_workspace = self.result.output_workspace
 
-        for f in self.execution_list:
-            f = log_error(f)
-            f()
+            except AttributeError:
+                pass
 
-        try:
-            self.result.write()
+            profile = getattr(self, "profile", "NONE")
+            self.profiler = Profiler(profile if profile in profile_modes else "NONE", getattr(self, "profile_rows", 0))
 
-        except (TypeError, AttributeError):
-            pass
+            with self.profiler.session():
+                for f in self.execution_list:
+                    t_step = default_timer()
+                    f = log_error(f)
+                    f()
+                    self.forward_messages()
+                    self.log_event("step", phase=f.__name__, seconds=default_timer() - t_step)
+
+            try:
+                self.result.write()
+
+            except (TypeError, AttributeError):
+                pass
+
+            self.write_profile()
+            outcome = "completed"
+
+        except Exception as e:
+            exc_type = type(e).__name__
+            raise
+
+        finally:
+            self.log_event("run", phase="end", outcome=outcome, exception=exc_type, seconds=default_timer() - t_run,
+                           passed=self.result.pass_count, failed=self.result.fail_count)
+            self.stop_logging()
+
+        return
+
+    def write_profile(self):
+        """ Write the profile files of the run next to the result table
+
+        Returns:
+            :
+        """
+
+        if not self.profiler.active:
+            return
+
+        if self.result.pass_csv:
+            out_base = join(split(self.result.pass_csv)[0], self.result.pass_table_name + "_PROFILE")
+        else:
+            out_base = join(self.appdata_path, self.run_id + "_PROFILE")
+
+        try:
+            for f in self.profiler.write(out_base):
+                self.info("Profile written to '{}'".format(f))
+        except Exception as e:
+            self.warn("Profile not written: {}".format(e))
 
         return
 
@@ -557,15 +677,15 @@ class BaseTool(object):
         if getattr(param, "multiValue", False):
             raise ValueError("Multi-value tableview iteration is not yet implemented")
 
-        # ensure nothing left over, sometimes slow gc needs this
-        if arcpy.Exists(param.name):
-            arcpy.Delete_management(param.name)
+        if self.row_source is None:
+            # ensure nothing left over, sometimes slow gc needs this
+            if arcpy.Exists(param.name):
+                arcpy.Delete_management(param.name)
 
-        arcpy.MakeTableView_management(param.valueAsText, param.name)
+            arcpy.MakeTableView_management(param.valueAsText, param.name)
 
         # this code is difficult to make any clearer, builds a dict of name/alias pairs for dependant parameters
         field_alias = [p.name for i, p in enumerate(self.parameters[1:]) if 0 in p.parameterDependencies]  # keys
-        self.info("field_alias = {}".format(field_alias))
         field_name = []
         for field in field_alias:
             v = self.get_parameter(field).valueAsText
@@ -576,23 +696,22 @@ class BaseTool(object):
                 else:
                     field_name.append(v.strip())
             # field_name = [self.get_parameter(field_name).valueAsText for field_name in field_alias]  # values
-        self.info("field_name = {}".format(field_name))
         field_map = {k: v for k, v in OrderedDict(zip(field_alias, field_name)).iteritems() if v not in [None, "NONE"]}  # dict
-        self.info("field_map = {}".format(field_name))
 
         # self.info("nk = {}".format(nonkey_names))
 
         if nonkey_names:  # we want hard-wired fields to be included in the row
             nkd = OrderedDict([(v, v) for v in nonkey_names])
-            self.info(nkd)
             for k, v in nkd.iteritems():
                 field_map[v] = v
              # field_map.update(OrderedDict([(v, v) for v in nonkey_names]))  # nonkey_names is a list at the mo
 
-        self.info("fm = {}".format(field_map))
-        self.info("fmv = {}".format(field_map.values()))
+        self.debug("Field map %s", field_map)
 
-        rows = [r for r in arcpy.da.SearchCursor(param.name, field_map.values())]
+        if self.row_source is not None:
+            rows = (tuple(rec.get(f) for f in field_map.values()) for rec in self.row_source)
+        else:
+            rows = [r for r in arcpy.da.SearchCursor(param.name, field_map.values())]
 
         self.do_iteration(func, rows, field_map, return_to_results)
 
@@ -638,11 +757,13 @@ class BaseTool(object):
         """ Iterates a function over the provided rows
 
         The function is usually defined in descendant classes, which can
-        assume that the function is called for each row in the input table
+        assume that the function is called for each row in the input table.
+        When the tool has more than one worker the rows are processed on a
+        thread pool, results are still written in input order.
 
         Args:
             func (function):
-            rows (list):
+            rows (list): Row values, or an iterator of them to process as they arrive
             name_vals (list):
             return_to_results (boolean): Flag indicating if returned object should be passed on as a result record
 
@@ -650,29 +771,316 @@ class BaseTool(object):
             :
         """
 
-        if not rows:
-            raise ValueError("No values or records to process.")
+        keys = name_vals.keys()
 
-        fname = func.__name__
+        def make_row(values):
+            return {k: v for k, v in zip(keys, make_tuple(values))}
+
+        if isinstance(rows, list):
+            if not rows:
+                raise ValueError("No values or records to process.")
+
+            rows = [make_row(row) for row in rows]
+            total_rows = len(rows)
+            self.info("{} items to process".format(total_rows))
 
-        rows = [{k: v for k, v in zip(name_vals.keys(), make_tuple(row))} for row in rows]
-        total_rows = len(rows)
-        self.info("{} items to process".format(total_rows))
+            jobs = list(enumerate(rows, start=1))
+            workers = min(self.workers or 1, total_rows)
 
-        for row_num, row in enumerate(rows, start=1):
+            # with several workers a batch is handed out costliest row first, rows are costed as they are validated
+            cost_model = self.open_cost_model(rows[0]) if workers > 1 else None
+            invalid, validation_seconds, features = self.validate_rows(rows, cost_model is not None)
+
+            if features:
+                jobs = longest_first(jobs, [cost_model.estimate(features[row_num - 1]) for row_num, _ in jobs])
+                self.info("Rows scheduled longest first by estimated cost")
+            else:
+                cost_model = None  # nothing validated to cost from, rows keep their input order
+
+        else:  # rows arrive as they are produced, e.g. by an earlier pipeline stage
+            total_rows = "?"
+            self.info("Processing items as they arrive")
+
+            jobs = ((i, make_row(row)) for i, row in enumerate(rows, start=1))
+            workers = self.workers or 1
+            invalid = validation_seconds = features = cost_model = None
+
+        metrics = self.metrics = RunMetrics(self.get_schedule_field(rows[0] if isinstance(rows, list) else {}))
+
+        cache = self.open_result_cache() if return_to_results else None
+        cache_values = self.get_cache_values() if cache else None
+
+        def run(job):
+            row_num, row = job
+            start = metrics.start(row_num, row)
+            checked = validation_seconds[row_num - 1] if validation_seconds else 0.0
+
+            if invalid and invalid[row_num - 1]:
+                metrics.stop(start, "invalid", checked)
+                return row, None, invalid[row_num - 1]
+
+            if cache:
+                key = row_key(self.tool_name, cache_values, row)
+                res = cache.get(key)
+                if res:
+                    self.info("Row {} of {} reused from the result cache".format(row_num, total_rows), extra={"outcome": "cached"})
+                    metrics.stop(start, "cached", checked)
+                    return row, res, None
+
+            t0 = default_timer()
+            res, failure = self.process_row(func, row, row_num, total_rows)
+            metrics.stop(start, "failed" if failure else "passed", checked)
+
+            if cost_model:
+                cost_model.observe(features[row_num - 1], default_timer() - t0)
+
+            if cache and not failure:
+                try:
+                    cache.put(key, self.tool_name, res)
+                except Exception as e:
+                    self.warn("Result of row {} not cached: {}".format(row_num, e))
+
+            return row, res, failure
+
+        try:
+            self.run_jobs(run, jobs, workers, return_to_results)
+        finally:
+            if cache:
+                self.info(cache.summary())
+                cache.close()
+            if cost_model:
+                try:
+                    cost_model.save()
+                except Exception as e:
+                    self.warn("Row timings not saved: {}".format(e))
+            for line in metrics.summary():
+                self.info(line)
+            self.result.add_metrics(metrics.records(), metric_fields)
+
+        return
+
+    def run_jobs(self, run, jobs, workers, return_to_results):
+        """ Run the row jobs, recording the outcomes in input order
+
+        Args:
+            run (function): Returns (row, result, failure) for a (row number, row) job
+            jobs (iterable): (row number, row) tuples
+            workers (int): Number of threads
+            return_to_results (boolean): Flag indicating if returned object should be passed on as a result record
+
+        Returns:
+            :
+        """
+
+        if workers > 1:
+            self.info("Processing with {} parallel workers".format(workers))
+            pool = ThreadPool(workers)
+            pending = {}
+            next_num = 1
             try:
-                self.info("{} > Processing row {} of {}".format(time_stamp("%H:%M:%S%f")[:-3], row_num, total_rows))
-                self.debug("Running {} with row={}".format(fname, row))
+                # rows may finish in any order, outcomes are held back to be recorded in input order
+                for row_num, outcome in pool.imap_unordered(lambda job: (job[0], run(job)), jobs):
+                    pending[row_num] = outcome
+                    while next_num in pending:
+                        row, res, failure = pending.pop(next_num)
+                        self.timed_record_outcome(next_num, row, res, failure, return_to_results)
+                        next_num += 1
+                    self.forward_messages()
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for job in jobs:
+                row, res, failure = run(job)
+                self.timed_record_outcome(job[0], row, res, failure, return_to_results)
+                self.forward_messages()
 
-                res = func(row)
+        return
 
-                if return_to_results:
+    def open_result_cache(self):
+        """ Open the result cache if the tool caches its results
 
-                    self.result.add_pass(res)
+        Returns:
+            ResultCache: None if the tool does not cache
+        """
 
-            except Exception as e:
+        if self.cache_parameters is None:
+            return None
+
+        try:
+            return ResultCache(join(self.appdata_path, "result_cache.sqlite"))
+        except Exception as e:
+            self.warn("Result cache unavailable: {}".format(e))
+            return None
+
+    def get_schedule_field(self, row):
+        """ Return the row field holding the dataset that determines a row's cost
+
+        Args:
+            row (dict): A row
+
+        Returns:
+            str: None if there is no such field
+        """
+
+        if self.row_validation:
+            return self.row_validation[0]
+
+        for k in ["raster", "geodata", "feature", "table"]:
+            if k in row:
+                return k
+
+        return None
+
+    def open_cost_model(self, row):
+        """ Open the row cost model of the tool, if its rows have datasets to cost
+
+        Args:
+            row (dict): A row
+
+        Returns:
+            CostModel: None if the rows can not be costed
+        """
+
+        if not self.get_schedule_field(row):
+            return None
+
+        return CostModel(join(self.appdata_path, self.tool_name + "_timings.json"))
+
+    def get_cache_values(self):
+        """ Return the parameter values that determine a row's result
+
+        The output location is always included, a cached output elsewhere is
+        not the output that was asked for, as are the arcpy.env settings
+        that change outputs.
+
+        Returns:
+            dict:
+        """
+
+        names = list(self.cache_parameters) + ["output_workspace", "output_file_workspace", "output_filename_prefix", "output_filename_suffix"]
+
+        values = {k: getattr(self, k, None) for k in names}
+        values["environment"] = environment_values()
+
+        return values
+
+    def validate_rows(self, rows, cost=False):
+        """ Validate the geodata of all rows up front, in parallel
+
+        Rows that fail are rejected before any processing starts, rows that
+        pass are cached so the tool's own validation of them is cheap. Rows
+        to be scheduled are costed in the same threads, from what their
+        validation has just cached.
+
+        Args:
+            rows (list): Row dictionaries
+            cost (bool): Flag to cost the rows, see schedule.CostModel
+
+        Returns:
+            tuple: (None for each valid row otherwise the failure, validation seconds of each row, cost features of each row or None)
+        """
+
+        if not self.row_validation:
+            return [None] * len(rows), None, None
+
+        field, kwargs = self.row_validation
+
+        self.info("Validating {} items ...".format(len(rows)))
+
+        seconds = []
+        features = [] if cost else None
+        invalid = validate_geodata_batch([row.get(field) for row in rows], seconds=seconds,
+                                         on_valid=CostModel.features if cost else None, valid_values=features, **kwargs)
+
+        bad = sum(1 for i in invalid if i)
+        if bad:
+            self.warn("{} of {} items failed validation and will not be processed".format(bad, len(rows)))
+
+        if features:
+            features = [f or CostModel.no_features for f in features]
+
+        return invalid, seconds, features
+
+    def process_row(self, func, row, row_num, total_rows):
+        """ Run the function on a single row, trapping any failure
+
+        Args:
+            func (function): Function to run
+            row (dict): Row values
+            row_num (int): Row number, 1-based
+            total_rows (int): Number of rows being processed
+
+        Returns:
+            tuple: (result, failure), failure is None if the function succeeded
+        """
+
+        fname = func.__name__
+
+        try:
+            self.info("%s > Processing row %s of %s", time_stamp("%H:%M:%S%f")[:-3], row_num, total_rows)
+            self.debug("Running %s with row=%s", fname, row)
+
+            with self.profiler.row(row_num):
+                return func(row), None
+
+        except Exception as e:
+
+            self.error("Row {} of {}: error executing {}: {}".format(row_num, total_rows, fname, str(e)), extra={"outcome": "failed"})
+
+            return None, repr(format_exception(*exc_info()))
+
+    def timed_record_outcome(self, row_num, row, res, failure, return_to_results):
+        """ Record the outcome of a row, adding the time taken to the row metrics
+
+        Args:
+            row_num (int): Row number
+            row (dict): Row values
+            res (object): Returned value of the row function
+            failure (str): Failure description, None if the row succeeded
+            return_to_results (boolean): Flag indicating if returned object should be passed on as a result record
+
+        Returns:
+            :
+        """
+
+        t0 = default_timer()
+
+        self.record_outcome(row, res, failure, return_to_results)
+
+        if self.metrics:
+            self.metrics.add_write(row_num, default_timer() - t0)
+
+        if self.json_log:
+            self.log_row_event(row_num, failure)
+
+        return
+
+    def record_outcome(self, row, res, failure, return_to_results):
+        """ Write the outcome of a row to the results
+
+        Args:
+            row (dict): Row values
+            res (object): Returned value of the row function
+            failure (str): Failure description, None if the row succeeded
+            return_to_results (boolean): Flag indicating if returned object should be passed on as a result record
+
+        Returns:
+            :
+        """
+
+        if failure:
+            self.result.add_fail(row, failure)
+            return
+
+        try:
+            if return_to_results:
+
+                self.result.add_pass(res)
+
+        except Exception as e:
 
-                self.error("error executing {}: {}".format(fname, str(e)))
-                self.result.add_fail(row)
+            self.error("error writing result: {}".format(str(e)))
+            self.result.add_fail(row)
 
         return
@@ -0,0 +1,252 @@
+"""
+Description
+-----------
+    This module provides a persistent cache of per-row tool results
+
+    A row's result is keyed by a hash of the tool name, the parameters that
+    determine its output, the arcpy.env settings that change raster outputs
+    (snap raster, extent, cell size and so on), the row values and the size
+    and modification time of the input datasets. A cached result is only reused while its output
+    dataset is unchanged, as its fingerprint when cached shows, so an output
+    overwritten by a run with other parameters is not taken for a hit.
+    Results without an output dataset (e.g. values read from the input) are
+    reused while the input is unchanged. The cache is a sqlite database in the app data
+    folder, bounded by evicting the least recently used entries.
+
+Implementation
+--------------
+"""
+
+from base.utils import file_fingerprint, DoesNotExistError
+from hashlib import sha1
+from threading import Lock
+from time import time
+import json
+import sqlite3
+import arcpy
+
+
+MAX_ENTRIES = 10000
+
+output_keys = ["raster", "geodata", "feature", "table"]  # result record keys holding the output dataset
+
+# arcpy.env settings that change the outputs of cached tools
+cache_environments = ["outputCoordinateSystem", "geographicTransformations", "snapRaster", "extent", "cellSize", "mask",
+                      "compression", "pyramid", "rasterStatistics", "nodata", "tileSize", "resamplingMethod"]
+
+
+def stringify(value):
+    """ Return a stable text form of a parameter value for hashing
+
+    Args:
+        value: Parameter value
+
+    Returns:
+        unicode:
+    """
+
+    if hasattr(value, "exportToString"):  # spatial references
+        return value.exportToString()
+
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True, default=stringify)
+
+    return unicode(value)
+
+
+def environment_values():
+    """ Return the arcpy.env settings that change the outputs of cached tools
+
+    Settings that name a dataset, e.g. a snap raster or mask, carry its
+    fingerprint too, so editing that dataset changes the keys.
+
+    Returns:
+        dict: Setting name -> [text value, fingerprint or None]
+    """
+
+    values = {}
+    for k in cache_environments:
+        v = getattr(arcpy.env, k, None)
+        try:
+            fingerprint = file_fingerprint(v) if isinstance(v, basestring) and v else None
+        except (DoesNotExistError, OSError):
+            fingerprint = None
+        values[k] = [stringify(v), fingerprint]
+
+    return values
+
+
+def row_key(tool_name, parameters, row):
+    """ Return the cache key of a row
+
+    Args:
+        tool_name (str): Name of the tool
+        parameters (dict): Names and values of the parameters that determine the result
+        row (dict): Row values, values that are datasets are fingerprinted
+
+    Returns:
+        str: Hex digest
+    """
+
+    fingerprints = {}
+    for k, v in row.iteritems():
+        try:
+            fingerprints[k] = file_fingerprint(v) if v else None
+        except (DoesNotExistError, TypeError, OSError):
+            fingerprints[k] = None
+
+    key = [tool_name,
+           sorted((k, stringify(v)) for k, v in parameters.iteritems()),
+           sorted((k, stringify(v)) for k, v in row.iteritems()),
+           sorted(fingerprints.iteritems())]
+
+    return sha1(json.dumps(key, default=stringify)).hexdigest()
+
+
+def output_fingerprint(output):
+    """ Return the fingerprint of an output dataset as it is stored
+
+    Args:
+        output (str): Path to the output dataset
+
+    Returns:
+        list: [path, size, modification time], None if the output does not exist
+    """
+
+    try:
+        return list(file_fingerprint(output))
+    except (DoesNotExistError, TypeError, OSError):
+        return None
+
+
+def result_output(record):
+    """ Return the output dataset of a result record
+
+    Args:
+        record (dict): Result record
+
+    Returns:
+        str: None if the record has no output dataset
+    """
+
+    for k in output_keys:
+        if record.get(k):
+            return record[k]
+
+    return None
+
+
+class ResultCache(object):
+    """ Least recently used cache of result records in a sqlite database
+    """
+
+    def __init__(self, path, max_entries=MAX_ENTRIES):
+        """
+
+        Args:
+            path (str): Path to the sqlite database, created if necessary
+            max_entries (int): Number of entries kept
+        """
+
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = self.misses = 0
+        self.lock = Lock()
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, tool TEXT, record TEXT, created REAL, used REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+        self.db.commit()
+
+        return
+
+    def get(self, key):
+        """ Return the cached record for a key, if its output is unchanged since it was cached
+
+        Args:
+            key (str): Row key
+
+        Returns:
+            dict: None if there is no usable entry
+        """
+
+        with self.lock:
+            hit = self.db.execute("SELECT record FROM results WHERE key = ?", (key,)).fetchone()
+
+        entry = json.loads(hit[0]) if hit else None
+
+        record = entry.get("record") if isinstance(entry, dict) and "output_fingerprint" in entry else None
+
+        output = result_output(record) if record else None
+
+        # another run, e.g. with other parameters, may have written the same output since
+        if record and output and (entry["output_fingerprint"] is None or entry["output_fingerprint"] != output_fingerprint(output)):
+            with self.lock:
+                self.db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self.db.commit()
+            record = None
+
+        with self.lock:
+            if record:
+                self.hits += 1
+                self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time(), key))
+                self.db.commit()
+            else:
+                self.misses += 1
+
+        return record
+
+    def put(self, key, tool_name, record):
+        """ Cache a record with the fingerprint of its output, evicting the least recently used entries beyond the limit
+
+        Args:
+            key (str): Row key
+            tool_name (str): Name of the tool
+            record (dict): Result record
+
+        Returns:
+
+        """
+
+        if not isinstance(record, dict):
+            return
+
+        output = result_output(record)
+        fingerprint = output_fingerprint(output) if output else None
+        if output and fingerprint is None:
+            return  # nothing to reuse
+
+        entry = {"record": record, "output_fingerprint": fingerprint}
+
+        now = time()
+
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, tool_name, json.dumps(entry, default=stringify), now, now))
+            self.db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self.db.commit()
+
+        return
+
+    def summary(self):
+        """ Return a description of the cache use
+
+        Returns:
+            str:
+        """
+
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+
+        return "{} of {} rows reused from the result cache ({:.1f}%)".format(self.hits, total, rate)
+
+    def close(self):
+        """ Close the database
+
+        Returns:
+
+        """
+
+        with self.lock:
+            self.db.close()
+
+        return
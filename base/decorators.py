@@ -18,6 +18,7 @@ Works very well.
 """
 from arcpy import Parameter, ListEnvironments
 from functools import wraps
+from base.profiling import profile_modes
 from base.utils import raster_formats, resample_methods, aggregation_methods, data_nodata, expand_trunc, stats_type, pixel_type, raster_formats2, transform_methods
 
 
@@ -129,8 +130,12 @@ def validate_parameter(name, display_name, data_type, parameter_type, multi_valu
     if value_list and not isinstance(value_list, list):
         raise ValueError("value_list must be a list {0}".format(value_list))
 
-    if value_list and default_value and default_value not in value_list:
-        raise ValueError("default_value is not in value_list {0} IS NOT IN {1}".format(default_value, value_list))
+    if value_list and default_value:
+        if value_list[0] == "Range" and len(value_list) == 3:
+            if not value_list[1] <= default_value <= value_list[2]:
+                raise ValueError("default_value is not in range {0} IS NOT IN {1}".format(default_value, value_list[1:]))
+        elif default_value not in value_list:
+            raise ValueError("default_value is not in value_list {0} IS NOT IN {1}".format(default_value, value_list))
 
     if not isinstance(multi_value, bool):
         raise ValueError("multi_value must be a boolean")
@@ -390,6 +395,37 @@ def input_output_table(affixing=False, out_file_workspace=True):
 
     pars.append(par6)
 
+    # Profiling, these stay last so tools can still index earlier parameters
+    par7 = Parameter(displayName="Profiler",
+                     name="profile",
+                     datatype="GPString",
+                     parameterType="Optional",
+                     direction="Input",
+                     category="Diagnostics")
+
+    par7.filter.list = profile_modes
+    par7.value = profile_modes[0]
+
+    par8 = Parameter(displayName="Profile only the first rows (0 for the whole run)",
+                     name="profile_rows",
+                     datatype="GPLong",
+                     parameterType="Optional",
+                     direction="Input",
+                     category="Diagnostics")
+
+    par8.value = 0
+
+    par9 = Parameter(displayName="Write a JSON-lines run log",
+                     name="json_log",
+                     datatype="GPBoolean",
+                     parameterType="Optional",
+                     direction="Input",
+                     category="Diagnostics")
+
+    par9.value = False
+
+    pars.extend([par7, par8, par9])
+
     def decorator(f):
         """ Adds the parameters functionally
 
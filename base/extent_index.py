@@ -0,0 +1,254 @@
+"""
+Description
+-----------
+    This module indexes dataset extents for comparison with areas of interest
+
+    Extents are projected once to a common spatial reference and kept in
+    the app data folder, keyed by the size and modification time of the
+    dataset and of its projection, world and .aux.xml files, so later runs
+    do not describe or project unchanged datasets again.
+
+    An ExtentIndex holds boxes sorted by their minimum x. A query cuts that
+    order with a bisection and filters the rest with numpy, giving the
+    boxes that intersect the query box. Only those candidates get exact
+    tests, every other box is disjoint.
+
+    Extents are axis aligned rectangles, so the spatial relations of two
+    extents follow from their coordinates and are tested without arcpy.
+
+Implementation
+--------------
+"""
+
+from base.utils import file_fingerprint, sidecar_stamps, DoesNotExistError
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from os.path import exists
+import numpy as np
+import json
+import arcpy
+
+
+MAX_CACHED_EXTENTS = 100000  # datasets whose extents are remembered
+
+relations = ["contains", "within", "disjoint", "overlaps", "equals", "touches"]
+
+
+def dataset_stamp(geodata):
+    """ Return the stamp of a dataset and its georeference sidecar files
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Returns:
+        list: [size, modification time, [sidecar name, size, modification time], ...]
+    """
+
+    return list(file_fingerprint(geodata)[1:]) + sidecar_stamps(geodata)
+
+
+def box_of(extent):
+    """ Return the coordinates of an extent
+
+    Args:
+        extent (arcpy.Extent): Extent
+
+    Returns:
+        tuple: (xmin, ymin, xmax, ymax)
+    """
+
+    return extent.XMin, extent.YMin, extent.XMax, extent.YMax
+
+
+def relate(a, b):
+    """ Return the spatial relations of box a to box b
+
+    Args:
+        a (tuple): (xmin, ymin, xmax, ymax)
+        b (tuple): (xmin, ymin, xmax, ymax)
+
+    Returns:
+        OrderedDict: Relation name -> bool, as the arcpy Extent methods of a with b
+    """
+
+    ax0, ay0, ax1, ay1 = a
+    bx0, by0, bx1, by1 = b
+
+    disjoint = ax1 < bx0 or bx1 < ax0 or ay1 < by0 or by1 < ay0
+    touches = not disjoint and (ax1 == bx0 or bx1 == ax0 or ay1 == by0 or by1 == ay0)
+    equals = a == b
+    contains = not disjoint and not touches and ax0 <= bx0 and ay0 <= by0 and bx1 <= ax1 and by1 <= ay1
+    within = not disjoint and not touches and bx0 <= ax0 and by0 <= ay0 and ax1 <= bx1 and ay1 <= by1
+    overlaps = not (disjoint or touches or contains or within)
+
+    return OrderedDict([("contains", contains), ("within", within), ("disjoint", disjoint),
+                        ("overlaps", overlaps), ("equals", equals), ("touches", touches)])
+
+
+DISJOINT = OrderedDict((r, r == "disjoint") for r in relations)
+
+
+class ExtentIndex(object):
+    """ Boxes sorted by minimum x for intersection queries
+    """
+
+    def __init__(self, items):
+        """
+
+        Args:
+            items (list): (key, (xmin, ymin, xmax, ymax)) pairs
+        """
+
+        items = sorted(items, key=lambda i: i[1][0])
+
+        self.keys = [k for k, b in items]
+        self.boxes = np.array([b for k, b in items], dtype=np.float64).reshape(-1, 4)
+        self.xmins = self.boxes[:, 0].tolist()
+
+        return
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _hits(self, box):
+        xmin, ymin, xmax, ymax = box
+
+        n = bisect_right(self.xmins, xmax)  # boxes starting right of the query box are out
+        b = self.boxes[:n]
+
+        return np.flatnonzero((b[:, 2] >= xmin) & (b[:, 1] <= ymax) & (b[:, 3] >= ymin))
+
+    def candidates(self, box):
+        """ Return the keys of the boxes that intersect a box, touching included
+
+        Args:
+            box (tuple): (xmin, ymin, xmax, ymax)
+
+        Returns:
+            list: Keys in minimum x order
+        """
+
+        return [self.keys[i] for i in self._hits(box)]
+
+    def query(self, box, relation=None):
+        """ Return the relations of a box to the indexed boxes it intersects
+
+        Args:
+            box (tuple): (xmin, ymin, xmax, ymax)
+            relation (str): Only keys for which this relation of the box holds, e.g. 'within'
+
+        Returns:
+            OrderedDict: Key -> relations of the box to that key's box, keys not included are disjoint
+        """
+
+        found = OrderedDict()
+
+        for i in self._hits(box):
+            r = relate(tuple(box), tuple(self.boxes[i].tolist()))
+            if relation is None or r[relation]:
+                found[self.keys[i]] = r
+
+        return found
+
+
+class ExtentCache(object):
+    """ Dataset extents, raw and projected, remembered while datasets are unchanged
+    """
+
+    def __init__(self, path, max_entries=MAX_CACHED_EXTENTS):
+        """
+
+        Args:
+            path (str): Path of the cache file, created on save
+            max_entries (int): Number of datasets kept
+        """
+
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = Lock()
+        self.hits = self.misses = 0
+        self.changed = False
+
+        self.entries = OrderedDict()
+
+        if exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = OrderedDict(json.load(f))
+            except ValueError:
+                pass  # a damaged file just means describing again
+
+        return
+
+    def extent(self, geodata, srs):
+        """ Return the extent of a dataset, raw and projected to a spatial reference
+
+        Args:
+            geodata (str): Path to the dataset
+            srs (arcpy.SpatialReference): Spatial reference to project to
+
+        Returns:
+            tuple: (raw box, raw spatial reference name, projected box or None if the dataset's spatial reference is unknown)
+        """
+
+        try:
+            stamp = dataset_stamp(geodata)
+        except DoesNotExistError:
+            stamp = None
+
+        target = srs.exportToString()
+
+        with self.lock:
+            e = self.entries.get(geodata)
+
+        if e and stamp and e["stamp"] == stamp and target in e["projected"]:
+            with self.lock:
+                self.hits += 1
+                self.entries[geodata] = self.entries.pop(geodata, e)  # most recent last
+                self.changed = True
+            return tuple(e["raw"]), e["srs"], e["projected"][target] and tuple(e["projected"][target])
+
+        extent = arcpy.Describe(geodata).extent
+        srs_name = extent.spatialReference.name
+        projected = box_of(extent.projectAs(srs)) if srs_name != "Unknown" else None
+
+        with self.lock:
+            self.misses += 1
+            if stamp:
+                if not e or e["stamp"] != stamp:
+                    e = {"stamp": stamp, "raw": box_of(extent), "srs": srs_name, "projected": {}}
+                e["projected"][target] = projected
+                self.entries.pop(geodata, None)
+                self.entries[geodata] = e  # most recent last
+                self.changed = True
+
+        return box_of(extent), srs_name, projected
+
+    def summary(self):
+        """ Return a description of the cache use
+
+        Returns:
+            str:
+        """
+
+        total = self.hits + self.misses
+
+        return "{} of {} extents reused from the extent cache".format(self.hits, total)
+
+    def save(self):
+        """ Write the cache, keeping the most recently used datasets
+
+        Returns:
+
+        """
+
+        with self.lock:
+            if not self.changed:
+                return
+            entries = self.entries.items()[-self.max_entries:]
+
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+        return
@@ -0,0 +1,364 @@
+"""
+Description
+-----------
+    This module runs Grid Garage tools without the ArcMap user interface
+
+    A job file (JSON, or YAML if PyYAML is installed) names a tool class and
+    its parameter values. Each tool is built from its own getParameterInfo,
+    the values are applied through light-weight parameter shims and the tool
+    is executed with tool messages going to stdout.
+
+        python -m base.headless job.json [job2.yaml ...] [--timings timings.json]
+
+    A job file holds one job, a list of jobs or {"jobs": [...]}. A job is
+
+        {"tool": "ReprojectRasterTool",
+         "parameters": {"raster_table": "c:/data/rasters.csv",
+                        "output_workspace": "c:/data/out.gdb",
+                        "output_cs": 3308}}
+
+    where the tool is a class registered in the toolbox or a dotted path to
+    any BaseTool subclass, e.g. 'tools.raster.zonal_stats_as_table.ZonalStatisticsAsTableTool'.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from os.path import dirname, join, abspath, splitext
+from importlib import import_module
+from timeit import default_timer
+import argparse
+import imp
+import json
+import sys
+import arcpy
+
+
+toolbox_path = join(dirname(dirname(abspath(__file__))), "Grid Garage.pyt")
+
+spatial_reference_types = ["Coordinate System", "Spatial Reference"]
+
+dataset_types = ["Workspace", "Folder", "File", "Raster Dataset", "Raster Layer", "Feature Class", "Feature Layer", "Table View"]
+
+
+class GPValue(unicode):
+    """ Text of a dataset parameter, which like an arcpy geoprocessing value also has a 'value'
+    """
+
+    @property
+    def value(self):
+        return unicode(self)
+
+
+class ParameterShim(object):
+    """ Stand-in for an arcpy.Parameter outside a tool dialog
+    """
+
+    def __init__(self, par, names):
+        """ Copy the definition and default value of a parameter
+
+        Args:
+            par (arcpy.Parameter): Parameter as built by the tool
+            names (list): Names of all the tool parameters, to resolve dependencies
+        """
+
+        self.name = par.name
+        self.displayName = par.displayName
+        self.datatype = par.datatype
+        self.parameterType = par.parameterType
+        self.direction = par.direction
+        self.multiValue = par.multiValue
+        self.category = par.category
+        self.filter = par.filter
+        self.enabled = par.enabled
+        self.defaultEnvironmentName = par.defaultEnvironmentName
+        self.parameterDependencies = [names.index(d) if d in names else d for d in (par.parameterDependencies or [])]
+        self.altered = False
+        self.message = None
+        self.value = par.value
+
+        if self.value is None and self.defaultEnvironmentName:
+            self.set_value(getattr(arcpy.env, self.defaultEnvironmentName, None))
+            self.altered = False
+
+        return
+
+    @property
+    def valueAsText(self):
+        """ The value as text, as arcpy.Parameter provides
+
+        Returns:
+            str: None if there is no value
+        """
+
+        v = self.value
+
+        if v is None or v == "":
+            return None
+
+        if isinstance(v, bool):
+            return "true" if v else "false"
+
+        if isinstance(v, (list, tuple)):
+            return ";".join(str(x) for x in v)
+
+        if isinstance(v, arcpy.SpatialReference):
+            return v.exportToString()
+
+        return unicode(v)
+
+    def set_value(self, value):
+        """ Set the value from a job file
+
+        Args:
+            value: Value, spatial references may be given as a WKID, name, .prj file or WKT
+
+        Returns:
+
+        """
+
+        if self.datatype in spatial_reference_types and value not in [None, ""]:
+            if isinstance(value, basestring) and "[" in value:
+                srs = arcpy.SpatialReference()
+                srs.loadFromString(value)
+                value = srs
+            else:
+                value = arcpy.SpatialReference(value)
+
+        elif self.datatype in dataset_types and isinstance(value, basestring) and value:
+            value = GPValue(value)
+
+        self.value = value
+        self.altered = True
+
+        return
+
+    def clearMessage(self):
+        self.message = None
+
+    def setErrorMessage(self, message):
+        self.message = message
+
+    def setWarningMessage(self, message):
+        self.message = message
+
+    def hasError(self):
+        return self.message is not None
+
+
+class MessagesShim(object):
+    """ Stand-in for the arcpy messages object, writes to stdout
+    """
+
+    def __init__(self, stream=None):
+        """
+
+        Args:
+            stream: Stream to write to, defaults to stdout
+        """
+
+        self.stream = stream or sys.stdout
+        self.error_count = 0
+
+    def _write(self, level, message):
+        print("{} {}".format(level, message), file=self.stream)
+        self.stream.flush()
+
+    def addMessage(self, message):
+        self._write("INFO", message)
+
+    def addWarningMessage(self, message):
+        self._write("WARNING", message)
+
+    def addErrorMessage(self, message):
+        self.error_count += 1
+        self._write("ERROR", message)
+
+    def addIDMessage(self, message_type, message_id, add_argument1=None, add_argument2=None):
+        self._write(message_type, "{} {} {}".format(message_id, add_argument1 or "", add_argument2 or ""))
+
+    def addGPMessages(self):
+        self._write("INFO", arcpy.GetMessages())
+
+
+def toolbox_tools():
+    """ Return the tool classes registered in the toolbox by class name
+
+    Returns:
+        dict:
+    """
+
+    tbx = imp.load_source("grid_garage_toolbox", toolbox_path)
+
+    return {t.__name__: t for t in tbx.Toolbox().tools}
+
+
+def find_tool(name, registered=None):
+    """ Return a tool class from a class name or dotted path
+
+    Args:
+        name (str): Class name of a registered tool, or module.ClassName
+        registered (dict): Registered tools, loaded from the toolbox if not given
+
+    Returns:
+        type:
+    """
+
+    if "." in name:
+        module, cls = name.rsplit(".", 1)
+        return getattr(import_module(module), cls)
+
+    registered = toolbox_tools() if registered is None else registered
+
+    try:
+        return registered[name]
+    except KeyError:
+        raise ValueError("Tool '{}' is not in the toolbox, use a dotted path for unregistered tools".format(name))
+
+
+def build_parameters(tool, values, supplied=()):
+    """ Build the tool parameters and apply the job values
+
+    Args:
+        tool (BaseTool): Tool instance
+        values (dict): Parameter name/value pairs
+        supplied (list): Names of parameters that are supplied another way, e.g. by a pipeline
+
+    Returns:
+        list: ParameterShim objects
+    """
+
+    pars = tool.getParameterInfo()
+    names = [p.name for p in pars]
+
+    unknown = set(values) - set(names)
+    if unknown:
+        raise ValueError("{} has no parameter(s) {}, expected some of {}".format(type(tool).__name__, sorted(unknown), names))
+
+    shims = [ParameterShim(p, names) for p in pars]
+
+    for p in shims:
+        if p.name in values:
+            p.set_value(values[p.name])
+
+    missing = [p.name for p in shims if p.parameterType == "Required" and p.valueAsText is None and p.name not in supplied]
+    if missing:
+        raise ValueError("{} is missing required parameter(s) {}".format(type(tool).__name__, missing))
+
+    return shims
+
+
+def run_job(job, registered=None, messages=None):
+    """ Run one job
+
+    Args:
+        job (dict): {"tool": name, "parameters": {name: value}}
+        registered (dict): Registered tools
+        messages (MessagesShim): Messages object
+
+    Returns:
+        dict: Timing and outcome of the job
+    """
+
+    messages = messages or MessagesShim()
+
+    t0 = default_timer()
+
+    tool = find_tool(job["tool"], registered)()
+    parameters = build_parameters(tool, job.get("parameters", {}))
+
+    tool.parameters = parameters
+    tool.updateParameters(parameters)
+
+    t1 = default_timer()
+
+    tool.execute(parameters, messages)
+
+    t2 = default_timer()
+
+    return {"tool": job["tool"],
+            "run_id": tool.run_id,
+            "setup_seconds": t1 - t0,
+            "execute_seconds": t2 - t1,
+            "pass_count": getattr(tool.result, "pass_count", None),
+            "fail_count": getattr(tool.result, "fail_count", None),
+            "result_table": getattr(tool.result, "pass_table", None)}
+
+
+def load_jobs(job_file):
+    """ Return the jobs in a JSON or YAML job file
+
+    Args:
+        job_file (str): Path to the job file
+
+    Returns:
+        list: Job dictionaries
+    """
+
+    with open(job_file) as f:
+        if splitext(job_file)[1].lower() in [".yml", ".yaml"]:
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is needed to read '{}', or use a JSON job file".format(job_file))
+            jobs = yaml.safe_load(f)
+        else:
+            jobs = json.load(f)
+
+    if isinstance(jobs, dict):
+        jobs = jobs.get("jobs", [jobs])
+
+    for job in jobs:
+        if "tool" not in job:
+            raise ValueError("Job in '{}' has no 'tool': {}".format(job_file, job))
+
+    return jobs
+
+
+def main(args=None):
+    """ Command line entry point
+
+    Args:
+        args (list): Command line arguments, defaults to sys.argv
+
+    Returns:
+        int: Exit code, the number of jobs that raised an error
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m base.headless", description="Run Grid Garage tools from job files")
+    parser.add_argument("job_files", nargs="+", help="JSON or YAML job files")
+    parser.add_argument("--timings", help="Write job timings to this JSON file")
+    parser.add_argument("--keep-going", action="store_true", help="Run the remaining jobs after a job fails")
+    args = parser.parse_args(args)
+
+    jobs = [job for f in args.job_files for job in load_jobs(f)]
+    registered = None if all("." in job["tool"] for job in jobs) else toolbox_tools()
+
+    timings = []
+    failed = 0
+
+    for i, job in enumerate(jobs, start=1):
+        print("=== Job {} of {}: {}".format(i, len(jobs), job["tool"]))
+        try:
+            timing = run_job(job, registered)
+        except Exception as e:
+            failed += 1
+            timing = {"tool": job["tool"], "error": repr(e)}
+            print("ERROR Job {} failed: {!r}".format(i, e))
+            if not args.keep_going:
+                timings.append(timing)
+                break
+        else:
+            print("=== Job {} done in {:.3f}s ({} passed, {} failed)".format(i, timing["setup_seconds"] + timing["execute_seconds"], timing["pass_count"], timing["fail_count"]))
+        timings.append(timing)
+
+    if args.timings:
+        with open(args.timings, "w") as f:
+            json.dump(timings, f, indent=2)
+
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
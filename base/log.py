@@ -7,9 +7,18 @@ import logging
 from utils import static_vars
 from traceback import format_exception
 from sys import exc_info
+from threading import Thread, Lock
+from timeit import default_timer
+from Queue import Queue, Empty
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from ast import literal_eval
+from datetime import datetime
+import copy
+import json
 
 
-APPDATA_PATH = os.path.join(os.environ["USERPROFILE"], "AppData", "Local", "GridGarage")
+APPDATA_PATH = os.path.join(os.environ.get("USERPROFILE", os.path.expanduser("~")), "AppData", "Local", "GridGarage")
 
 LOG_FILE = os.path.join(APPDATA_PATH, "gridgarage.log")
 
@@ -181,3 +190,366 @@ class ArcStreamHandler(logging.StreamHandler):
         self.flush()
 
         return
+
+
+class QueueHandler(logging.Handler):
+    """ Puts records on a queue for a QueueListener, a backport of the Python 3 handler
+
+    The message is formatted in the logging thread, so later changes to
+    the logged objects do not show, and the record is stripped of its
+    arguments and traceback so it is cheap to hand over.
+    """
+
+    def __init__(self, queue):
+        """
+
+        Args:
+            queue (Queue.Queue): Queue drained by the listener
+        """
+
+        logging.Handler.__init__(self)
+
+        self.queue = queue
+
+    def prepare(self, record):
+        """ Return a copy of the record with its message formatted
+
+        Args:
+            record (logging.LogRecord): The record
+
+        Returns:
+            logging.LogRecord:
+        """
+
+        msg = self.format(record)
+        record = copy.copy(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+    """ Drains a queue of records to handlers on a background thread, a backport of the Python 3 listener
+
+    Records are taken in batches, handlers with a flush_batch method are
+    told when a batch ends and when the queue has been idle a while.
+    """
+
+    _sentinel = None
+
+    def __init__(self, queue, *handlers, **kwargs):
+        """
+
+        Args:
+            queue (Queue.Queue): Queue filled by a QueueHandler
+            handlers (logging.Handler): Handlers of the records
+            respect_handler_level (bool): Flag to skip records below a handler's level, default True
+            idle_seconds (float): Wait before an idle flush, default 0.25
+        """
+
+        self.queue = queue
+        self.handlers = handlers
+        self.respect_handler_level = kwargs.get("respect_handler_level", True)
+        self.idle_seconds = kwargs.get("idle_seconds", 0.25)
+        self._thread = None
+
+    def start(self):
+        """ Start the background thread """
+
+        self._thread = t = Thread(target=self._monitor, name="log listener")
+        t.daemon = True
+        t.start()
+
+    def handle(self, record):
+        for handler in self.handlers:
+            if not self.respect_handler_level or record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _flush(self, force=False):
+        for handler in self.handlers:
+            f = getattr(handler, "flush_batch", None)
+            if f:
+                try:
+                    f(force)
+                except Exception:
+                    pass
+
+    def _monitor(self):
+        while True:
+            try:
+                record = self.queue.get(timeout=self.idle_seconds)
+            except Empty:
+                self._flush(True)
+                continue
+
+            while record is not self._sentinel:
+                self.handle(record)
+                try:
+                    record = self.queue.get_nowait()
+                except Empty:
+                    break
+
+            self._flush()
+
+            if record is self._sentinel:
+                self._flush(True)
+                return
+
+    def stop(self):
+        """ Handle the queued records and stop the background thread """
+
+        if self._thread:
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+
+class BatchFileHandler(logging.FileHandler):
+    """ File handler that flushes once per batch of records rather than per record
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self, force=False):
+        logging.FileHandler.flush(self)
+
+    def close(self):
+        self.flush_batch(True)
+        logging.FileHandler.close(self)
+
+
+class ArcMessageForwarder(logging.Handler):
+    """ Forwards records to the ArcGIS messages object, coalesced and rate limited
+
+    The geoprocessing messages object may only be called from the tool's
+    own thread, so records handled on the log thread are held in an outbox
+    that the tool sends with drain, between rows.
+
+    Consecutive info messages become one multi-line message at most once
+    per interval. Warnings and errors are queued at once, after any info
+    messages held before them. Beyond the limit per interval only the first
+    and latest info messages are kept, with a count of those skipped.
+    """
+
+    def __init__(self, messages, interval=0.5, max_lines=100):
+        """
+
+        Args:
+            messages (object): ArcGIS tool messages object
+            interval (float): Seconds between info messages
+            max_lines (int): Info lines sent per interval
+        """
+
+        logging.Handler.__init__(self)
+
+        self.messages = messages
+        self.interval = interval
+        self.head_lines = max_lines // 2
+        self.head = []
+        self.tail = deque(maxlen=max_lines - self.head_lines)
+        self.skipped = 0
+        self.last_sent = 0.0
+        self.outbox = []  # (level, message) waiting for drain
+        self.sent_lock = Lock()
+
+    def emit(self, record):
+        try:
+            msg = self.format(record).replace("\n", ", ").replace("\t", " ").replace("  ", " ")
+        except Exception:
+            msg = str(record.msg)
+
+        lvl = record.levelno
+
+        with self.sent_lock:
+            if lvl >= logging.WARNING:
+                self._queue_pending()
+                self.outbox.append((lvl, msg))
+            elif len(self.head) < self.head_lines:
+                self.head.append(msg)
+            else:
+                if len(self.tail) == self.tail.maxlen:
+                    self.skipped += 1
+                self.tail.append(msg)
+
+    def _queue_pending(self):
+        lines = self.head
+        if self.skipped:
+            lines.append("... {} messages not shown, see the log file".format(self.skipped))
+        lines.extend(self.tail)
+
+        if lines:
+            self.outbox.append((logging.INFO, "\n".join(lines)))
+
+        self.head = []
+        self.tail.clear()
+        self.skipped = 0
+        self.last_sent = default_timer()
+
+    def flush_batch(self, force=False):
+        with self.sent_lock:
+            if force or default_timer() - self.last_sent >= self.interval:
+                self._queue_pending()
+
+    def drain(self):
+        """ Send the queued messages, call from the tool's thread only """
+
+        with self.sent_lock:
+            outbox, self.outbox = self.outbox, []
+
+        for lvl, msg in outbox:
+            if lvl >= logging.ERROR:
+                self.messages.addErrorMessage(msg)
+            elif lvl >= logging.WARNING:
+                self.messages.addWarningMessage(msg)
+            else:
+                self.messages.addMessage(msg)
+
+    def close(self):
+        self.flush_batch(True)
+        logging.Handler.close(self)
+
+
+class LevelSampler(logging.Filter):
+    """ Thins out records of chosen levels while they arrive faster than a rate
+
+    While more than max_rate records of a sampled level arrive per second,
+    only one in every N of them is kept. Warnings, errors, structured
+    events and records of a row's outcome (logged with an 'outcome' extra)
+    are never sampled.
+    """
+
+    def __init__(self, sampling, max_rate=50.0):
+        """
+
+        Args:
+            sampling (dict): Level (number or name) -> N, keep one record in N
+            max_rate (float): Records per second of a level before sampling starts
+        """
+
+        logging.Filter.__init__(self)
+
+        self.sampling = {logging.getLevelName(k) if isinstance(k, basestring) else k: max(int(n), 1) for k, n in (sampling or {}).iteritems()}
+        self.max_rate = max_rate
+        self.lock = Lock()
+        self.windows = {}  # level -> [window start, count in window, count since sampling started]
+        self.dropped = 0
+
+    def filter(self, record):
+        n = self.sampling.get(record.levelno)
+
+        if not n or n == 1 or record.levelno >= logging.WARNING or hasattr(record, "event") or hasattr(record, "outcome"):
+            return True
+
+        now = default_timer()
+
+        with self.lock:
+            w = self.windows.setdefault(record.levelno, [now, 0, 0])
+            if now - w[0] >= 1.0:
+                w[0], w[1], w[2] = now, 0, 0
+
+            w[1] += 1
+            if w[1] <= self.max_rate:
+                return True
+
+            w[2] += 1
+            if w[2] % n == 1:
+                return True
+
+            self.dropped += 1
+
+        return False
+
+
+JSON_LOG_BYTES = 5 * 1024 * 1024  # size of a JSON-lines log before it rotates
+JSON_LOG_BACKUPS = 5
+
+
+class EventFilter(logging.Filter):
+    """ Passes either only structured event records or only the others
+    """
+
+    def __init__(self, events):
+        """
+
+        Args:
+            events (bool): True to pass only event records
+        """
+
+        logging.Filter.__init__(self)
+
+        self.events = events
+
+    def filter(self, record):
+        return hasattr(record, "event") == self.events
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """ Formats an event record as a single line JSON object
+    """
+
+    def format(self, record):
+        event = {"time": datetime.fromtimestamp(record.created).isoformat(), "level": record.levelname}
+        event.update(record.event)
+
+        return json.dumps(event, default=str, sort_keys=True)
+
+
+class JsonLinesHandler(RotatingFileHandler):
+    """ Writes event records to a JSON-lines file that rotates by size
+    """
+
+    def __init__(self, filename, max_bytes=JSON_LOG_BYTES, backup_count=JSON_LOG_BACKUPS):
+        """
+
+        Args:
+            filename (str): Path of the log file, backups get .1, .2, ... appended
+            max_bytes (int): Size at which the file rotates
+            backup_count (int): Number of backups kept
+        """
+
+        RotatingFileHandler.__init__(self, filename, maxBytes=max_bytes, backupCount=backup_count)
+
+        self.setFormatter(JsonLinesFormatter())
+        self.addFilter(EventFilter(True))
+
+
+def parse_failure(failure):
+    """ Return the exception type and message of a failure description
+
+    Failures are recorded as the repr of a formatted exception, the last
+    line of which is 'Type: message'.
+
+    Args:
+        failure (str): Failure description
+
+    Returns:
+        tuple: (exception type, message), (None, None) if there is no failure
+    """
+
+    if not failure:
+        return None, None
+
+    try:
+        lines = literal_eval(failure)
+        last = lines[-1] if isinstance(lines, list) and lines else failure
+    except (ValueError, SyntaxError):
+        last = failure
+
+    last = last.strip().splitlines()[-1] if last.strip() else last
+    exc_type, sep, message = last.partition(": ")
+
+    if not sep or " " in exc_type:
+        return None, last
+
+    return exc_type.split(".")[-1], message
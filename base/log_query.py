@@ -0,0 +1,229 @@
+"""
+Description
+-----------
+    This module summarises the JSON-lines run logs of Grid Garage tools
+
+    Tools run with 'Write a JSON-lines run log' write one JSON object per
+    event to <tool>.jsonl in the Grid Garage app data folder. This reads
+    any number of those logs, including rotated backups, and reports per
+    tool the runs, rows by outcome and time spent, the most common failure
+    causes and the slowest rows.
+
+        python -m base.log_query [log files or folders ...] [--tool NAME] [--since 2017-01-01] [--top 10] [--json]
+
+    Without paths the app data folder is read.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function, division
+from collections import OrderedDict, Counter, defaultdict
+from glob import glob
+from os.path import join, isdir, expanduser
+import argparse
+import json
+import os
+import re
+import sys
+
+
+# as base.log.APPDATA_PATH, not imported so logs can be read where arcpy is not installed
+APPDATA_PATH = join(os.environ.get("USERPROFILE", expanduser("~")), "AppData", "Local", "GridGarage")
+
+_masks = [(re.compile(r"'[^']*'|\"[^\"]*\""), "'...'"), (re.compile(r"\d+(\.\d+)?"), "#")]
+
+
+def find_logs(paths=None):
+    """ Return the JSON-lines logs in the paths, oldest backup first
+
+    Args:
+        paths (list): Log files or folders, defaults to the app data folder
+
+    Returns:
+        list: Log file paths
+    """
+
+    logs = []
+
+    for path in paths or [APPDATA_PATH]:
+        if not isdir(path):
+            logs.append(path)
+            continue
+        for log in sorted(glob(join(path, "*.jsonl"))):
+            backups = glob(log + ".*")
+            logs.extend(sorted(backups, key=lambda b: -int(b.rsplit(".", 1)[-1]) if b.rsplit(".", 1)[-1].isdigit() else 0))
+            logs.append(log)
+
+    return logs
+
+
+def iter_events(logs, tool=None, since=None):
+    """ Yield the events of JSON-lines logs, skipping lines that do not parse
+
+    Args:
+        logs (list): Log file paths
+        tool (str): Only events of this tool
+        since (str): Only events at or after this ISO date/time
+
+    Returns:
+        Generator of dicts
+    """
+
+    for log in logs:
+        with open(log) as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if tool and e.get("tool") != tool:
+                    continue
+                if since and e.get("time", "") < since:
+                    continue
+                yield e
+
+
+def normalise_message(message):
+    """ Mask quoted strings and numbers so failures of one cause group together
+
+    Args:
+        message (str): Failure message
+
+    Returns:
+        str:
+    """
+
+    for pattern, mask in _masks:
+        message = pattern.sub(mask, message or "")
+
+    return message.strip()
+
+
+def percentile(values, p):
+    """ Return the nearest-rank percentile of values, None if there are none """
+
+    if not values:
+        return None
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+def summarise(events, top=10):
+    """ Aggregate events per tool, failure cause and row time
+
+    Args:
+        events (iterable): Events as iter_events yields them
+        top (int): Number of failure causes and slow rows reported
+
+    Returns:
+        OrderedDict: 'tools', 'failures' and 'slowest_rows'
+    """
+
+    runs = defaultdict(set)
+    run_seconds = defaultdict(float)
+    outcomes = defaultdict(Counter)
+    row_seconds = defaultdict(list)
+    failures = Counter()
+    rows = []
+
+    for e in events:
+        tool = e.get("tool")
+        kind = e.get("event")
+        runs[tool].add(e.get("run_id"))
+
+        if kind == "run" and e.get("phase") == "end":
+            run_seconds[tool] += e.get("seconds") or 0
+        elif kind == "row":
+            outcomes[tool][e.get("outcome")] += 1
+            if e.get("seconds") is not None:
+                row_seconds[tool].append(e["seconds"])
+                rows.append((e["seconds"], tool, e.get("run_id"), e.get("row"), e.get("key")))
+            if e.get("outcome") == "failed":
+                failures[(tool, e.get("exception"), normalise_message(e.get("message")))] += 1
+
+    tools = OrderedDict()
+    for tool in sorted(runs, key=lambda t: -run_seconds[t]):
+        secs = row_seconds[tool]
+        tools[tool] = OrderedDict([("runs", len(runs[tool])),
+                                   ("run_seconds", run_seconds[tool]),
+                                   ("rows", dict(outcomes[tool])),
+                                   ("row_seconds", sum(secs)),
+                                   ("mean_row_seconds", sum(secs) / len(secs) if secs else None),
+                                   ("p95_row_seconds", percentile(secs, 95))])
+
+    return OrderedDict([("tools", tools),
+                        ("failures", [OrderedDict([("tool", t), ("exception", x), ("message", m), ("count", n)])
+                                      for (t, x, m), n in failures.most_common(top)]),
+                        ("slowest_rows", [OrderedDict([("tool", t), ("run_id", r), ("row", i), ("key", k), ("seconds", s)])
+                                          for s, t, r, i, k in sorted(rows, reverse=True)[:top]])])
+
+
+def report(summary):
+    """ Return a summary as text lines
+
+    Args:
+        summary (OrderedDict): As summarise returns it
+
+    Returns:
+        list:
+    """
+
+    def secs(s):
+        return "-" if s is None else "{:.3f}".format(s)
+
+    lines = ["{:<32} {:>5} {:>8} {:>8} {:>11} {:>10} {:>10}".format("Tool", "Runs", "Passed", "Failed", "Run s", "Mean row s", "p95 row s")]
+    for tool, t in summary["tools"].iteritems():
+        lines.append("{:<32} {:>5} {:>8} {:>8} {:>11.1f} {:>10} {:>10}".format(tool, t["runs"], t["rows"].get("passed", 0), t["rows"].get("failed", 0),
+                                                                              t["run_seconds"], secs(t["mean_row_seconds"]), secs(t["p95_row_seconds"])))
+
+    if summary["failures"]:
+        lines.extend(["", "Failure causes"])
+        for f in summary["failures"]:
+            lines.append("{:>6}  {}  {}: {}".format(f["count"], f["tool"], f["exception"], f["message"]))
+
+    if summary["slowest_rows"]:
+        lines.extend(["", "Slowest rows"])
+        for r in summary["slowest_rows"]:
+            lines.append("{:>10} s  {}  {} row {}  {}".format(secs(r["seconds"]), r["tool"], r["run_id"], r["row"], r["key"]))
+
+    return lines
+
+
+def main(args=None):
+    """ Command line entry point
+
+    Args:
+        args (list): Command line arguments, defaults to sys.argv
+
+    Returns:
+        int: Exit code
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m base.log_query", description="Summarise Grid Garage JSON-lines run logs")
+    parser.add_argument("paths", nargs="*", help="Log files or folders, the app data folder by default")
+    parser.add_argument("--tool", help="Only this tool")
+    parser.add_argument("--since", help="Only events at or after this ISO date/time")
+    parser.add_argument("--top", type=int, default=10, help="Failure causes and slow rows to report")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(args)
+
+    logs = find_logs(args.paths)
+    if not logs:
+        print("No JSON-lines logs found")
+        return 1
+
+    summary = summarise(iter_events(logs, args.tool, args.since), args.top)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("\n".join(report(summary)))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""
+Description
+-----------
+    This module records per-row timing and resource use of tool runs
+
+    For each row the wall time, CPU time, peak resident memory and bytes
+    read and written are recorded, with the wall time split into validation,
+    the tool's main function and result writing. Memory and IO figures need
+    psutil, they are left empty without it (memory falls back to the
+    resource module where there is one).
+
+    CPU, memory and IO are process-wide, rows processed in parallel share
+    them, so they are only indicative when a tool has several workers.
+
+Implementation
+--------------
+"""
+
+from __future__ import division
+from base.utils import take_validation_seconds
+from threading import Lock
+from timeit import default_timer
+import os
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+metric_fields = ["row", "geodata", "status", "wall_seconds", "cpu_seconds", "validation_seconds", "main_seconds",
+                 "write_seconds", "peak_rss_mb", "read_mb", "write_mb"]
+
+
+def cpu_seconds():
+    """ Return the user and system CPU time of the process
+
+    Returns:
+        float:
+    """
+
+    t = os.times()
+
+    return t[0] + t[1]
+
+
+class ResourceProbe(object):
+    """ Reads the memory and IO counters of the process
+    """
+
+    def __init__(self):
+        """ """
+
+        self.process = psutil.Process() if psutil else None
+
+        return
+
+    def peak_rss_mb(self):
+        """ Return the peak (or current) resident memory in MB, None if unavailable
+
+        Returns:
+            float:
+        """
+
+        if self.process:
+            mem = self.process.memory_info()
+            return getattr(mem, "peak_wset", mem.rss) / 1048576.0
+
+        if resource:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0  # kB on linux
+
+        return None
+
+    def io_bytes(self):
+        """ Return the (read, written) byte counts of the process, None if unavailable
+
+        Returns:
+            tuple:
+        """
+
+        try:
+            io = self.process.io_counters()
+            return io.read_bytes, io.write_bytes
+        except Exception:
+            return None
+
+
+class RunMetrics(object):
+    """ Collects the metrics of the rows of a run
+    """
+
+    def __init__(self, geodata_field=None):
+        """
+
+        Args:
+            geodata_field (str): Row field that identifies a row's dataset
+        """
+
+        self.geodata_field = geodata_field
+        self.probe = ResourceProbe()
+        self.lock = Lock()
+        self.rows = {}
+
+        return
+
+    def start(self, row_num, row):
+        """ Mark the start of a row, call from the thread processing it
+
+        Args:
+            row_num (int): Row number
+            row (dict): Row values
+
+        Returns:
+            dict: Start state, for stop
+        """
+
+        take_validation_seconds()  # discard any validation done outside the row
+
+        return {"row": row_num,
+                "geodata": row.get(self.geodata_field) if self.geodata_field else None,
+                "wall": default_timer(),
+                "cpu": cpu_seconds(),
+                "io": self.probe.io_bytes()}
+
+    def stop(self, start, status, validation_seconds=0.0):
+        """ Record a row once its function has finished
+
+        Args:
+            start (dict): State returned by start
+            status (str): Outcome of the row
+            validation_seconds (float): Validation time spent on the row before it started
+
+        Returns:
+            :
+        """
+
+        wall = default_timer() - start["wall"]
+        validation = take_validation_seconds()
+
+        io = self.probe.io_bytes()
+        read_mb = write_mb = None
+        if io and start["io"]:
+            read_mb = (io[0] - start["io"][0]) / 1048576.0
+            write_mb = (io[1] - start["io"][1]) / 1048576.0
+
+        m = {"row": start["row"],
+             "geodata": start["geodata"],
+             "status": status,
+             "wall_seconds": wall + validation_seconds,
+             "cpu_seconds": cpu_seconds() - start["cpu"],
+             "validation_seconds": validation + validation_seconds,
+             "main_seconds": wall - validation,
+             "write_seconds": 0.0,
+             "peak_rss_mb": self.probe.peak_rss_mb(),
+             "read_mb": read_mb,
+             "write_mb": write_mb}
+
+        with self.lock:
+            self.rows[start["row"]] = m
+
+        return
+
+    def add_write(self, row_num, seconds):
+        """ Add the time taken to write a row's outcome
+
+        Args:
+            row_num (int): Row number
+            seconds (float): Time taken
+
+        Returns:
+            :
+        """
+
+        with self.lock:
+            m = self.rows.get(row_num)
+            if m:
+                m["write_seconds"] += seconds
+                m["wall_seconds"] += seconds
+
+        return
+
+    def get(self, row_num):
+        """ Return the metrics of a row
+
+        Args:
+            row_num (int): Row number
+
+        Returns:
+            dict: None if the row has not been recorded
+        """
+
+        with self.lock:
+            m = self.rows.get(row_num)
+            return dict(m) if m else None
+
+    def records(self):
+        """ Return the row metrics in row order
+
+        Returns:
+            list: Dictionaries with the metric_fields keys
+        """
+
+        with self.lock:
+            return [self.rows[k] for k in sorted(self.rows)]
+
+    def summary(self, slowest=5):
+        """ Return summary lines of the run: wall time percentiles and the slowest rows
+
+        Args:
+            slowest (int): Number of slowest rows to list
+
+        Returns:
+            list: Lines of text
+        """
+
+        records = self.records()
+
+        if not records:
+            return ["No row metrics"]
+
+        walls = sorted(r["wall_seconds"] for r in records)
+
+        def percentile(p):
+            return walls[min(len(walls) - 1, int(round(p / 100.0 * (len(walls) - 1))))]
+
+        phases = {k: sum(r[k] for r in records) for k in ["validation_seconds", "main_seconds", "write_seconds"]}
+
+        lines = ["Row wall time: p50 {:.3f}s, p95 {:.3f}s, max {:.3f}s over {} rows".format(percentile(50), percentile(95), walls[-1], len(walls)),
+                 "Time by phase: validation {validation_seconds:.3f}s, main {main_seconds:.3f}s, write {write_seconds:.3f}s".format(**phases)]
+
+        for r in sorted(records, key=lambda x: x["wall_seconds"], reverse=True)[:slowest]:
+            lines.append("Slow row {row}: {wall_seconds:.3f}s {geodata}".format(**r))
+
+        return lines
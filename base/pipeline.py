@@ -0,0 +1,198 @@
+"""
+Description
+-----------
+    This module chains tools into a pipeline that streams result records
+
+    Each stage is a tool that runs in its own thread. The pass records of a
+    stage are handed straight to the next stage as input rows, rather than
+    going through a CSV, a geodatabase table and a table view. Only the final
+    stage, and any stage marked as a checkpoint, writes a result table.
+    Failures are always written.
+
+        python -m base.pipeline pipeline.json
+
+    A pipeline file holds {"stages": [...]}, where each stage is a job as for
+    base.headless with an optional "checkpoint" flag. The field parameters of
+    a stage name the keys of the records of the stage before, e.g.
+
+        {"stages": [{"tool": "SearchRastersTool", "parameters": {...}},
+                    {"tool": "ReprojectRasterTool", "parameters": {"raster": "geodata", ...}, "checkpoint": true},
+                    {"tool": "ClipRasterTool", "parameters": {...}}]}
+
+    The input table of every stage after the first is supplied by the
+    pipeline and must not be given.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from base.headless import find_tool, build_parameters, MessagesShim, toolbox_tools
+from Queue import Queue
+from threading import Thread
+from timeit import default_timer
+import argparse
+import json
+import sys
+
+
+end_of_stage = object()  # sentinel put on a queue when a stage has finished
+
+
+def iter_queue(queue):
+    """ Yield the records put on a queue until the end of the stage feeding it
+
+    Args:
+        queue (Queue.Queue): Queue of records
+
+    Returns:
+        generator:
+    """
+
+    while True:
+        rec = queue.get()
+        if rec is end_of_stage:
+            return
+        yield rec
+
+
+class PipelineStage(object):
+    """ A tool with its parameters and the queues that link it to its neighbours
+    """
+
+    def __init__(self, job, registered=None, upstream=None, checkpoint=False, final=True, index=1):
+        """
+
+        Args:
+            job (dict): {"tool": name, "parameters": {name: value}}
+            registered (dict): Registered tools
+            upstream (Queue.Queue): Queue of input records, None for the first stage
+            checkpoint (bool): Flag to write the result table of an intermediate stage
+            final (bool): Flag for the last stage
+            index (int): Position of the stage in the pipeline, 1-based
+        """
+
+        self.name = job["tool"]
+        self.tool = find_tool(self.name, registered)()
+
+        # stages of the same tool run at once, each needs handlers of its own
+        self.tool.logger_name = "{0}_stage{1}".format(self.tool.run_id, index)
+
+        # the first parameter is the input table, later stages are fed by the pipeline
+        supplied = [self.tool.getParameterInfo()[0].name] if upstream else []
+        self.parameters = build_parameters(self.tool, job.get("parameters", {}), supplied)
+
+        if upstream:
+            self.tool.row_source = iter_queue(upstream)
+
+        self.downstream = None if final else Queue()
+
+        if self.downstream:
+            self.tool.result.forward = self.downstream.put
+            self.tool.result.materialise = checkpoint
+
+        self.error = None
+        self.seconds = None
+
+        return
+
+    def run(self, messages):
+        """ Execute the tool, always ending the stage for the next one
+
+        Args:
+            messages (MessagesShim): Messages object
+
+        Returns:
+
+        """
+
+        t0 = default_timer()
+
+        try:
+            self.tool.parameters = self.parameters
+            self.tool.updateParameters(self.parameters)
+            self.tool.execute(self.parameters, messages)
+        except Exception as e:
+            self.error = e
+            messages.addErrorMessage("Stage {} failed: {!r}".format(self.name, e))
+        finally:
+            self.seconds = default_timer() - t0
+            if self.downstream:
+                self.downstream.put(end_of_stage)
+
+        return
+
+
+def run_pipeline(stages, messages=None):
+    """ Run the stages of a pipeline concurrently, streaming records between them
+
+    Args:
+        stages (list): Stage dictionaries, jobs with an optional "checkpoint" flag
+        messages (MessagesShim): Messages object
+
+    Returns:
+        list: Outcome of each stage
+    """
+
+    if not stages:
+        raise ValueError("The pipeline has no stages")
+
+    messages = messages or MessagesShim()
+    registered = None if all("." in s["tool"] for s in stages) else toolbox_tools()
+
+    built = []
+    for i, s in enumerate(stages):
+        upstream = built[-1].downstream if built else None
+        built.append(PipelineStage(s, registered, upstream, s.get("checkpoint", False), i == len(stages) - 1, i + 1))
+
+    threads = [Thread(target=stage.run, args=(messages,), name=stage.name) for stage in built]
+
+    for t in threads:
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    return [{"tool": stage.name,
+             "seconds": stage.seconds,
+             "pass_count": stage.tool.result.pass_count,
+             "fail_count": stage.tool.result.fail_count,
+             "result_table": stage.tool.result.pass_table if stage.tool.result.materialise else None,
+             "error": repr(stage.error) if stage.error else None} for stage in built]
+
+
+def main(args=None):
+    """ Command line entry point
+
+    Args:
+        args (list): Command line arguments, defaults to sys.argv
+
+    Returns:
+        int: Exit code, the number of stages that raised an error
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m base.pipeline", description="Run a pipeline of Grid Garage tools")
+    parser.add_argument("pipeline_file", help="JSON pipeline file")
+    parser.add_argument("--timings", help="Write stage timings to this JSON file")
+    args = parser.parse_args(args)
+
+    with open(args.pipeline_file) as f:
+        stages = json.load(f)
+
+    if isinstance(stages, dict):
+        stages = stages["stages"]
+
+    outcome = run_pipeline(stages)
+
+    for o in outcome:
+        print("=== {tool}: {pass_count} passed, {fail_count} failed in {seconds:.3f}s".format(**o))
+
+    if args.timings:
+        with open(args.timings, "w") as f:
+            json.dump(outcome, f, indent=2)
+
+    return sum(1 for o in outcome if o["error"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
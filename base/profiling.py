@@ -0,0 +1,262 @@
+"""
+Description
+-----------
+    This module profiles tool runs with cProfile or a sampling profiler
+
+    CPROFILE writes a .prof file (pstats format, e.g. for snakeviz) and a
+    collapsed-stack file of caller;callee edges. SAMPLING has a much lower
+    overhead, it snapshots the stacks of the profiled threads at a fixed
+    interval and writes exact collapsed stacks. Collapsed-stack files can be
+    drawn with flamegraph.pl or speedscope.
+
+    Rows run in their own profiles so rows on worker threads are covered,
+    and profiling can be limited to the first rows of a run.
+
+Implementation
+--------------
+"""
+
+from __future__ import division
+from contextlib import contextmanager
+from collections import Counter
+from threading import Lock, Thread, Event, current_thread
+from os.path import basename
+import cProfile
+import pstats
+import sys
+
+
+profile_modes = ["NONE", "CPROFILE", "SAMPLING"]
+
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+
+def frame_label(code):
+    """ Return the collapsed-stack label of a code object
+
+    Args:
+        code: Code object
+
+    Returns:
+        str:
+    """
+
+    return "{}:{}:{}".format(basename(code.co_filename), code.co_firstlineno, code.co_name).replace(";", ",").replace(" ", "_")
+
+
+class Profiler(object):
+    """ Profiles the main thread of a tool run and its rows
+    """
+
+    def __init__(self, mode="NONE", max_rows=0, interval=SAMPLE_INTERVAL):
+        """
+
+        Args:
+            mode (str): One of profile_modes
+            max_rows (int): Profile only rows up to this row number, 0 to profile the whole run
+            interval (float): Seconds between samples in SAMPLING mode
+        """
+
+        if mode not in profile_modes:
+            raise ValueError("Profile mode '{}' is not one of {}".format(mode, profile_modes))
+
+        self.mode = mode
+        self.max_rows = max_rows or 0
+        self.interval = interval
+
+        self.lock = Lock()
+        self.profiles = []
+        self.samples = Counter()
+        self.sampled_threads = Counter()  # thread ident -> depth of profiled sections
+        self.main = None
+        self.main_thread = None
+        self.stop = Event()
+
+        return
+
+    @property
+    def active(self):
+        return self.mode != "NONE"
+
+    @contextmanager
+    def session(self):
+        """ Profile the block, the whole run unless only the first rows are profiled
+
+        Returns:
+
+        """
+
+        if not self.active:
+            yield
+            return
+
+        self.main_thread = current_thread()
+        sampler = None
+
+        if self.mode == "SAMPLING":
+            sampler = Thread(target=self._sample, name="profile sampler")
+            sampler.daemon = True
+            sampler.start()
+
+        if not self.max_rows:
+            if self.mode == "CPROFILE":
+                self.main = cProfile.Profile()
+                self.main.enable()
+            else:
+                self._enter_thread()
+
+        try:
+            yield
+        finally:
+            if self.main:
+                self.main.disable()
+                self.profiles.append(self.main)
+            elif self.mode == "SAMPLING" and not self.max_rows:
+                self._leave_thread()
+            if sampler:
+                self.stop.set()
+                sampler.join()
+
+        return
+
+    @contextmanager
+    def row(self, row_num):
+        """ Profile a row, call from the thread processing it
+
+        Args:
+            row_num (int): Row number
+
+        Returns:
+
+        """
+
+        if not self.active or (self.max_rows and row_num > self.max_rows):
+            yield
+            return
+
+        if self.mode == "SAMPLING":
+            self._enter_thread()
+            try:
+                yield
+            finally:
+                self._leave_thread()
+            return
+
+        # a thread can only have one profiler enabled, pause the run's while the row has its own
+        main = self.main if current_thread() is self.main_thread else None
+        if main:
+            main.disable()
+
+        p = cProfile.Profile()
+        p.enable()
+        try:
+            yield
+        finally:
+            p.disable()
+            with self.lock:
+                self.profiles.append(p)
+            if main:
+                main.enable()
+
+        return
+
+    def _enter_thread(self):
+        with self.lock:
+            self.sampled_threads[current_thread().ident] += 1
+
+    def _leave_thread(self):
+        with self.lock:
+            ident = current_thread().ident
+            self.sampled_threads[ident] -= 1
+            if self.sampled_threads[ident] <= 0:
+                del self.sampled_threads[ident]
+
+    def _sample(self):
+        """ Sampler thread, counts the stacks of the profiled threads
+
+        Returns:
+
+        """
+
+        while not self.stop.wait(self.interval):
+            with self.lock:
+                idents = list(self.sampled_threads)
+
+            frames = sys._current_frames()
+
+            for ident in idents:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.samples[";".join(reversed(stack))] += 1
+
+        return
+
+    def write(self, out_base):
+        """ Write the profile files
+
+        Args:
+            out_base (str): Path and base name of the output files
+
+        Returns:
+            list: Paths of the files written
+        """
+
+        written = []
+
+        if self.mode == "CPROFILE" and self.profiles:
+            stats = pstats.Stats(*self.profiles)
+            stats.dump_stats(out_base + ".prof")
+            written.append(out_base + ".prof")
+
+            with open(out_base + ".collapsed", "w") as f:
+                for line in collapsed_edges(stats):
+                    f.write(line + "\n")
+            written.append(out_base + ".collapsed")
+
+        elif self.mode == "SAMPLING" and self.samples:
+            with open(out_base + ".collapsed", "w") as f:
+                for stack, count in sorted(self.samples.iteritems()):
+                    f.write("{} {}\n".format(stack, count))
+            written.append(out_base + ".collapsed")
+
+        return written
+
+
+def collapsed_edges(stats):
+    """ Return collapsed-stack lines from cProfile statistics
+
+    cProfile keeps caller/callee pairs rather than whole stacks, so each line
+    is a two-frame stack weighted by the callee's own time (microseconds)
+    attributed to that caller.
+
+    Args:
+        stats (pstats.Stats): Profile statistics
+
+    Returns:
+        list: Lines of 'caller;callee weight'
+    """
+
+    def label(func):
+        filename, line, name = func
+        return "{}:{}:{}".format(basename(filename), line, name).replace(";", ",").replace(" ", "_")
+
+    lines = []
+
+    for func, (cc, nc, tt, ct, callers) in stats.stats.iteritems():
+        if not callers:
+            weight = int(tt * 1e6)
+            if weight:
+                lines.append("{} {}".format(label(func), weight))
+            continue
+
+        for caller, caller_stats in callers.iteritems():
+            own = caller_stats[2] if isinstance(caller_stats, tuple) else tt / max(len(callers), 1)
+            weight = int(own * 1e6)
+            if weight:
+                lines.append("{};{} {}".format(label(caller), label(func), weight))
+
+    return sorted(lines)
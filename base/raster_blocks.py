@@ -0,0 +1,309 @@
+"""
+Description
+-----------
+    This module provides block reductions of rasters (aggregation and block
+    statistics) built on base.raster_io
+
+    Aligned blocks of f x g cells are reshaped to (rows/f, f, cols/g, g) and
+    reduced with nan-aware numpy functions. Rasters are read in strips of
+    whole block rows which are reduced across a pool of threads. Results
+    spread back over the source grid are produced in strips too, so memory
+    use is bounded by the strip size rather than the raster size.
+
+Implementation
+--------------
+"""
+
+from __future__ import division
+from collections import namedtuple
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from threading import Semaphore
+from base.raster_io import BLOCK_CELLS, read_rows, is_integer_grid
+from base.raster_stats import valid_mask
+import numpy as np
+import warnings
+
+
+block_methods = ["SUM", "MEAN", "MAXIMUM", "MINIMUM", "MEDIAN", "RANGE", "STD"]
+integer_methods = ["SUM", "MAXIMUM", "MINIMUM", "RANGE"]  # integer rasters keep an integer output for these
+INTEGER_NODATA = np.iinfo(np.int32).min
+FLOAT_NODATA = float(np.finfo(np.float32).min)
+
+BlockLayout = namedtuple("BlockLayout", "block_rows block_cols out_rows out_cols top_pad left_skip xmin ymin")
+
+
+def parse_neighbourhood(neighbourhood, grid):
+    """ Return the block size in cells of a rectangle neighbourhood
+
+    Args:
+        neighbourhood (str): Neighbourhood text, e.g. 'Rectangle 3 3 CELL'
+        grid (RasterGrid): Grid properties
+
+    Returns:
+        tuple: (rows, cols), or None if the neighbourhood is not a rectangle
+    """
+
+    parts = str(neighbourhood).split()
+
+    if len(parts) < 3 or parts[0].upper() != "RECTANGLE":
+        return None
+
+    width, height = float(parts[1]), float(parts[2])
+
+    if len(parts) > 3 and parts[3].upper() == "MAP":
+        width, height = width / grid.cell_width, height / grid.cell_height
+
+    cols, rows = int(round(width)), int(round(height))
+
+    if rows < 1 or cols < 1:
+        return None
+
+    return rows, cols
+
+
+def block_layout(grid, block_rows, block_cols, truncate=False):
+    """ Return how a raster is divided into aligned blocks
+
+    As for arcpy.sa.Aggregate, EXPAND grows the top and right edges to whole
+    blocks and TRUNCATE drops the partial blocks at the bottom and left edges.
+
+    Args:
+        grid (RasterGrid): Grid properties
+        block_rows (int): Block height in cells
+        block_cols (int): Block width in cells
+        truncate (bool): Flag to drop partial blocks rather than expand them
+
+    Returns:
+        BlockLayout: Named tuple of the layout
+    """
+
+    if truncate:
+        out_rows, out_cols = grid.nrows // block_rows, grid.ncols // block_cols
+        if not out_rows or not out_cols:
+            raise ValueError("'{}' ({} x {} cells) is smaller than one {} x {} block".format(grid.raster, grid.ncols, grid.nrows, block_cols, block_rows))
+        top_pad = 0
+        left_skip = grid.ncols - out_cols * block_cols
+        xmin = grid.xmin + left_skip * grid.cell_width
+        ymin = grid.ymin + (grid.nrows - out_rows * block_rows) * grid.cell_height
+    else:
+        out_rows, out_cols = -(-grid.nrows // block_rows), -(-grid.ncols // block_cols)
+        top_pad = out_rows * block_rows - grid.nrows
+        left_skip = 0
+        xmin, ymin = grid.xmin, grid.ymin
+
+    return BlockLayout(block_rows, block_cols, out_rows, out_cols, top_pad, left_skip, xmin, ymin)
+
+
+def read_block_strip(grid, layout, first_block_row, block_row_count, pad_is_nodata=True):
+    """ Read a strip of whole block rows, padded to whole blocks
+
+    Args:
+        grid (RasterGrid): Grid properties
+        layout (BlockLayout): Block layout
+        first_block_row (int): Index of the first block row
+        block_row_count (int): Number of block rows
+        pad_is_nodata (bool): Flag to count padding cells as NoData
+
+    Returns:
+        tuple: (values, missing) arrays, values are nan where missing or padded
+    """
+
+    br, bc = layout.block_rows, layout.block_cols
+    nrows, ncols = block_row_count * br, layout.out_cols * bc
+
+    values = np.full((nrows, ncols), np.nan)
+    missing = np.full((nrows, ncols), pad_is_nodata, dtype=bool)
+
+    # source rows covered by the strip, the padding sits above the first source row
+    v0 = first_block_row * br
+    s0 = max(0, v0 - layout.top_pad)
+    s1 = min(grid.nrows, v0 + nrows - layout.top_pad)
+    cols = min(grid.ncols - layout.left_skip, ncols)
+
+    if s1 > s0:
+        block = read_rows(grid, s0, s1 - s0)[:, layout.left_skip:layout.left_skip + cols]
+        valid = valid_mask(grid, block)
+        r0 = s0 + layout.top_pad - v0
+        values[r0:r0 + s1 - s0, :cols] = np.where(valid, block, np.nan)
+        missing[r0:r0 + s1 - s0, :cols] = ~valid
+
+    return values, missing
+
+
+def reduce_blocks(values, missing, block_rows, block_cols, method, ignore_nodata=True):
+    """ Reduce each block of an array to a single value
+
+    Args:
+        values (numpy.ndarray): 2D array of whole blocks, nan where there is no data
+        missing (numpy.ndarray): Boolean array of the cells that count as NoData
+        block_rows (int): Block height in cells
+        block_cols (int): Block width in cells
+        method (str): One of block_methods
+        ignore_nodata (bool): Flag to reduce the data cells only, otherwise any NoData cell makes the block NoData
+
+    Returns:
+        numpy.ndarray: Array of shape (rows / block_rows, cols / block_cols), nan for NoData
+    """
+
+    r, c = values.shape[0] // block_rows, values.shape[1] // block_cols
+
+    v = values.reshape(r, block_rows, c, block_cols).swapaxes(1, 2).reshape(r, c, block_rows * block_cols)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all nan blocks
+
+        if method == "SUM":
+            res = np.nansum(v, axis=-1)
+        elif method == "MEAN":
+            res = np.nanmean(v, axis=-1)
+        elif method == "MAXIMUM":
+            res = np.nanmax(v, axis=-1)
+        elif method == "MINIMUM":
+            res = np.nanmin(v, axis=-1)
+        elif method == "MEDIAN":
+            res = np.nanmedian(v, axis=-1)
+        elif method == "RANGE":
+            res = np.nanmax(v, axis=-1) - np.nanmin(v, axis=-1)
+        elif method == "STD":
+            res = np.nanstd(v, axis=-1)
+        else:
+            raise ValueError("Block method '{}' is not one of {}".format(method, block_methods))
+
+    empty = np.isnan(v).all(axis=-1)
+
+    if not ignore_nodata:
+        empty |= missing.reshape(r, block_rows, c, block_cols).any(axis=(1, 3))
+
+    res[empty] = np.nan
+
+    return res
+
+
+def block_reduce(grid, block_rows, block_cols, method, ignore_nodata=True, truncate=False, pad_is_nodata=True, workers=None):
+    """ Reduce a raster in aligned blocks, strips of blocks are reduced in parallel
+
+    Args:
+        grid (RasterGrid): Grid properties
+        block_rows (int): Block height in cells
+        block_cols (int): Block width in cells
+        method (str): One of block_methods
+        ignore_nodata (bool): Flag to reduce the data cells only
+        truncate (bool): Flag to drop partial blocks rather than expand them
+        pad_is_nodata (bool): Flag to count the cells expanding partial blocks as NoData
+        workers (int): Number of threads, defaults to the number of processors
+
+    Returns:
+        tuple: (BlockLayout, array of shape (out_rows, out_cols), nan for NoData)
+    """
+
+    layout = block_layout(grid, block_rows, block_cols, truncate)
+
+    strip = max(1, BLOCK_CELLS // (block_rows * block_cols * layout.out_cols))
+    workers = max(1, min(workers or cpu_count(), -(-layout.out_rows // strip)))
+
+    out = np.empty((layout.out_rows, layout.out_cols))
+
+    def reduce_strip(job):
+        i, (values, missing) = job
+        return i, reduce_blocks(values, missing, block_rows, block_cols, method, ignore_nodata)
+
+    if workers == 1:
+        for i in range(0, layout.out_rows, strip):
+            out[i:i + strip] = reduce_strip((i, read_block_strip(grid, layout, i, min(strip, layout.out_rows - i), pad_is_nodata)))[1]
+
+        return layout, out
+
+    # strips are read by the pool's feeder thread, bound how far reading runs ahead of the reductions
+    slots = Semaphore(2 * workers)
+    stop = []
+
+    def strips():
+        for i in range(0, layout.out_rows, strip):
+            slots.acquire()
+            if stop:
+                return
+            yield i, read_block_strip(grid, layout, i, min(strip, layout.out_rows - i), pad_is_nodata)
+
+    pool = ThreadPool(workers)
+
+    try:
+        for i, res in pool.imap(reduce_strip, strips()):
+            out[i:i + len(res)] = res
+            slots.release()
+    except Exception:
+        stop.append(True)
+        for _ in range(2 * workers):
+            slots.release()
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+    return layout, out
+
+
+def output_array(grid, result, method):
+    """ Return a block result as an array and NoData value suitable for saving
+
+    Args:
+        grid (RasterGrid): Grid properties of the source raster
+        result (numpy.ndarray): Block result, nan for NoData
+        method (str): One of block_methods
+
+    Returns:
+        tuple: (array, nodata value)
+    """
+
+    nodata = np.isnan(result)
+
+    if is_integer_grid(grid) and method in integer_methods:
+        out = np.where(nodata, INTEGER_NODATA, result).astype(np.int32)
+        return out, INTEGER_NODATA
+
+    out = np.where(nodata, FLOAT_NODATA, result).astype(np.float32)
+
+    return out, FLOAT_NODATA
+
+
+def threads_per_row(row_workers=1):
+    """ Return the threads for the block reduction of one raster
+
+    Rows (rasters) may already be processed in parallel by a tool's
+    workers, the processors are shared between them.
+
+    Args:
+        row_workers (int): Number of rows processed at once
+
+    Returns:
+        int:
+    """
+
+    return max(1, cpu_count() // max(1, row_workers or 1))
+
+
+def expand_block_strips(layout, result, nrows, ncols, rows_per_strip=None):
+    """ Spread block results back over the cells of the source grid, a strip of rows at a time
+
+    Args:
+        layout (BlockLayout): Block layout
+        result (numpy.ndarray): Block result
+        nrows (int): Rows in the source grid
+        ncols (int): Columns in the source grid
+        rows_per_strip (int): Rows in each strip, defaults to a bounded strip size
+
+    Returns:
+        generator: (first_row, array) tuples, top to bottom
+    """
+
+    br, bc = layout.block_rows, layout.block_cols
+    rows_per_strip = rows_per_strip or max(1, BLOCK_CELLS // ncols)
+
+    for first_row in range(0, nrows, rows_per_strip):
+        v0 = first_row + layout.top_pad  # rows counted from the top of the padding
+        v1 = min(nrows, first_row + rows_per_strip) + layout.top_pad
+        b0, b1 = v0 // br, -(-v1 // br)
+        cells = result[b0:b1].repeat(br, axis=0)[v0 - b0 * br:v1 - b0 * br]
+        yield first_row, cells.repeat(bc, axis=1)[:, :ncols]
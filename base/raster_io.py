@@ -0,0 +1,307 @@
+"""
+Description
+-----------
+    This module provides block-wise raster reading and native raster writers
+
+    Rasters are read in strips of whole rows with arcpy.RasterToNumPyArray so
+    memory use is bounded by the strip size rather than the raster size, and
+    can be written from strips the same way.
+
+Implementation
+--------------
+"""
+
+from __future__ import division
+from collections import namedtuple
+from os.path import join, dirname, basename
+import gzip
+import io
+import shutil
+import tempfile
+import arcpy
+
+
+BLOCK_CELLS = 4 * 1024 * 1024  # cells per block, ~16MB for 32 bit data
+
+mosaic_pixel_types = {"int8": "8_BIT_SIGNED", "uint8": "8_BIT_UNSIGNED", "int16": "16_BIT_SIGNED", "uint16": "16_BIT_UNSIGNED",
+                      "int32": "32_BIT_SIGNED", "uint32": "32_BIT_UNSIGNED", "float32": "32_BIT_FLOAT", "float64": "64_BIT"}
+
+integer_pixel_types = ["U1", "U2", "U4", "U8", "S8", "U16", "S16", "U32", "S32"]
+
+RasterGrid = namedtuple("RasterGrid", "raster ncols nrows xmin ymin xmax ymax cell_width cell_height nodata pixel_type band_count")
+
+
+def get_raster_grid(raster):
+    """ Return the grid properties of a raster with a single open
+
+    Args:
+        raster (str): Path to the raster
+
+    Returns:
+        RasterGrid: Named tuple of grid properties
+    """
+
+    r = arcpy.Raster(raster)
+
+    try:
+        grid = RasterGrid(raster, r.width, r.height,
+                          r.extent.XMin, r.extent.YMin, r.extent.XMax, r.extent.YMax,
+                          r.meanCellWidth, r.meanCellHeight,
+                          r.noDataValue, r.pixelType, r.bandCount)
+    finally:
+        del r
+
+    return grid
+
+
+def is_integer_grid(grid):
+    """ Flag if the grid has an integer pixel type
+
+    Args:
+        grid (RasterGrid): Grid properties
+
+    Returns:
+        bool:
+    """
+
+    return grid.pixel_type in integer_pixel_types
+
+
+def block_rows(grid, block_cells=BLOCK_CELLS):
+    """ Return the number of whole rows that fit in a block
+
+    Args:
+        grid (RasterGrid): Grid properties
+        block_cells (int): Maximum number of cells in a block
+
+    Returns:
+        int:
+    """
+
+    return max(1, min(grid.nrows, block_cells // max(1, grid.ncols)))
+
+
+def read_rows(grid, first_row, row_count, nodata_to_value=None):
+    """ Read a strip of whole rows from a raster
+
+    Args:
+        grid (RasterGrid): Grid properties
+        first_row (int): Index of the first row to read, 0 is the top row
+        row_count (int): Number of rows to read
+        nodata_to_value: Value for NoData cells, defaults to the raster's NoData value
+
+    Returns:
+        numpy.ndarray: Array of shape (row_count, ncols)
+    """
+
+    row_count = min(row_count, grid.nrows - first_row)
+
+    # lower left corner of the strip, rows are counted from the top
+    lower_left = arcpy.Point(grid.xmin, grid.ymin + (grid.nrows - first_row - row_count) * grid.cell_height)
+
+    if nodata_to_value is None:
+        nodata_to_value = grid.nodata
+
+    if nodata_to_value is None:
+        return arcpy.RasterToNumPyArray(grid.raster, lower_left, grid.ncols, row_count)
+
+    return arcpy.RasterToNumPyArray(grid.raster, lower_left, grid.ncols, row_count, nodata_to_value)
+
+
+def iter_row_blocks(grid, rows_per_block=None, nodata_to_value=None):
+    """ Iterate over a raster in strips of whole rows, top to bottom
+
+    Args:
+        grid (RasterGrid): Grid properties
+        rows_per_block (int): Rows in each strip, defaults to a bounded block size
+        nodata_to_value: Value for NoData cells, defaults to the raster's NoData value
+
+    Returns:
+        generator: (first_row, array) tuples
+    """
+
+    rows_per_block = rows_per_block or block_rows(grid)
+
+    for first_row in range(0, grid.nrows, rows_per_block):
+        yield first_row, read_rows(grid, first_row, rows_per_block, nodata_to_value)
+
+
+def ascii_header(grid, fmt="%.9g"):
+    """ Return the header of an ESRI ASCII grid for the raster grid
+
+    Args:
+        grid (RasterGrid): Grid properties
+        fmt (str): Cell format, the NoData value is written as its cells are
+
+    Returns:
+        str: Header lines
+    """
+
+    if abs(grid.cell_width - grid.cell_height) > 1e-9 * max(abs(grid.cell_width), 1.0):
+        raise ValueError("'{}' has non-square cells ({} x {}), which ASCII grids do not support".format(grid.raster, grid.cell_width, grid.cell_height))
+
+    header = ["ncols {}".format(grid.ncols),
+              "nrows {}".format(grid.nrows),
+              "xllcorner {!r}".format(grid.xmin),
+              "yllcorner {!r}".format(grid.ymin),
+              "cellsize {!r}".format(grid.cell_width)]
+
+    if grid.nodata is not None:
+        header.append("NODATA_value " + fmt % grid.nodata)
+
+    return "\n".join(header) + "\n"
+
+
+def write_ascii_blocks(out_file, header, blocks, fmt="%.9g", compress=False):
+    """ Write an ESRI ASCII grid from a header and an iterable of row blocks
+
+    Each block is formatted with a single string operation over all its cells,
+    avoiding a python-level loop per cell or per row.
+
+    Args:
+        out_file (str): Output file path
+        header (str): Header text, see ascii_header
+        blocks (iterable): 2D numpy arrays, consecutive strips of rows
+        fmt (str): Cell format
+        compress (bool): Flag for gzip compression of the output
+
+    Returns:
+        int: The number of rows written
+    """
+
+    rows_written = 0
+
+    if compress:
+        f = gzip.open(out_file, "wb", 1)  # favour speed, ASCII grids compress well anyway
+    else:
+        f = io.open(out_file, "wb", buffering=1024 * 1024)
+
+    try:
+        f.write(header.encode("ascii"))
+
+        row_fmt = None
+        for block in blocks:
+            nrows, ncols = block.shape
+
+            if row_fmt is None:
+                row_fmt = " ".join([fmt] * ncols) + "\n"
+
+            f.write(((row_fmt * nrows) % tuple(block.ravel().tolist())).encode("ascii"))
+            rows_written += nrows
+    finally:
+        f.close()
+
+    return rows_written
+
+
+def raster_to_ascii(raster, out_file, compress=False, precision=9, rows_per_block=None):
+    """ Export a raster to an ESRI ASCII grid block by block
+
+    Args:
+        raster (str): Path to the input raster
+        out_file (str): Output file path
+        compress (bool): Flag for gzip compression of the output
+        precision (int): Significant digits for floating point cells
+        rows_per_block (int): Rows in each block, defaults to a bounded block size
+
+    Returns:
+        RasterGrid: Grid properties of the exported raster
+    """
+
+    grid = get_raster_grid(raster)
+
+    if grid.band_count != 1:
+        raise ValueError("'{}' has {} bands, ASCII grids are single band".format(raster, grid.band_count))
+
+    fmt = "%d" if is_integer_grid(grid) else "%.{}g".format(precision)
+
+    blocks = (block for _, block in iter_row_blocks(grid, rows_per_block))
+
+    rows = write_ascii_blocks(out_file, ascii_header(grid, fmt), blocks, fmt, compress)
+
+    if rows != grid.nrows:
+        raise ValueError("Only {} of {} rows were written to '{}'".format(rows, grid.nrows, out_file))
+
+    return grid
+
+
+def save_array(array, out_raster, xmin, ymin, cell_width, cell_height, nodata, spatial_reference=None):
+    """ Save a numpy array as a raster
+
+    Args:
+        array (numpy.ndarray): 2D array, the first row is the top row
+        out_raster (str): Output raster path
+        xmin (float): Left edge of the output
+        ymin (float): Bottom edge of the output
+        cell_width (float): Output cell width
+        cell_height (float): Output cell height
+        nodata: Value of NoData cells in the array
+        spatial_reference: Spatial reference to define on the output
+
+    Returns:
+        str: The output raster path
+    """
+
+    r = arcpy.NumPyArrayToRaster(array, arcpy.Point(xmin, ymin), cell_width, cell_height, nodata)
+
+    try:
+        r.save(out_raster)
+    finally:
+        del r
+
+    if spatial_reference is not None and "unknown" not in spatial_reference.name.lower():
+        arcpy.DefineProjection_management(out_raster, spatial_reference)
+
+    return out_raster
+
+
+def save_array_strips(strips, out_raster, nrows, xmin, ymin, cell_width, cell_height, nodata, spatial_reference=None):
+    """ Save a raster from strips of whole rows, holding one strip in memory at a time
+
+    Each strip is saved as a temporary raster and the strips are mosaicked
+    into the output. A raster of a single strip is saved directly.
+
+    Args:
+        strips (iterable): (first_row, array) tuples, top to bottom, covering all rows
+        out_raster (str): Output raster path
+        nrows (int): Rows in the output
+        xmin (float): Left edge of the output
+        ymin (float): Bottom edge of the output
+        cell_width (float): Output cell width
+        cell_height (float): Output cell height
+        nodata: Value of NoData cells in the arrays
+        spatial_reference: Spatial reference to define on the output
+
+    Returns:
+        str: The output raster path
+    """
+
+    strips = iter(strips)
+    first_row, array = next(strips)
+
+    if array.shape[0] == nrows:
+        return save_array(array, out_raster, xmin, ymin, cell_width, cell_height, nodata, spatial_reference)
+
+    scratch = tempfile.mkdtemp(prefix="gg_strips_")
+
+    try:
+        parts = []
+        pixel_type = mosaic_pixel_types[array.dtype.name]
+
+        while array is not None:
+            part = join(scratch, "strip_{}.tif".format(len(parts)))
+            bottom = ymin + (nrows - first_row - array.shape[0]) * cell_height
+            save_array(array, part, xmin, bottom, cell_width, cell_height, nodata)
+            parts.append(part)
+            del array
+            first_row, array = next(strips, (None, None))
+
+        arcpy.MosaicToNewRaster_management(";".join(parts), dirname(out_raster), basename(out_raster), None, pixel_type, cell_width, 1, "FIRST")
+
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if spatial_reference is not None and "unknown" not in spatial_reference.name.lower():
+        arcpy.DefineProjection_management(out_raster, spatial_reference)
+
+    return out_raster
@@ -0,0 +1,484 @@
+"""
+Description
+-----------
+    This module provides block-wise raster statistics built on base.raster_io
+
+    Statistics are accumulated strip by strip so memory use is bounded by the
+    block size, large floating point rasters are never sorted or held whole.
+
+Implementation
+--------------
+"""
+
+from __future__ import division
+from base.raster_io import iter_row_blocks, is_integer_grid
+import numpy as np
+
+
+HISTOGRAM_BINS = 4096  # resolution of the streaming histogram
+JENKS_BINS = 512  # natural breaks are optimised over at most this many classes of the histogram
+ZONE_NODATA = np.iinfo(np.int32).min  # zone id for cells outside every zone
+zonal_statistics = ["COUNT", "AREA", "MIN", "MAX", "RANGE", "MEAN", "STD", "SUM"]
+zonal_value_statistics = ["VARIETY", "MAJORITY", "MINORITY", "MEDIAN"]  # from value counts, integer rasters only
+
+
+def valid_mask(grid, block):
+    """ Return a boolean mask of the cells of a block that are not NoData
+
+    Args:
+        grid (RasterGrid): Grid properties
+        block (numpy.ndarray): Block read from the grid
+
+    Returns:
+        numpy.ndarray:
+    """
+
+    mask = np.ones(block.shape, dtype=bool)
+
+    if block.dtype.kind == "f":
+        mask &= ~np.isnan(block)
+
+    if grid.nodata is not None:
+        mask &= block != grid.nodata
+
+    return mask
+
+
+def valid_values(grid, block):
+    """ Return the cells of a block that are not NoData as a flat array
+
+    Args:
+        grid (RasterGrid): Grid properties
+        block (numpy.ndarray): Block read from the grid
+
+    Returns:
+        numpy.ndarray:
+    """
+
+    return block[valid_mask(grid, block)]
+
+
+def raster_min_max(grid, rows_per_block=None):
+    """ Return the minimum and maximum of a raster in one blocked pass
+
+    Args:
+        grid (RasterGrid): Grid properties
+        rows_per_block (int): Rows in each block, defaults to a bounded block size
+
+    Returns:
+        tuple: (minimum, maximum), both None if there are no valid cells
+    """
+
+    vmin = vmax = None
+
+    for _, block in iter_row_blocks(grid, rows_per_block):
+        v = valid_values(grid, block)
+        if not v.size:
+            continue
+        bmin, bmax = v.min(), v.max()
+        vmin = bmin if vmin is None else min(vmin, bmin)
+        vmax = bmax if vmax is None else max(vmax, bmax)
+
+    return vmin, vmax
+
+
+def raster_histogram(grid, vmin, vmax, bins=HISTOGRAM_BINS, rows_per_block=None):
+    """ Accumulate a fixed-bin histogram of a raster in one blocked pass
+
+    Integer rasters with a value range smaller than the bin count get one bin
+    per value, so class breaks never split a value.
+
+    Args:
+        grid (RasterGrid): Grid properties
+        vmin: Minimum raster value
+        vmax: Maximum raster value
+        bins (int): Number of bins for non-integer data
+        rows_per_block (int): Rows in each block, defaults to a bounded block size
+
+    Returns:
+        tuple: (counts, edges) as for numpy.histogram
+    """
+
+    if is_integer_grid(grid) and int(vmax) - int(vmin) < bins:
+        edges = np.arange(int(vmin), int(vmax) + 2) - 0.5
+    else:
+        edges = np.linspace(float(vmin), float(vmax), bins + 1)
+
+    counts = np.zeros(len(edges) - 1, dtype=np.int64)
+
+    for _, block in iter_row_blocks(grid, rows_per_block):
+        counts += np.histogram(valid_values(grid, block), edges)[0]
+
+    return counts, edges
+
+
+def equal_interval_breaks(vmin, vmax, num_zones):
+    """ Upper class breaks dividing the value range into equal intervals
+
+    Args:
+        vmin: Minimum value
+        vmax: Maximum value
+        num_zones (int): Number of classes
+
+    Returns:
+        list: Upper bound of each class
+    """
+
+    return list(np.linspace(float(vmin), float(vmax), num_zones + 1)[1:])
+
+
+def equal_area_breaks(counts, edges, num_zones):
+    """ Upper class breaks giving each class the same number of cells
+
+    Quantiles are interpolated linearly within the histogram bin they fall in.
+
+    Args:
+        counts (numpy.ndarray): Histogram counts
+        edges (numpy.ndarray): Histogram bin edges
+        num_zones (int): Number of classes
+
+    Returns:
+        list: Upper bound of each class
+    """
+
+    cum = np.concatenate(([0], np.cumsum(counts))).astype(np.float64)
+    total = cum[-1]
+
+    if not total:
+        raise ValueError("Histogram is empty")
+
+    targets = total * np.arange(1, num_zones) / num_zones
+
+    breaks = list(np.interp(targets, cum, edges))
+    breaks.append(float(edges[-1]))
+
+    return breaks
+
+
+def natural_breaks(counts, edges, num_zones, max_classes=JENKS_BINS):
+    """ Upper class breaks by Jenks/Fisher optimisation over the histogram
+
+    The histogram bins are treated as weighted values, the exact dynamic
+    programme is then solved over at most max_classes bins rather than over
+    every cell of the raster.
+
+    Args:
+        counts (numpy.ndarray): Histogram counts
+        edges (numpy.ndarray): Histogram bin edges
+        num_zones (int): Number of classes
+        max_classes (int): Maximum number of histogram bins to optimise over
+
+    Returns:
+        list: Upper bound of each class
+    """
+
+    centres = (edges[:-1] + edges[1:]) / 2.0
+    upper = edges[1:]
+
+    keep = counts > 0
+    w, x, upper = counts[keep].astype(np.float64), centres[keep], upper[keep]
+
+    # merge neighbouring bins to bound the size of the optimisation
+    if len(w) > max_classes:
+        groups = np.arange(len(w)) * max_classes // len(w)
+        sw = np.bincount(groups, weights=w)
+        x = np.bincount(groups, weights=w * x) / sw
+        upper = upper[np.concatenate((np.nonzero(np.diff(groups))[0], [len(groups) - 1]))]
+        w = sw
+
+    n = len(w)
+
+    if n <= num_zones:
+        return list(upper)
+
+    cw = np.concatenate(([0.0], np.cumsum(w)))
+    cs = np.concatenate(([0.0], np.cumsum(w * x)))
+    cq = np.concatenate(([0.0], np.cumsum(w * x * x)))
+
+    # ssd[i, j] is the weighted sum of squared deviations of bins i..j
+    i, j = np.ogrid[:n, :n]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sw = cw[j + 1] - cw[i]
+        ssd = (cq[j + 1] - cq[i]) - (cs[j + 1] - cs[i]) ** 2 / sw
+    ssd[i > j] = np.inf
+
+    cost = ssd[0].copy()
+    first = np.zeros((num_zones, n), dtype=np.int64)
+
+    for k in range(1, num_zones):
+        cand = cost[:-1, None] + ssd[1:]  # class k starts at bin i + 1
+        first[k, :] = np.argmin(cand, axis=0) + 1
+        cost = cand[first[k, :] - 1, np.arange(n)]
+
+    # walk back from the last bin to recover where each class ends
+    breaks = []
+    last = n - 1
+    for k in range(num_zones - 1, -1, -1):
+        breaks.append(float(upper[last]))
+        last = first[k, last] - 1
+
+    return breaks[::-1]
+
+
+def slice_breaks(grid, num_zones, slice_type, bins=HISTOGRAM_BINS):
+    """ Class breaks for a raster using a streaming histogram
+
+    Args:
+        grid (RasterGrid): Grid properties
+        num_zones (int): Number of classes
+        slice_type (str): EQUAL_INTERVAL, EQUAL_AREA or NATURAL_BREAKS
+        bins (int): Histogram resolution for non-integer data
+
+    Returns:
+        tuple: (minimum, list of upper class breaks)
+    """
+
+    vmin, vmax = raster_min_max(grid)
+
+    if vmin is None:
+        raise ValueError("'{}' has no valid cells".format(grid.raster))
+
+    if slice_type == "EQUAL_INTERVAL":
+        return vmin, equal_interval_breaks(vmin, vmax, num_zones)
+
+    counts, edges = raster_histogram(grid, vmin, vmax, bins)
+
+    if slice_type == "EQUAL_AREA":
+        return vmin, equal_area_breaks(counts, edges, num_zones)
+
+    if slice_type == "NATURAL_BREAKS":
+        return vmin, natural_breaks(counts, edges, num_zones)
+
+    raise ValueError("Unsupported slice type '{}'".format(slice_type))
+
+
+def group_reduce(ufunc, groups, values, size, initial):
+    """ Reduce values by group with a numpy ufunc
+
+    Args:
+        ufunc (numpy.ufunc): Reduction, e.g. numpy.minimum
+        groups (numpy.ndarray): Group index of each value, 0 <= index < size
+        values (numpy.ndarray): Values
+        size (int): Number of groups
+        initial: Result for groups with no values
+
+    Returns:
+        numpy.ndarray:
+    """
+
+    out = np.full(size, initial, dtype=np.float64)
+
+    if not len(values):
+        return out
+
+    order = np.argsort(groups, kind="mergesort")
+    groups = groups[order]
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    out[groups[starts]] = ufunc.reduceat(values[order], starts)
+
+    return out
+
+
+def count_pairs(zones, values, counts):
+    """ Sum the counts of each distinct (zone, value) pair
+
+    Args:
+        zones (numpy.ndarray): Zone ids
+        values (numpy.ndarray): Values
+        counts (numpy.ndarray): Count of each (zone, value)
+
+    Returns:
+        tuple: (zones, values, counts) of the distinct pairs, sorted by zone then value
+    """
+
+    if not len(zones):
+        return zones, values, counts
+
+    order = np.lexsort((values, zones))
+    zones, values = zones[order], values[order]
+    starts = np.flatnonzero(np.concatenate(([True], (zones[1:] != zones[:-1]) | (values[1:] != values[:-1]))))
+
+    return zones[starts], values[starts], np.add.reduceat(counts[order], starts)
+
+
+class ZonalAccumulator(object):
+    """ Grouped count, sum, sum of squares, min and max of values by zone id
+
+    Blocks of zone ids and values are reduced with numpy.bincount and merged,
+    so a raster of any size is summarised with one pass over its blocks.
+
+    With value counts, the cells of each (zone, value) pair are counted too,
+    giving the VARIETY, MAJORITY, MINORITY and MEDIAN of integer rasters
+    without holding their cells.
+    """
+
+    def __init__(self, value_counts=False):
+        """ Empty accumulator
+
+        Args:
+            value_counts (bool): Flag to count the cells of each value in each zone
+        """
+
+        self.zones = np.array([], dtype=np.int64)
+        self.count = np.array([], dtype=np.int64)
+        self.nodata = np.array([], dtype=np.int64)
+        self.sum = np.array([], dtype=np.float64)
+        self.sumsq = np.array([], dtype=np.float64)
+        self.min = np.array([], dtype=np.float64)
+        self.max = np.array([], dtype=np.float64)
+
+        self.value_counts = value_counts
+        self.pair_zones = np.array([], dtype=np.int64)
+        self.pair_values = np.array([], dtype=np.int64)
+        self.pair_counts = np.array([], dtype=np.int64)
+
+        return
+
+    def add(self, zones, values, valid):
+        """ Accumulate a block
+
+        Args:
+            zones (numpy.ndarray): Zone ids, ZONE_NODATA outside every zone
+            values (numpy.ndarray): Values, same shape as zones
+            valid (numpy.ndarray): Mask of values that are not NoData
+
+        Returns:
+
+        """
+
+        in_zone = zones != ZONE_NODATA
+        ids, inv = np.unique(zones[in_zone], return_inverse=True)
+        n = len(ids)
+
+        if not n:
+            return
+
+        ok = valid[in_zone]
+        iv = inv[ok]
+        v = values[in_zone][ok].astype(np.float64)
+
+        self._merge(ids,
+                    np.bincount(iv, minlength=n),
+                    np.bincount(inv[~ok], minlength=n),
+                    np.bincount(iv, weights=v, minlength=n),
+                    np.bincount(iv, weights=v * v, minlength=n),
+                    group_reduce(np.minimum, iv, v, n, np.inf),
+                    group_reduce(np.maximum, iv, v, n, -np.inf))
+
+        if self.value_counts:
+            self.pair_zones, self.pair_values, self.pair_counts = count_pairs(
+                np.concatenate((self.pair_zones, ids[iv].astype(np.int64))),
+                np.concatenate((self.pair_values, values[in_zone][ok].astype(np.int64))),
+                np.concatenate((self.pair_counts, np.ones(len(iv), dtype=np.int64))))
+
+        return
+
+    def _merge(self, ids, count, nodata, total, sumsq, vmin, vmax):
+        """ Merge block statistics into the running statistics """
+
+        zones = np.union1d(self.zones, ids)
+
+        if len(zones) != len(self.zones):
+            old = np.searchsorted(zones, self.zones)
+            for att, fill in [("count", 0), ("nodata", 0), ("sum", 0.0), ("sumsq", 0.0), ("min", np.inf), ("max", -np.inf)]:
+                a = getattr(self, att)
+                b = np.full(len(zones), fill, dtype=a.dtype)
+                b[old] = a
+                setattr(self, att, b)
+            self.zones = zones
+
+        new = np.searchsorted(self.zones, ids)
+        self.count[new] += count
+        self.nodata[new] += nodata
+        self.sum[new] += total
+        self.sumsq[new] += sumsq
+        self.min[new] = np.minimum(self.min[new], vmin)
+        self.max[new] = np.maximum(self.max[new], vmax)
+
+        return
+
+    def statistics(self, cell_area=1.0, ignore_nodata=True):
+        """ Return the statistics of each zone
+
+        Args:
+            cell_area (float): Area of a cell, for the AREA statistic
+            ignore_nodata (bool): If False, zones containing NoData get no statistics (as 'NODATA' in arcpy.sa)
+
+        Returns:
+            dict: {zone id: {statistic: value}}, with zonal_value_statistics if values were counted
+        """
+
+        result = {}
+        names = zonal_statistics + (zonal_value_statistics if self.value_counts else [])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = self.sum / self.count
+            std = np.sqrt(np.maximum(self.sumsq / self.count - mean * mean, 0.0))
+
+        for i, zone in enumerate(self.zones.tolist()):
+            if not self.count[i] or (self.nodata[i] and not ignore_nodata):
+                result[zone] = {k: None for k in names}
+                continue
+
+            result[zone] = {"COUNT": int(self.count[i]),
+                            "AREA": self.count[i] * cell_area,
+                            "MIN": self.min[i],
+                            "MAX": self.max[i],
+                            "RANGE": self.max[i] - self.min[i],
+                            "MEAN": mean[i],
+                            "STD": std[i],
+                            "SUM": self.sum[i]}
+
+            if self.value_counts:
+                result[zone].update(self.value_statistics(zone))
+
+        return result
+
+    def value_statistics(self, zone):
+        """ Return the statistics of a zone that come from its value counts
+
+        Ties give the lowest value, and the median of an even number of
+        cells is the lower of the middle two, so results are cell values.
+
+        Args:
+            zone (int): Zone id
+
+        Returns:
+            dict: {statistic: value}
+        """
+
+        first = np.searchsorted(self.pair_zones, zone, side="left")
+        last = np.searchsorted(self.pair_zones, zone, side="right")
+        values, counts = self.pair_values[first:last], self.pair_counts[first:last]
+
+        middle = (counts.sum() + 1) // 2  # cells up to and including the (lower) median
+
+        return {"VARIETY": len(values),
+                "MAJORITY": int(values[np.argmax(counts)]),
+                "MINORITY": int(values[np.argmin(counts)]),
+                "MEDIAN": int(values[np.searchsorted(np.cumsum(counts), middle)])}
+
+
+def zonal_accumulate(grid, zone_array, rows_per_block=None, value_counts=False):
+    """ Accumulate zonal statistics of a raster over an aligned zone array
+
+    Args:
+        grid (RasterGrid): Grid properties of the value raster
+        zone_array (numpy.ndarray): Zone ids with the same shape as the raster, may be memory mapped
+        rows_per_block (int): Rows in each block, defaults to a bounded block size
+        value_counts (bool): Flag to count the cells of each value, see ZonalAccumulator
+
+    Returns:
+        ZonalAccumulator:
+    """
+
+    if zone_array.shape != (grid.nrows, grid.ncols):
+        raise ValueError("Zone array {} is not aligned with '{}' {}".format(zone_array.shape, grid.raster, (grid.nrows, grid.ncols)))
+
+    acc = ZonalAccumulator(value_counts)
+
+    for first_row, block in iter_row_blocks(grid, rows_per_block):
+        zones = np.asarray(zone_array[first_row:first_row + block.shape[0]])
+        acc.add(zones, block, valid_mask(grid, block))
+
+    return acc
@@ -26,6 +26,12 @@ class GgResult(object):
 
         self.pass_count = self.fail_count = 0
 
+        self.metrics_csv = self.metrics_table = self.metrics_table_name = None
+        self.metrics = []
+
+        self.forward = None  # callable given each pass record, e.g. to feed the next pipeline stage
+        self.materialise = True  # flag to write pass records to the result table
+
         return
 
     def initialise(self, result_table_param, fail_table_param, out_workspace, result_table_name, logger):
@@ -70,6 +76,9 @@ class GgResult(object):
             self.fail_table = os.path.join(self.output_workspace, self.fail_table_name)
             self.fail_csv = os.path.join(csv_ws, tn + "_FAIL.csv")
 
+            self.metrics_table_name = tn + "_METRICS"
+            self.metrics_csv = os.path.join(csv_ws, tn + "_METRICS.csv")
+
         try:
             os.remove(self.pass_csv)
             logger.info("Existing results csv at {} removed".format(self.pass_csv))
@@ -107,11 +116,19 @@ class GgResult(object):
         if not results:  # in case a caller passes in None or []
             self.logger.warn("Result was empty")
 
+        results = make_tuple(results)
+
+        if self.forward:
+            for result in results:
+                self.forward(result)
+
+        if not self.materialise:
+            self.pass_count += len(results)
+            return
+
         if not self.pass_csv:
             raise ValueError("Result CSV '{}' is not set".format(self.pass_csv))
 
-        results = make_tuple(results)
-
         # def make_string(data):
         #     """
         #
@@ -151,19 +168,19 @@ class GgResult(object):
             writer.writerows(results)
             self.pass_count += len(results)
 
-        self.logger.info("Result written: {}".format(results))
+        self.logger.debug("Result written: %s", results)
 
         return
 
-    def add_fail(self, row):
+    def add_fail(self, row, failure=None):
         """ Write failure record to CSV
 
         Writes a failure to the temp CSV immediately, trade off between
         runtime performance, RAM usage and FAILURE (i.e. recovery of results)
 
         Args:
-            geodata ():
             row ():
+            failure (str): Failure description, defaults to the exception currently being handled
 
         Returns:
 
@@ -194,7 +211,7 @@ class GgResult(object):
         # tb = exc_info()[2]
         # tbinfo = traceback.format_tb(tb)[0]
         # Concatenate information together concerning the error into a message string
-        msg = repr(format_exception(*exc_info()))
+        msg = failure or repr(format_exception(*exc_info()))
         # tbinfo + str(exc_info()[1])
         msg = msg.strip().replace('\n', ', ').replace('\r', ' ').replace('  ', ' ')
 
@@ -206,15 +223,17 @@ class GgResult(object):
             writer.writerow({self.geodata_type: geodata, "failure": msg, "row_data": str(row)})
             self.fail_count += 1
 
-        self.logger.info("Fail written: {}".format(msg))
+        self.logger.info("Fail written: %s", msg)
 
         return
 
     def write(self):
         """ Write the success and failure csv files to the final tables """
 
-        self._write_results()
+        if self.materialise:
+            self._write_results()
         self._write_failures()
+        self._write_metrics()
 
         return
 
@@ -272,6 +291,47 @@ class GgResult(object):
 
         return
 
+    def add_metrics(self, records, fieldnames):
+        """ Hold row metrics to write with the results
+
+        Args:
+            records (list): Metric dictionaries
+            fieldnames (list): Metric names, the column order
+
+        Returns:
+
+        """
+
+        self.metrics.extend(records)
+        self.metrics_fieldnames = fieldnames
+
+        return
+
+    def _write_metrics(self):
+        """ Write the row metrics to a sidecar table of the results """
+
+        if not self.metrics or not self.metrics_csv:
+            return
+
+        with open(self.metrics_csv, "wb") as csv_file:
+            writer = csv.DictWriter(csv_file, delimiter=',', lineterminator='\n', fieldnames=self.metrics_fieldnames)
+            writer.writeheader()
+            writer.writerows(self.metrics)
+
+        self.metrics_table = self.metrics_csv
+
+        if self.output_workspace_type == "LocalDatabase":
+            try:
+                self.metrics_table = self.table_conversion(self.metrics_csv, self.output_workspace, self.metrics_table_name)
+                os.remove(self.metrics_csv)
+            except Exception as e:
+                self.logger.warn("Table conversion failed: {}".format(e))
+                self.metrics_table = self.metrics_csv
+
+        self.logger.info("Row metrics at {}".format(self.metrics_table))
+
+        return
+
     def table_conversion(self, in_rows, out_path, out_name):
         """ Copy a file-based table to a local database, returns full path to new table if successful"""
 
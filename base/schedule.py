@@ -0,0 +1,160 @@
+"""
+Description
+-----------
+    This module orders rows for parallel processing, longest first
+
+    The cost of a row is estimated from the size of its input dataset, its
+    cell count and the timings of earlier runs of the same tool, which are
+    kept in the app data folder. Handing the costliest rows out first (LPT
+    scheduling) stops one worker grinding on a huge dataset after the others
+    have finished.
+
+Implementation
+--------------
+"""
+
+from base.utils import file_fingerprint, describe_geodata
+from threading import Lock
+from os.path import exists
+import json
+
+
+MAX_TIMED_DATASETS = 5000  # datasets whose last timing is remembered per tool
+
+
+class CostModel(object):
+    """ Row cost estimates from dataset size, cell count and past timings
+    """
+
+    def __init__(self, path):
+        """
+
+        Args:
+            path (str): Path of the tool's timings file, created on save
+        """
+
+        self.path = path
+        self.lock = Lock()
+
+        self.timings = {"seconds": 0.0, "bytes": 0, "cells": 0, "datasets": {}}
+
+        if exists(path):
+            try:
+                with open(path) as f:
+                    self.timings.update(json.load(f))
+            except ValueError:
+                pass  # a damaged file just means no history
+
+        return
+
+    no_features = (None, 0, None)  # rows that can not be costed
+
+    @staticmethod
+    def features(geodata):
+        """ Return the cost features of a dataset
+
+        Called as the dataset is validated, so its stat and Describe come
+        from the validation cache, see utils.validate_geodata_batch.
+
+        Args:
+            geodata (str): Path to the dataset
+
+        Returns:
+            tuple: (dataset key, size in bytes, cell count or None)
+        """
+
+        try:
+            path, size, mtime = file_fingerprint(geodata)
+        except Exception:
+            return CostModel.no_features
+
+        try:
+            cells = describe_geodata(geodata).cell_count
+        except Exception:
+            cells = None
+
+        return "{}|{}|{}".format(geodata, size, mtime), size, cells
+
+    def estimate(self, features):
+        """ Return the estimated cost of a row
+
+        Args:
+            features (tuple): Cost features of the row's dataset
+
+        Returns:
+            float: Seconds when there is a history, otherwise bytes
+        """
+
+        key, size, cells = features
+        t = self.timings
+
+        if key in t["datasets"]:
+            return t["datasets"][key]
+
+        if cells and t["cells"]:
+            return cells * t["seconds"] / t["cells"]
+
+        if t["bytes"]:
+            return size * t["seconds"] / t["bytes"]
+
+        return size
+
+    def observe(self, features, seconds):
+        """ Record the time taken by a row
+
+        Args:
+            features (tuple): Cost features of the row's dataset
+            seconds (float): Processing time
+
+        Returns:
+
+        """
+
+        key, size, cells = features
+
+        if not key:
+            return
+
+        with self.lock:
+            t = self.timings
+            t["seconds"] += seconds
+            t["bytes"] += size
+            if cells:
+                t["cells"] += cells
+            t["datasets"][key] = seconds
+
+        return
+
+    def save(self):
+        """ Write the timings file, keeping the most expensive datasets
+
+        Returns:
+
+        """
+
+        with self.lock:
+            datasets = self.timings["datasets"]
+            if len(datasets) > MAX_TIMED_DATASETS:
+                keep = sorted(datasets, key=datasets.get, reverse=True)[:MAX_TIMED_DATASETS]
+                self.timings["datasets"] = {k: datasets[k] for k in keep}
+
+            with open(self.path, "w") as f:
+                json.dump(self.timings, f)
+
+        return
+
+
+def longest_first(jobs, costs):
+    """ Return jobs ordered by decreasing cost, ties kept in input order
+
+    Args:
+        jobs (list): Jobs
+        costs (list): Cost of each job
+
+    Returns:
+        list:
+    """
+
+    order = sorted(range(len(jobs)), key=lambda i: (-costs[i], i))
+
+    return [jobs[i] for i in order]
@@ -0,0 +1,147 @@
+"""
+Description
+-----------
+    This module reads and writes tip files in bulk
+
+    A tip file, <dataset name>.tip, holds 'key: value' lines. Lines before
+    the first key form the header and lines without a key continue the
+    value of the key before them. Each folder is listed once and the tip
+    files in it looked up by name, so finding the tips of many datasets
+    does not check the disk for every one.
+
+Implementation
+--------------
+"""
+
+from collections import OrderedDict
+from threading import Lock
+import os
+
+
+TIP_EXT = ".tip"
+
+
+def list_tip_files(folder):
+    """ Return the tip files in a folder from one directory listing
+
+    Args:
+        folder (str): Folder path
+
+    Returns:
+        dict: Lower case dataset name -> tip file path
+    """
+
+    tips = {}
+
+    for f in os.listdir(folder):
+        name, ext = os.path.splitext(f)
+        if ext.lower() == TIP_EXT:
+            tips[name.lower()] = os.path.join(folder, f)
+
+    return tips
+
+
+class TipFolders(object):
+    """ Tip files of folders, each folder listed once
+    """
+
+    def __init__(self):
+        self.folders = {}
+        self.lock = Lock()
+
+        return
+
+    def find(self, folder, name):
+        """ Return the tip file of a dataset name in a folder
+
+        Args:
+            folder (str): Folder path
+            name (str): Dataset name without its extension
+
+        Returns:
+            str: Tip file path, None if there is none
+        """
+
+        key = os.path.normcase(os.path.abspath(folder))
+
+        with self.lock:
+            tips = self.folders.get(key)
+
+        if tips is None:
+            tips = list_tip_files(folder) if os.path.isdir(folder) else {}
+            with self.lock:
+                self.folders[key] = tips
+
+        return tips.get(name.lower())
+
+
+def parse_tips(lines):
+    """ Return the tips of tip file lines
+
+    Args:
+        lines (iterable): Lines of a tip file
+
+    Returns:
+        OrderedDict: 'header' then the tips in file order
+    """
+
+    tips = OrderedDict([("header", "")])
+    buf = "header"
+
+    for line in lines:
+        k, sep, v = line.strip().partition(":")
+        k, v = k.strip(), v.strip()
+        if sep:
+            buf = k
+        if v:
+            tips[k] = v
+        else:  # a key without a value, or a line continuing the last value
+            tips[buf] = tips.get(buf, "") + (k if not sep else "")
+
+    return tips
+
+
+def read_tips(tip_file):
+    """ Return the tips of a tip file
+
+    Args:
+        tip_file (str): Tip file path
+
+    Returns:
+        OrderedDict: 'header' then the tips in file order
+    """
+
+    with open(tip_file, "r") as f:
+        return parse_tips(f.read().splitlines())
+
+
+def format_tips(tips):
+    """ Return the text of a tip file
+
+    Args:
+        tips (OrderedDict): Tip keys and values in file order
+
+    Returns:
+        str:
+    """
+
+    return "".join("{0}: {1}\n".format(k, v) for k, v in tips.iteritems())
+
+
+def write_tips(tip_file, tips):
+    """ Write a tip file in one go
+
+    Args:
+        tip_file (str): Tip file path
+        tips (OrderedDict): Tip keys and values in file order
+
+    Returns:
+
+    """
+
+    text = format_tips(tips)
+
+    with open(tip_file, "w") as f:
+        f.write(text)
+
+    return
@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import json
 import os
 from collections import OrderedDict
 from re import compile
@@ -6,12 +8,25 @@ import arcpy as ap
 import collections
 import csv
 import numpy
+from multiprocessing.pool import ThreadPool
+from threading import Lock, local
+from timeit import default_timer
+from traceback import format_exception_only
 
 
 # arc_data_types = "Any,Container,Geo,FeatureDataset,FeatureClass,PlanarGraph,GeometricNetwork,Topology,Text,Table,RelationshipClass,RasterDataset,RasterBand,TIN,CadDrawing,RasterCatalog,Toolbox,Tool,NetworkDataset,Terrain,RepresentationClass,CadastralFabric,SchematicDataset,Locator"
 arc_data_types = "Any,CadDrawing,CadastralFabric,Container,FeatureClass,FeatureDataset,Geo,GeometricNetwork,LasDataset,Layer,Locator,Map,MosaicDataset,NetworkDataset,PlanarGraph,RasterCatalog,RasterDataset,RelationshipClass,RepresentationClass,Style,Table,Terrain,Text,Tin,Tool,Toolbox,Topology"
 datatype_list = arc_data_types.split(",")
 
+GeodataInfo = collections.namedtuple("GeodataInfo", "data_type shape_type spatial_reference cell_count")
+_geodata_info = OrderedDict()  # geodata -> (stat stamp, GeodataInfo), oldest first
+_describe_values = OrderedDict()  # geodata -> (stat stamp, {attribute: value}), oldest first
+MAX_DESCRIBED = 10000  # datasets remembered in each of the above
+_database_stamps = OrderedDict()  # database folder -> fingerprint, taken once per run, oldest first
+MAX_DATABASES = 256  # database fingerprints remembered
+_geodata_info_lock = Lock()
+_validation_clock = local()  # per thread time spent in validate_geodata, see take_validation_seconds
+
 raster_formats = ["Esri Grid", "tif", "img"]
 resample_methods = ["NEAREST", "BILINEAR", "CUBIC", "MAJORITY"]
 aggregation_methods = ["SUM", "MEAN", "MAXIMUM", "MINIMUM", "MEDIAN"]
@@ -300,6 +315,149 @@ def make_tuple(ob):
     return ob if isinstance(ob, (list, tuple)) else [ob]
 
 
+def file_fingerprint(geodata):
+    """ Return the size and modification time of the file(s) behind a dataset
+
+    Datasets inside a database (e.g. a feature class in a file geodatabase)
+    take the fingerprint of the nearest existing parent on disk, taken once
+    per run, see database_fingerprint. Directory based datasets such as
+    Esri Grids sum the sizes of their files.
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Returns:
+        tuple: (path actually examined, size in bytes, modification time)
+    """
+
+    path = geodata
+    while path and not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+
+    if not path or not os.path.exists(path):
+        raise DoesNotExistError(geodata)
+
+    if os.path.isdir(path):
+        if path != geodata or path.lower().endswith(".gdb"):
+            return database_fingerprint(path)
+        return folder_fingerprint(path)
+
+    st = os.stat(path)
+
+    return path, st.st_size, st.st_mtime
+
+
+def folder_fingerprint(path):
+    """ Return the total size and latest modification time of the files in a folder
+
+    Lock files come and go as datasets are read, so they are left out.
+
+    Args:
+        path (str): Folder path
+
+    Returns:
+        tuple: (path, size in bytes, modification time)
+    """
+
+    size, mtime = 0, None
+    for f in os.listdir(path):
+        if f.endswith(".lock"):
+            continue
+        st = os.stat(os.path.join(path, f))
+        size += st.st_size
+        mtime = max(mtime, st.st_mtime)
+
+    return path, size, os.path.getmtime(path) if mtime is None else mtime
+
+
+def database_fingerprint(path):
+    """ Return the fingerprint of a database folder, listing it once per run
+
+    A file geodatabase can hold thousands of files, and every dataset in it
+    shares its fingerprint, so the folder is listed the first time one of
+    them is stamped and the fingerprint is reused until the next run, see
+    forget_database_stamps.
+
+    Args:
+        path (str): Database folder path, e.g. a .gdb
+
+    Returns:
+        tuple: (path, size in bytes, modification time)
+    """
+
+    with _geodata_info_lock:
+        fingerprint = _database_stamps.get(path)
+
+    if fingerprint is None:
+        fingerprint = folder_fingerprint(path)
+        with _geodata_info_lock:
+            _database_stamps[path] = fingerprint
+            while len(_database_stamps) > MAX_DATABASES:
+                _database_stamps.popitem(last=False)
+
+    return fingerprint
+
+
+def forget_database_stamps():
+    """ Drop the database fingerprints taken so far, called as a run starts
+
+    Returns:
+
+    """
+
+    with _geodata_info_lock:
+        _database_stamps.clear()
+
+    return
+
+
+def sidecar_files(geodata):
+    """ Return the files beside a dataset that can change its georeference
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Returns:
+        list: Projection, world and .aux.xml file paths, whether they exist or not
+    """
+
+    root, ext = os.path.splitext(geodata)
+    files = [root + ".prj", geodata + ".aux.xml", root + ".wld"]
+
+    if len(ext) > 2:  # world files, e.g. .tfw and .tifw for .tif
+        files.extend([root + ext[:2] + ext[-1] + "w", geodata + "w"])
+
+    return files
+
+
+def sidecar_stamps(geodata):
+    """ Return the size and modification time of the existing sidecar files of a dataset
+
+    Editing a projection, world or .aux.xml file (e.g. with Define
+    Projection) changes a dataset's georeference without touching the
+    dataset file, so stamps of the dataset include these.
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Returns:
+        list: [[sidecar name, size, modification time], ...]
+    """
+
+    stamps = []
+    for f in sidecar_files(geodata):
+        try:
+            st = os.stat(f)
+        except OSError:
+            continue
+        stamps.append([os.path.basename(f), st.st_size, st.st_mtime])
+
+    return stamps
+
+
 def split_up_filename(filename):
     """ Return strings representing the parts of the filename.
 
@@ -579,13 +737,16 @@ def describe(geodata, raster=False, feature=False, comprehensive=False, flatten
 
     else:
         result["geodata"] = geodata
-        if comprehensive:
-            target_attributes = sorted([(k, v) for k, v in properties.iteritems()])
+        if comprehensive:  # every group, so rows of any data type share columns
+            target_attributes = sorted(properties.items())
         else:
             target_attributes = [('BaseProperties', properties['BaseProperties'])]
 
+    # with comprehensive, only the groups that apply to the dataset are read, the rest are 'N/A'
+    applicable = describe_groups(getattr(d, "dataType", None)) if comprehensive and not (raster or feature) else properties
+
     for k, v in target_attributes:
-        result[k] = {att: getattr(d, att, "N/A") for att in v}
+        result[k] = {att: getattr(d, att, "N/A") if k in applicable else "N/A" for att in v}
 
     if flatten:
         flat = collections.OrderedDict()
@@ -599,7 +760,8 @@ def describe(geodata, raster=False, feature=False, comprehensive=False, flatten
         for f in flatten:
             try:
                 for k, v in result.pop(f).iteritems():
-                    flat[k] = stringify_objects(v)
+                    if flat.get(k, "N/A") == "N/A":  # an attribute shared by groups keeps the value read
+                        flat[k] = stringify_objects(v)
             except KeyError:
                 pass
 
@@ -625,66 +787,190 @@ def stringify_objects(x):
     return x
 
 
-# @base.log.log_error
-def get_transformation(in_ds, out_cs, overrides=None):
-    """
+def srs_key(srs):
+    """ Return a key for a spatial reference, its factory code or for custom ones a hash of its string
 
     Args:
-        in_ds:
-        out_cs:
-        overrides:
+        srs (arcpy.SpatialReference): Spatial reference
 
     Returns:
-
+        str:
     """
 
-    cs_in = get_srs(in_ds, raise_unknown_error=True, as_object=True)
-    # def parse_proj_string_for_name(proj_string):
-    #     # s = PROJCS['GDA_1994_Australia_Albers', GEOGCS[
-    #     #     'GCS_GDA_1994', DATUM['D_GDA_1994', SPHEROID['GRS_1980', 6378137.0, 298.257222101]], PRIMEM['Greenwich', 0.0],
-    #     #     UNIT['Degree', 0.0174532925199433]], PROJECTION['Albers'], PARAMETER['False_Easting', 0.0], PARAMETER[
-    #     #            'False_Northing', 0.0], PARAMETER['Central_Meridian', 132.0], PARAMETER['Standard_Parallel_1', -18.0],
-    #     #        PARAMETER['Standard_Parallel_2', -36.0], PARAMETER['Latitude_Of_Origin', 0.0], UNIT['Meter', 1.0]]
-    #     x, y = proj_string.split("[", 1)
-    #     return y.split(",")[0].strip("'")
+    code = getattr(srs, "factoryCode", 0)
+
+    return str(code) if code else "wkt:" + hashlib.md5(srs.exportToString().encode("utf-8")).hexdigest()
+
+
+def find_transformation(cs_in, out_cs, overrides=None):
+    """ Return the shortest transformation between two spatial references, or an override of it
+
+    Args:
+        cs_in (arcpy.SpatialReference): Source spatial reference
+        out_cs (arcpy.SpatialReference): Output spatial reference
+        overrides (dict): Transformation -> transformation to use instead
+
+    Returns:
+        str: Transformation, '#' if none is needed
+    """
 
     if cs_in.GCS.name == out_cs.GCS.name:  # the same datum, no tx required
         return "#"
 
-    # if cs_in.GCS.datumCode != cs_out.GCS.datumCode:
     try:
         lst = ap.ListTransformations(cs_in, out_cs)
     except Exception as e:
-        e = ValueError("cs_in= " + cs_in + " out_cs= " + out_cs + " e: " + str(e))
-        # base.log.debug("Raising {}".format(e))
-        raise e
-    if lst:
-        shortest = min(lst, key=len)
-    else:
-        e = ValueError("Datum transformation was not found for {0} (1) -> {2}".format(in_ds, cs_in, out_cs))
-        # base.log.debug("Raising {}".format(e))
-        raise e
+        raise ValueError("cs_in= {0} out_cs= {1} e: {2}".format(cs_in.name, out_cs.name, e))
+
+    if not lst:
+        raise ValueError("Datum transformation was not found for {0} -> {1}".format(cs_in.name, out_cs.name))
+
+    shortest = min(lst, key=len)
 
     if overrides:
-        ov = overrides.get(shortest, None)
-        if ov:
-            shortest = ov
+        shortest = overrides.get(shortest, None) or shortest
 
     return shortest
-    # # get transformation
-    # shortest = ()
-    # cs_in = Describe(r_in).spatialReference
-    # # cs_in = ap.CreateSpatialReference_management(spatial_reference_template=r_in).re
-    # self.send_info(cs_in.GCS.datumCode)
-    # self.send_info(self.out_cs.GCS.datumCode)
-    # if cs_in.GCS.datumCode != self.out_cs.GCS.datumCode:
-    #     lst = ap.ListTransformations(cs_in, self.out_cs)
-    #     shortest = min(lst, key=len) if lst else ()
-    #     if not shortest:
-    #         raise ValueError("Datum transformation was not found for {0} -> {1}".format(cs_in.name, self.out_cs))
-    #     ov = self.overrides.get(shortest, None)
-    #     if ov:
-    #         shortest = ov
+
+
+class TransformationResolver(object):
+    """ Transformations to an output spatial reference, chosen once per source spatial reference
+
+    Choices are keyed by the source and output spatial references and the
+    overrides, and kept in a JSON file between runs. Rows are counted per
+    source spatial reference so a run can report what each group used.
+    """
+
+    def __init__(self, out_cs, overrides=None, path=None):
+        """
+
+        Args:
+            out_cs (arcpy.SpatialReference): Output spatial reference
+            overrides (dict): Transformation -> transformation to use instead
+            path (str): Path of the JSON file of resolved transformations, None to not persist them
+        """
+
+        self.out_cs = out_cs
+        self.overrides = overrides if isinstance(overrides, dict) else None
+        self.path = path
+        self.lock = Lock()
+        self.changed = False
+        self.resolved = {}  # key -> transformation
+        self.groups = OrderedDict()  # source srs key -> [srs name, transformation or error, rows]
+
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.resolved = json.load(f)
+            except ValueError:
+                pass  # a damaged file just means resolving again
+
+        return
+
+    def key(self, cs_in):
+        """ Return the key of a source spatial reference's transformation
+
+        Args:
+            cs_in (arcpy.SpatialReference): Source spatial reference
+
+        Returns:
+            str:
+        """
+
+        overrides = json.dumps(sorted(self.overrides.items())) if self.overrides else ""
+
+        return "|".join([srs_key(cs_in), srs_key(self.out_cs), overrides])
+
+    def resolve(self, in_ds):
+        """ Return the transformation for a dataset
+
+        Args:
+            in_ds (str): Path to the dataset
+
+        Returns:
+            str: Transformation, '#' if none is needed
+        """
+
+        cs_in = get_srs(in_ds, raise_unknown_error=True, as_object=True)
+        key = self.key(cs_in)
+        group = srs_key(cs_in)
+
+        with self.lock:
+            tx = self.resolved.get(key)
+            if group not in self.groups:
+                self.groups[group] = [cs_in.name, tx, 0]
+            self.groups[group][2] += 1
+
+        if tx is not None:
+            return tx
+
+        try:
+            tx = find_transformation(cs_in, self.out_cs, self.overrides)
+        except ValueError as e:
+            with self.lock:
+                self.groups[group][1] = "failed: {}".format(e)
+            raise
+
+        with self.lock:
+            self.resolved[key] = self.groups[group][1] = tx
+            self.changed = True
+
+        return tx
+
+    def summary(self):
+        """ Return a line per source spatial reference with its rows and transformation
+
+        Returns:
+            list:
+        """
+
+        return ["{0} ({1}): {2} rows -> {3}".format(name, group, rows, tx) for group, (name, tx, rows) in self.groups.iteritems()]
+
+    def save(self):
+        """ Write the resolved transformations
+
+        Returns:
+
+        """
+
+        with self.lock:
+            if not self.path or not self.changed:
+                return
+            resolved = dict(self.resolved)
+
+        with open(self.path, "w") as f:
+            json.dump(resolved, f)
+
+        return
+
+
+_default_resolvers = {}  # (output srs key, overrides) -> TransformationResolver
+
+
+# @base.log.log_error
+def get_transformation(in_ds, out_cs, overrides=None):
+    """ Return the transformation from a dataset's spatial reference to another
+
+    Transformations are remembered for the session per source and output
+    spatial reference, see TransformationResolver.
+
+    Args:
+        in_ds (str): Path to the dataset
+        out_cs (arcpy.SpatialReference): Output spatial reference
+        overrides (dict): Transformation -> transformation to use instead
+
+    Returns:
+        str: Transformation, '#' if none is needed
+    """
+
+    key = (srs_key(out_cs), json.dumps(sorted(overrides.items())) if isinstance(overrides, dict) else "")
+
+    with _geodata_info_lock:
+        resolver = _default_resolvers.get(key)
+        if resolver is None:
+            resolver = _default_resolvers[key] = TransformationResolver(out_cs, overrides)
+
+    return resolver.resolve(in_ds)
 
 
 def get_srs(geodata, raise_unknown_error=False, as_object=False):
@@ -699,13 +985,9 @@ def get_srs(geodata, raise_unknown_error=False, as_object=False):
 
     """
 
-    if not geodata_exists(geodata):
+    srs = describe_geodata(geodata).spatial_reference
 
-        raise DoesNotExistError(geodata)
-
-    try:
-        srs = ap.Describe(geodata).spatialReference
-    except:
+    if srs is None:
         raise ValueError("'{}' has no 'spatialReference' property".format(geodata))
 
     if "unknown" in srs.name.lower() and raise_unknown_error:
@@ -718,6 +1000,147 @@ def get_srs(geodata, raise_unknown_error=False, as_object=False):
         return srs.name
 
 
+def describe_geodata(geodata):
+    """ Return the properties validation needs from one stat and one Describe
+
+    Results are cached per dataset and reused while the file on disk is
+    unchanged. Datasets that are not files (e.g. inside a geodatabase) are
+    checked with arcpy.Exists instead of a stat, and stamped with their
+    database, see geodata_stamp.
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Returns:
+        GeodataInfo: Named tuple of data type, shape type, spatial reference and cell count
+    """
+
+    stamp = geodata_stamp(geodata)
+
+    with _geodata_info_lock:
+        cached = _geodata_info.get(geodata)
+
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    desc = ap.Describe(geodata)
+
+    width, height = getattr(desc, "width", None), getattr(desc, "height", None)  # rasters only
+
+    info = GeodataInfo(getattr(desc, "dataType", None), getattr(desc, "shapeType", None), getattr(desc, "spatialReference", None),
+                       width * height if width and height else None)
+
+    if stamp is not None:
+        _remember(_geodata_info, geodata, (stamp, info))
+
+    return info
+
+
+def _remember(cache, geodata, value):
+    """ Cache a value for a dataset, forgetting the oldest datasets beyond MAX_DESCRIBED
+
+    Args:
+        cache (OrderedDict): _geodata_info or _describe_values
+        geodata (str): Path to the dataset
+        value (tuple): (stamp, value)
+
+    Returns:
+
+    """
+
+    with _geodata_info_lock:
+        cache.pop(geodata, None)
+        cache[geodata] = value
+        while len(cache) > MAX_DESCRIBED:
+            cache.popitem(last=False)
+
+    return
+
+
+def geodata_stamp(geodata):
+    """ Return the size and modification time of a dataset file and its sidecars, for cache checks
+
+    Args:
+        geodata (str): Path to the dataset
+
+    Datasets inside a database (e.g. a feature class in a file geodatabase)
+    take the fingerprint of the database, taken once per run, see
+    database_fingerprint.
+
+    Returns:
+        tuple: (size, mtime, sidecar stamps), None for datasets with nothing on disk to stamp, which are not cached
+    """
+
+    if not geodata:
+        raise DoesNotExistError(geodata)
+
+    try:
+        st = os.stat(geodata)
+        return st.st_size, st.st_mtime, sidecar_stamps(geodata)
+    except OSError:
+        if not ap.Exists(geodata):
+            raise DoesNotExistError(geodata)
+
+    try:
+        return file_fingerprint(geodata)[1:]
+    except (DoesNotExistError, OSError):
+        return None
+
+
+def describe_attributes(geodata, attributes):
+    """ Return Describe attributes of a dataset, flattened as describe does
+
+    Only the attributes asked for are read, from at most one Describe per
+    call. Values are cached per dataset while the file is unchanged, so
+    rows that share a dataset do not describe it again.
+
+    Args:
+        geodata (str): Path to the dataset
+        attributes (list): Describe attribute names, missing attributes give 'N/A'
+
+    Returns:
+        dict: Attribute name -> value
+    """
+
+    stamp = geodata_stamp(geodata)
+
+    with _geodata_info_lock:
+        cached = _describe_values.get(geodata)
+
+    values = dict(cached[1]) if cached and cached[0] == stamp else {}
+
+    missing = [a for a in attributes if a not in values]
+    if missing:
+        desc = ap.Describe(geodata)
+        for a in missing:
+            values[a] = stringify_objects(getattr(desc, a, "N/A"))
+        if stamp is not None:
+            _remember(_describe_values, geodata, (stamp, values))
+
+    return {a: values[a] for a in attributes}
+
+
+def forget_geodata(geodata=None):
+    """ Drop a dataset, or all datasets, from the validation cache
+
+    Args:
+        geodata (str): Path to the dataset, None for all
+
+    Returns:
+
+    """
+
+    with _geodata_info_lock:
+        if geodata is None:
+            _geodata_info.clear()
+            _describe_values.clear()
+        else:
+            _geodata_info.pop(geodata, None)
+            _describe_values.pop(geodata, None)
+
+    return
+
+
 def validate_geodata(geodata, raster=False, vector=False, table=False, srs_known=False, polygon=False, message_func=None, NetCdf=False):
     """
 
@@ -735,17 +1158,39 @@ def validate_geodata(geodata, raster=False, vector=False, table=False, srs_known
 
     """
 
+    t0 = default_timer()
+
+    try:
+        _validate_geodata(geodata, raster, vector, table, srs_known, polygon, message_func)
+    finally:
+        _validation_clock.seconds = getattr(_validation_clock, "seconds", 0.0) + default_timer() - t0
+
+    return
+
+
+def take_validation_seconds():
+    """ Return and reset the time this thread has spent in validate_geodata
+
+    Returns:
+        float:
+    """
+
+    seconds = getattr(_validation_clock, "seconds", 0.0)
+    _validation_clock.seconds = 0.0
+
+    return seconds
+
+
+def _validate_geodata(geodata, raster, vector, table, srs_known, polygon, message_func):
+    """ See validate_geodata """
+
     if message_func:
         message_func("Validating '{}'".format(geodata))
 
-    if not geodata_exists(geodata):
+    info = describe_geodata(geodata)
 
-        raise DoesNotExistError(geodata)
-
-    desc = ap.Describe(geodata)
-    try:
-        dt = desc.dataType
-    except:
+    dt = info.data_type
+    if dt is None:
         raise UnknownDataTypeError(geodata, "No dataType property")
 
     if raster and dt not in ["RasterDataset"]:
@@ -761,9 +1206,8 @@ def validate_geodata(geodata, raster=False, vector=False, table=False, srs_known
         raise NotTableError(geodata, dt)
 
     if polygon:
-        try:
-            st = desc.shapeType
-        except:
+        st = info.shape_type
+        if st is None:
             raise UnknownDataTypeError(geodata, "No shapeType property")
 
         if st != "Polygon":
@@ -776,6 +1220,57 @@ def validate_geodata(geodata, raster=False, vector=False, table=False, srs_known
     return
 
 
+def validate_geodata_batch(geodata_list, workers=8, seconds=None, on_valid=None, valid_values=None, **kwargs):
+    """ Validate many datasets in parallel
+
+    Args:
+        geodata_list (list): Paths to the datasets
+        workers (int): Number of threads
+        seconds (list): If given, filled with the validation time of each dataset
+        on_valid (function): If given, called with each dataset that passes, in the thread that validated it
+        valid_values (list): If given, filled with what on_valid returned for each dataset, None for those that fail
+        **kwargs: Keyword arguments for validate_geodata
+
+    Returns:
+        list: None for each valid dataset, otherwise the formatted error
+    """
+
+    if seconds is not None:
+        seconds[:] = [0.0] * len(geodata_list)
+
+    if valid_values is not None:
+        valid_values[:] = [None] * len(geodata_list)
+
+    def validate(i):
+        take_validation_seconds()
+        try:
+            validate_geodata(geodata_list[i], **kwargs)
+        except Exception as e:
+            return repr(format_exception_only(type(e), e))
+        finally:
+            if seconds is not None:
+                seconds[i] = take_validation_seconds()
+
+        if on_valid:
+            value = on_valid(geodata_list[i])
+            if valid_values is not None:
+                valid_values[i] = value
+
+        return None
+
+    workers = max(1, min(workers, len(geodata_list)))
+
+    if workers == 1:
+        return [validate(i) for i in range(len(geodata_list))]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(validate, range(len(geodata_list)))
+    finally:
+        pool.close()
+        pool.join()
+
+
 def compare_srs(srs1, srs2, raise_no_match_error=False, other_condition=True):
     """
 
@@ -830,7 +1325,7 @@ def get_band_nodata_value(raster, bandindex=1):
     return ndv
 
 
-def describe_properties():
+def _parse_describe_properties():
     s = """
             Base Properties:
             baseName
@@ -1151,5 +1646,68 @@ def describe_properties():
     return d
 
 
+DESCRIBE_PROPERTIES = _parse_describe_properties()  # property group -> attribute names, parsed once at import
+
+# property groups that apply to each Describe dataType, after the Base Properties that apply to all
+DESCRIBE_GROUPS = {data_type: ("BaseProperties",) + groups for data_type, groups in {
+    "ArcInfoItem": ("ArcInfoWorkstationItem",),
+    "ArcInfoTable": ("ArcInfoWorkstationTable", "TableProperties"),
+    "CadDrawingDataset": ("DatasetProperties", "CADDrawingDatasetProperties"),
+    "CadastralFabric": ("DatasetProperties", "CadastralFabricProperties"),
+    "Coverage": ("DatasetProperties", "CoverageProperties"),
+    "CoverageFeatureClass": ("DatasetProperties", "TableProperties", "FeatureClassProperties", "CoverageFeatureClassProperties"),
+    "DbaseTable": ("DatasetProperties", "TableProperties"),
+    "FeatureClass": ("DatasetProperties", "TableProperties", "GDBTableProperties", "EditorTrackingProperties", "FeatureClassProperties", "GDBFeatureClassProperties"),
+    "FeatureDataset": ("DatasetProperties",),
+    "FeatureLayer": ("LayerProperties", "DatasetProperties", "TableProperties", "FeatureClassProperties"),
+    "FeatureSet": ("RecordSetandFeatureSetProperties", "TableProperties", "FeatureClassProperties"),
+    "Folder": ("WorkspaceProperties",),
+    "GeometricNetwork": ("DatasetProperties", "GeometricNetworkProperties"),
+    "LasDataset": ("DatasetProperties", "LASDatasetProperties"),
+    "Layer": ("LayerProperties",),
+    "MosaicDataset": ("DatasetProperties", "RasterDatasetProperties", "MosaicDatasetProperties"),
+    "NALayer": ("LayerProperties", "NetworkAnalyst"),
+    "NetworkDataset": ("DatasetProperties", "NetworkDatasetProperties"),
+    "PrjFile": ("PrjFileProperties",),
+    "RasterBand": ("RasterBandProperties",),
+    "RasterCatalog": ("DatasetProperties", "TableProperties", "GDBTableProperties", "EditorTrackingProperties", "FeatureClassProperties", "GDBFeatureClassProperties", "RasterCatalogProperties"),
+    "RasterDataset": ("DatasetProperties", "RasterDatasetProperties", "RasterBandProperties"),
+    "RasterLayer": ("LayerProperties", "DatasetProperties", "RasterDatasetProperties", "RasterBandProperties"),
+    "RecordSet": ("RecordSetandFeatureSetProperties", "TableProperties"),
+    "RelationshipClass": ("DatasetProperties", "TableProperties", "GDBTableProperties", "RelationshipClassProperties"),
+    "RepresentationClass": ("RepresentationClassProperties",),
+    "SchematicDiagram": ("SchematicDiagramProperties",),
+    "ShapeFile": ("DatasetProperties", "TableProperties", "FeatureClassProperties"),
+    "Table": ("DatasetProperties", "TableProperties", "GDBTableProperties", "EditorTrackingProperties"),
+    "TableView": ("TableViewProperties", "TableProperties"),
+    "TextFile": ("TableProperties",),
+    "Tin": ("DatasetProperties", "TinProperties"),
+    "Topology": ("DatasetProperties", "TopologyProperties"),
+    "Workspace": ("WorkspaceProperties",)}.iteritems()}
+
+
+def describe_properties():
+    """ Return the Describe property groups and their attribute names
+
+    Returns:
+        dict: Group name -> list of attribute names, shared so not to be changed
+    """
+
+    return DESCRIBE_PROPERTIES
+
+
+def describe_groups(data_type):
+    """ Return the property groups that apply to a Describe dataType
+
+    Args:
+        data_type (str): Describe dataType
+
+    Returns:
+        tuple: Group names, all groups for data types that are not registered
+    """
+
+    return DESCRIBE_GROUPS.get(data_type) or tuple(sorted(DESCRIBE_PROPERTIES))
+
+
 def describe_property_groups():
-    return describe_properties().keys()
+    return DESCRIBE_PROPERTIES.keys()
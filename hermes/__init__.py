@@ -13,5 +13,5 @@ limitations under the License.
 from __future__ import absolute_import
 from __future__ import print_function
 from .common import HermesErrorHandler, trace
-from .paperwork import Paperwork
+from .paperwork import Paperwork, convert_datasets, parse_metadata, scratch_folder
 from .version import __version__
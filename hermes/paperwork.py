@@ -24,12 +24,107 @@ from __future__ import print_function
 from __future__ import absolute_import
 import os
 import arcpy
+import atexit
 import json
+import shutil
 import tempfile
+import threading
 import xml.etree.cElementTree as ET
 from .common import *
 from collections import defaultdict
 from .version import __version__
+
+_scratch = {"folder": None, "lock": threading.Lock()}
+#----------------------------------------------------------------------
+def scratch_folder():
+    """
+    returns the folder for temporary metadata files. It is made on first
+    use, shared by every Paperwork object and removed when python exits.
+    """
+    with _scratch["lock"]:
+        if _scratch["folder"] is None or not os.path.isdir(_scratch["folder"]):
+            _scratch["folder"] = tempfile.mkdtemp(prefix="hermes_")
+            atexit.register(shutil.rmtree, _scratch["folder"], True)
+        return _scratch["folder"]
+#----------------------------------------------------------------------
+def parse_metadata(source):
+    """
+    converts an xml document to a dictionary in one streaming pass. Elements
+    are cleared as soon as they are converted, so only the open elements
+    and the dictionary are held in memory. The dictionary is the same as
+    Paperwork._metadata_to_dictionary gives for the parsed tree.
+
+    Inputs:
+       source - path or file object of the xml document
+    Output:
+       dictionary
+    """
+    stack = [[]]  # converted children of each open element
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append([])
+            continue
+        children = stack.pop()
+        tag = elem.tag
+        d = {tag: {} if elem.attrib else None}
+        if children:
+            dd = defaultdict(list)
+            for dc in children:
+                for k, v in dc.iteritems():
+                    dd[k].append(v)
+            d = {tag: {k: v[0] if len(v) == 1 else v for k, v in dd.iteritems()}}
+        if elem.attrib:
+            d[tag].update(('@' + k, v) for k, v in elem.attrib.iteritems())
+        if elem.text:
+            text = elem.text.strip()
+            if children or elem.attrib:
+                if text:
+                    d[tag]['#text'] = text
+            else:
+                d[tag] = text
+        elem.clear()
+        stack[-1].append(d)
+    return stack[0][0]
+#----------------------------------------------------------------------
+def convert_datasets(datasets, workers=4):
+    """
+    converts the metadata of many datasets to dictionaries, read only and
+    in parallel.
+
+    Inputs:
+       datasets - list of dataset paths
+       workers - number of threads
+    Output:
+       list of dictionaries in the order of the datasets, a failed
+       dataset gives its HermesErrorHandler instead
+    """
+    def convert(dataset):
+        try:
+            return Paperwork(dataset, read_only=True).convert()
+        except HermesErrorHandler as e:
+            return e
+
+    workers = max(1, min(workers, len(datasets)))
+    if workers == 1:
+        return [convert(ds) for ds in datasets]
+    # plain threads, a ThreadPool takes up to 0.1 s to shut down
+    results = [None] * len(datasets)
+    jobs = iter(enumerate(datasets))
+    lock = threading.Lock()
+    def work():
+        while True:
+            with lock:
+                job = next(jobs, None)
+            if job is None:
+                return
+            results[job[0]] = convert(job[1])
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for t in threads:
+        t.daemon = True
+        t.start()
+    for t in threads:
+        t.join()
+    return results
 ########################################################################
 class Paperwork(object):
     """
@@ -47,6 +142,11 @@ class Paperwork(object):
       >>> pw = Paperwork(dataset=fc)
       >>> print pw.convert()
 
+    Read only usage, the metadata is exported once and never saved back:
+
+      >>> pw = Paperwork(dataset=fc, read_only=True)
+      >>> print pw.convert()
+
     Usage Update Example (add searchKeys to the metadata):
 
       >>> fc = r"c:\temp\scratch.gdb\states"
@@ -83,9 +183,18 @@ class Paperwork(object):
     _xmlText = None
     _temp_xml_file = None
     _temp_workspace = None
+    _dict = None
     #----------------------------------------------------------------------
-    def __init__(self, dataset):
-        """Constructor"""
+    def __init__(self, dataset, read_only=False):
+        """Constructor
+
+        Inputs:
+           dataset - path of the dataset
+           read_only - optional - if True the metadata is converted once,
+             its temporary file is removed straight away and save() is
+             not allowed.
+        """
+        self.read_only = read_only
         self.dataset = dataset
     #----------------------------------------------------------------------
     def _setup(self):
@@ -125,6 +234,7 @@ class Paperwork(object):
             self._temp_xml_file = None
             self._temp_workspace = None
             self._xmlText = None
+            self._dict = None
             self._setup()
         else:
             synerror = "dataset does not exist or cannot be accessed."
@@ -162,7 +272,7 @@ class Paperwork(object):
         """returns the location where the xml file is saved"""
         try:
             if self._temp_workspace is None:
-                self._temp_workspace = tempfile.gettempdir()
+                self._temp_workspace = scratch_folder()
             return self._temp_workspace
         except:
             line, filename, synerror = trace()
@@ -245,10 +355,16 @@ class Paperwork(object):
     def convert(self):
         """ converts an xml document to a dictionary """
         try:
+            if self._dict is not None:
+                return self._dict
             if self._temp_xml_file is None:
                 self._setup()
-            tree = ET.XML(text=open(self._temp_xml_file, 'rb').read())
-            return self._metadata_to_dictionary(tree)
+            d = parse_metadata(self._temp_xml_file)
+            if self.read_only:
+                self._dict = d
+                os.remove(self._temp_xml_file)
+                self._temp_xml_file = None
+            return d
         except:
             line, filename, synerror = trace()
             raise HermesErrorHandler(
@@ -271,9 +387,11 @@ class Paperwork(object):
               d - optional - either None or dictionary to be converted to
                 metdata xml and applied to the dataset.
            Raises:
-              HermesErrorHandler
+              HermesErrorHandler, also if the Paperwork is read only
         """
         try:
+            if self.read_only:
+                raise Exception("Metadata of %s is read only" % self._dataset)
             if d is None:
                 d = self.convert()
             if isinstance(d, dict):
@@ -306,6 +424,24 @@ class Paperwork(object):
                 }
             )
     #----------------------------------------------------------------------
+    def toXML(self):
+        """
+        returns the metadata as xml text, as exportToXML writes it
+        """
+        try:
+            return self._dictionary_to_metadata(self.convert())
+        except:
+            line, filename, synerror = trace()
+            raise HermesErrorHandler(
+                {
+                    "function": "toXML",
+                    "line": line,
+                    "filename": filename,
+                    "synerror": synerror,
+                    "arc" : synerror
+                }
+            )
+    #----------------------------------------------------------------------
     def exportToXML(self, outFolder=None, outName=None):
         """
         Exports a metadata file (.xml) to a save location and a given name.
@@ -346,8 +482,7 @@ class Paperwork(object):
             else:
                 from uuid import uuid4
                 fullPath = os.path.join(outFolder, uuid4().get_hex() + ".xml")
-            d = self.convert()
-            res = self._dictionary_to_metadata(d)
+            res = self.toXML()
             writer = None
             with open(fullPath, 'wb') as writer:
                 writer.write(res)
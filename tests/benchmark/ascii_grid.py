@@ -0,0 +1,101 @@
+"""
+Description
+-----------
+    Benchmark of the block-wise ASCII grid writer used by the To ASCII tool
+
+    A synthetic float grid (10000 x 10000 by default) is generated strip by
+    strip so the benchmark itself runs in bounded memory. The native writer is
+    timed against row-wise numpy.savetxt as a baseline.
+
+    Usage:
+        python -m tests.benchmark.ascii_grid [ncols] [nrows]
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from base.raster_io import write_ascii_blocks
+from collections import namedtuple
+from time import time
+import numpy as np
+import os
+import sys
+import tempfile
+
+
+SyntheticGrid = namedtuple("SyntheticGrid", "ncols nrows rows_per_block seed")
+
+
+def synthetic_blocks(grid):
+    """ Generate strips of a reproducible synthetic float32 grid
+
+    Args:
+        grid (SyntheticGrid): Size of the grid
+
+    Returns:
+        generator: 2D float32 arrays
+    """
+
+    rs = np.random.RandomState(grid.seed)
+
+    for first_row in range(0, grid.nrows, grid.rows_per_block):
+        n = min(grid.rows_per_block, grid.nrows - first_row)
+        yield (rs.random_sample((n, grid.ncols)) * 1000.0).astype(np.float32)
+
+
+def header(grid):
+    """ Header for the synthetic grid """
+
+    return "ncols {}\nnrows {}\nxllcorner 0.0\nyllcorner 0.0\ncellsize 25.0\nNODATA_value -9999\n".format(grid.ncols, grid.nrows)
+
+
+def savetxt_writer(out_file, grid):
+    """ Baseline, numpy.savetxt row formatting """
+
+    with open(out_file, "wb") as f:
+        f.write(header(grid).encode("ascii"))
+        for block in synthetic_blocks(grid):
+            np.savetxt(f, block, fmt="%.9g", delimiter=" ")
+
+
+def native_writer(out_file, grid, compress=False):
+    """ The block-wise writer used by the To ASCII tool """
+
+    write_ascii_blocks(out_file, header(grid), synthetic_blocks(grid), "%.9g", compress)
+
+
+def timed(label, func, *args):
+    """ Time a writer, report seconds and output size """
+
+    out_file = args[0]
+    t0 = time()
+    func(*args)
+    elapsed = time() - t0
+    size = os.path.getsize(out_file)
+    os.remove(out_file)
+
+    print("{:<24} {:>8.2f} s {:>10.1f} MB {:>8.1f} Mcells/s".format(label, elapsed, size / 1e6, args[1].ncols * args[1].nrows / elapsed / 1e6))
+
+    return elapsed
+
+
+def main(ncols=10000, nrows=10000):
+    """ Run the benchmark """
+
+    grid = SyntheticGrid(ncols, nrows, max(1, (4 * 1024 * 1024) // ncols), 42)
+    out_dir = tempfile.mkdtemp()
+
+    print("Synthetic float32 grid {} x {}".format(ncols, nrows))
+
+    timed("numpy.savetxt", savetxt_writer, os.path.join(out_dir, "savetxt.asc"), grid)
+    timed("native", native_writer, os.path.join(out_dir, "native.asc"), grid)
+    timed("native gzip", native_writer, os.path.join(out_dir, "native.asc.gz"), grid, True)
+
+    os.rmdir(out_dir)
+
+    return
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:3]])
@@ -0,0 +1,368 @@
+"""
+Description
+-----------
+    Timed scenarios of the benchmark suite
+
+    A scenario has a setup, which makes its synthetic data and is not
+    timed, and a run, which is timed and returns the number of items it
+    processed. Tools are run headless, as base.headless runs them, with
+    their messages discarded. Tool modules that import optional packages
+    are imported by the runs that need them.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from base.base_tool import BaseTool
+from base.decorators import input_tableview, input_output_table
+from base.headless import build_parameters, MessagesShim
+from base.results import GgResult
+from base import utils
+from collections import OrderedDict, namedtuple
+from hermes.paperwork import Paperwork, convert_datasets
+from tests.benchmark import synthetic
+import logging
+import os
+
+
+Scenario = namedtuple("Scenario", "name setup run requires description")
+
+scenarios = OrderedDict()
+
+
+def scenario(name, setup, requires=(), description=""):
+    """ Register the decorated function as the timed run of a scenario
+
+    Args:
+        name (str): Scenario name
+        setup (function): Makes the scenario's data, given the work folder and scale, returns the run's state
+        requires (list): Modules the scenario needs, 'arcgis' for the real arcpy
+        description (str): One line description
+
+    Returns:
+        Decorator
+    """
+
+    def decorator(run):
+        scenarios[name] = Scenario(name, setup, run, tuple(requires), description)
+        return run
+
+    return decorator
+
+
+class ParameterValue(object):
+    """ A parameter as GgResult.initialise reads it """
+
+    def __init__(self, value=None):
+        self.value = value
+
+
+def run_tool(tool_class, values, workers=None):
+    """ Run a tool headless with its messages discarded
+
+    Args:
+        tool_class (type): BaseTool subclass
+        values (dict): Parameter name/value pairs
+        workers (int): Overrides the tool's number of workers
+
+    Returns:
+        GgResult: The tool's results
+    """
+
+    tool = tool_class()
+    if workers:
+        tool.workers = workers
+
+    parameters = build_parameters(tool, values)
+    tool.parameters = parameters
+    tool.updateParameters(parameters)
+
+    with open(os.devnull, "w") as devnull:
+        tool.execute(parameters, MessagesShim(devnull))
+
+    if not tool.result.pass_count:
+        raise RuntimeError("{} produced no results, {} failed".format(tool_class.__name__, tool.result.fail_count))
+
+    return tool.result
+
+
+def folder(work_dir, name):
+    """ Return a new sub-folder of the work folder """
+
+    path = os.path.join(work_dir, name)
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    return path
+
+
+class IterationTool(BaseTool):
+    """ Returns a small record per row, so a run times the iteration machinery
+    """
+
+    def __init__(self):
+        BaseTool.__init__(self, {"label": "Iteration", "description": "Benchmark row iteration", "can_run_background": "True", "category": "Benchmark"})
+        self.execution_list = [self.iterate]
+
+        return
+
+    @input_tableview(data_type="raster")
+    @input_output_table()
+    def getParameterInfo(self):
+        return BaseTool.getParameterInfo(self)
+
+    def iterate(self):
+        self.iterate_function_on_tableview(self.touch, return_to_results=True)
+
+        return
+
+    def touch(self, data):
+        r = data["raster"]
+
+        return {"raster": r, "name": os.path.basename(r), "size": os.path.getsize(r)}
+
+
+def iteration_setup(work_dir, scale):
+    rasters = synthetic.make_rasters(folder(work_dir, "iteration"), 50, 16, 16)
+    rows = [rasters[i % len(rasters)] for i in range(500 * scale)]
+
+    return {"table": synthetic.write_table(os.path.join(work_dir, "iteration.csv"), "raster", rows),
+            "out": folder(work_dir, "iteration_out"), "rows": len(rows)}
+
+
+def iteration_run(state, workers):
+    run_tool(IterationTool, {"raster_table": state["table"], "output_workspace": state["out"], "result_table_name": "iteration"}, workers)
+
+    return state["rows"]
+
+
+@scenario("do_iteration", iteration_setup, description="BaseTool.do_iteration over a table of rasters, one worker")
+def do_iteration_run(state):
+    return iteration_run(state, 1)
+
+
+@scenario("do_iteration_threads", iteration_setup, description="BaseTool.do_iteration over a table of rasters, four workers")
+def do_iteration_threads_run(state):
+    return iteration_run(state, 4)
+
+
+def results_setup(work_dir, scale):
+    logger = logging.getLogger("benchmark.results")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    records = [OrderedDict([("raster", "ras_{}.tif".format(i)), ("value", i * 0.5), ("note", "x" * 40)]) for i in range(2000 * scale)]
+
+    return {"out": folder(work_dir, "results_out"), "records": records, "logger": logger}
+
+
+@scenario("results", results_setup, description="GgResult pass and fail records written to CSV")
+def results_run(state):
+    result = GgResult()
+    result.initialise(ParameterValue(), ParameterValue(), ParameterValue(state["out"]), "results", state["logger"])
+
+    for i, rec in enumerate(state["records"]):
+        if i % 10:
+            result.add_pass(rec)
+        else:
+            result.add_fail(rec, "synthetic failure")
+
+    result.write()
+
+    return len(state["records"])
+
+
+def describe_setup(work_dir, scale):
+    ws = folder(work_dir, "describe")
+
+    return {"rasters": synthetic.make_rasters(ws, 20 * scale, 64, 64), "features": synthetic.make_features(ws, 5 * scale, 20, 16)}
+
+
+@scenario("describe", describe_setup, description="utils.describe of rasters and feature classes")
+def describe_run(state):
+    for r in state["rasters"]:
+        utils.describe(r, raster=True)
+
+    for f in state["features"]:
+        utils.describe(f, feature=True)
+
+    return len(state["rasters"]) + len(state["features"])
+
+
+def walk_setup(work_dir, scale):
+    root = os.path.join(work_dir, "walk")
+
+    return {"root": root, "count": synthetic.make_tree(root, depth=3, breadth=2 + scale, rasters_per_folder=3)}
+
+
+@scenario("walk", walk_setup, description="utils.walk of a folder tree for rasters")
+def walk_run(state):
+    found = utils.walk(state["root"], data_types="RasterDataset")
+
+    if len(found) != state["count"]:
+        raise RuntimeError("Walk found {} of {} rasters".format(len(found), state["count"]))
+
+    return len(found)
+
+
+def paperwork_setup(work_dir, scale):
+    datasets = synthetic.make_rasters(folder(work_dir, "paperwork"), 20 * scale, 8, 8)
+
+    return {"datasets": synthetic.make_metadata(datasets, keywords=50, paragraphs=20)}
+
+
+@scenario("paperwork", paperwork_setup, description="hermes Paperwork conversion of dataset metadata to dictionaries")
+def paperwork_run(state):
+    for ds in state["datasets"]:
+        pw = Paperwork(ds)
+        pw.convert()
+        os.remove(pw.xmlfile)
+
+    return len(state["datasets"])
+
+
+@scenario("paperwork_batch", paperwork_setup, description="hermes read only conversion of dataset metadata, four threads")
+def paperwork_batch_run(state):
+    converted = convert_datasets(state["datasets"], workers=4)
+
+    failed = [c for c in converted if not isinstance(c, dict)]
+    if failed:
+        raise RuntimeError("{} datasets failed, first {}".format(len(failed), failed[0]))
+
+    return len(converted)
+
+
+def iar_setup(work_dir, scale):
+    xmls = synthetic.make_iso_xml(folder(work_dir, "iar"), 200 * scale)
+
+    return {"xmls": xmls, "table": synthetic.write_table(os.path.join(work_dir, "iar.csv"), "xml", xmls), "out": folder(work_dir, "iar_out")}
+
+
+@scenario("iar_ids", iar_setup, description="Get IAR ID From XML tool over ISO 19139 files, first run and unchanged rerun")
+def iar_ids_run(state):
+    from tools.metadata.id_from_xml import GetIARIDFromXmlTool
+
+    for _ in range(2):
+        run_tool(GetIARIDFromXmlTool, {"xml_table": state["table"], "output_workspace": state["out"], "result_table_name": "iar"})
+
+    return 2 * len(state["xmls"])
+
+
+def audit_setup(work_dir, scale):
+    datasets = paperwork_setup(work_dir, scale)["datasets"]
+    for ds in datasets[::2]:
+        with open(os.path.splitext(ds)[0] + ".tip", "w") as f:
+            f.write("Synthetic\nsource: benchmark\n")
+
+    return {"datasets": datasets, "table": synthetic.write_table(os.path.join(work_dir, "audit.csv"), "geodata", datasets),
+            "out": folder(work_dir, "audit_out")}
+
+
+@scenario("audit", audit_setup, description="Audit metadata tool over datasets with sidecar XML and tip files, four workers")
+def audit_run(state):
+    from tools.metadata.audit import AuditMetadataTool
+
+    run_tool(AuditMetadataTool, {"geodata_table": state["table"], "output_workspace": state["out"], "result_table_name": "audit"}, 4)
+
+    return len(state["datasets"])
+
+
+def tips_setup(work_dir, scale):
+    datasets = synthetic.make_rasters(folder(work_dir, "tips"), 100 * scale, 4, 4)
+    for i, ds in enumerate(datasets):
+        with open(os.path.splitext(ds)[0] + ".tip", "w") as f:
+            f.write("Synthetic {}\nsource: benchmark\nabstract: line one\nline two\nkeywords: a, b, c\n".format(i))
+
+    return {"datasets": datasets, "table": synthetic.write_table(os.path.join(work_dir, "tips.csv"), "geodata", datasets),
+            "tip_folder": folder(work_dir, "tips_exported"), "out": folder(work_dir, "tips_out")}
+
+
+@scenario("tips", tips_setup, description="Import Tip Files to Table then Export Tips over its result, no dataset validation")
+def tips_run(state):
+    from tools.metadata.import_tips import ImportTipFilesToTableMetadataTool
+    from tools.metadata.export_tips import ExportTipsToFileMetadataTool
+
+    result = run_tool(ImportTipFilesToTableMetadataTool, {"geodata_table": state["table"], "validate": False, "output_workspace": state["out"],
+                                                          "result_table_name": "tips"})
+
+    run_tool(ExportTipsToFileMetadataTool, {"geodata_table": result.pass_table, "include_fields": "header;source;abstract;keywords", "validate": False,
+                                            "tip_folder": state["tip_folder"], "output_workspace": state["out"], "result_table_name": "tips_exported"})
+
+    return 2 * len(state["datasets"])
+
+
+def extents_setup(work_dir, scale):
+    ws = folder(work_dir, "extents")
+    rasters = synthetic.make_rasters(ws, 200 * scale, 8, 8)
+
+    return {"rasters": rasters, "aois": synthetic.make_features(ws, 5, 4, 8),
+            "table": synthetic.write_table(os.path.join(work_dir, "extents.csv"), "geodata", rasters), "out": folder(work_dir, "extents_out")}
+
+
+@scenario("compare_extents", extents_setup, description="Compare Extents tool, rasters against five areas of interest")
+def compare_extents_run(state):
+    from tools.geodata.compare_extents import CompareExtentsGeodataTool
+
+    run_tool(CompareExtentsGeodataTool, {"geodata_table": state["table"], "aoi_dataset": ";".join(state["aois"]), "output_workspace": state["out"],
+                                         "result_table_name": "extents"})
+
+    return len(state["rasters"]) * len(state["aois"])
+
+
+def nodata_setup(work_dir, scale):
+    ws = folder(work_dir, "nodata")
+    bils = synthetic.make_rasters(ws, 100 * scale, 8, 8, ext=".bil")
+    for ras in bils:
+        with open(os.path.splitext(ras)[0] + ".hdr", "w") as f:
+            f.write("BYTEORDER I\nLAYOUT BIL\nNROWS 8\nNCOLS 8\nNBANDS 1\nNBITS 32\nPIXELTYPE FLOAT\nNODATA -9999\n")
+    rasters = bils + synthetic.make_rasters(ws, 100 * scale, 8, 8, seed=7, ext=".tif")
+
+    return {"rasters": rasters, "table": synthetic.write_table(os.path.join(work_dir, "nodata.csv"), "raster", rasters), "out": folder(work_dir, "nodata_out")}
+
+
+@scenario("set_nodata", nodata_setup, description="Set NoData Value tool, BIL rasters by their headers and TIFF rasters by SetRasterProperties")
+def set_nodata_run(state):
+    from tools.raster.set_no_data_value import SetNodataValueRasterTool
+
+    result = run_tool(SetNodataValueRasterTool, {"raster_table": state["table"], "ndv": -3.5, "output_workspace": state["out"], "result_table_name": "nodata"})
+
+    if result.fail_count:
+        raise RuntimeError("{} rasters failed".format(result.fail_count))
+
+    return len(state["rasters"])
+
+
+def cdf_setup(work_dir, scale):
+    cdfs = synthetic.make_cdfs(folder(work_dir, "cdf"), 10 * scale)
+
+    return {"cdfs": cdfs, "root": os.path.dirname(cdfs[0]), "table": synthetic.write_table(os.path.join(work_dir, "cdf.csv"), "cdf", cdfs),
+            "out": folder(work_dir, "cdf_out")}
+
+
+@scenario("cdf_describe", cdf_setup, description="Describe CDF tool over netCDF files")
+def cdf_describe_run(state):
+    from tools.cdf.describe_cdf import DescribeCdfTool
+
+    run_tool(DescribeCdfTool, {"cdf_table": state["table"], "output_workspace": state["out"], "result_table_name": "cdf_describe"})
+
+    return len(state["cdfs"])
+
+
+@scenario("cdf_search", cdf_setup, requires=["netCDF4"], description="Search CDF tool with validation over a folder of netCDF files")
+def cdf_search_run(state):
+    from tools.cdf.search_cdf import SearchCdfTool
+
+    run_tool(SearchCdfTool, {"workspaces": state["root"], "validate": True, "output_workspace": state["out"], "result_table_name": "cdf_search"})
+
+    return len(state["cdfs"])
+
+
+@scenario("cdf_extract_timeslices", cdf_setup, requires=["arcgis", "netCDF4", "pandas"], description="Extract Timeslices CDF tool to rasters")
+def cdf_extract_run(state):
+    from tools.cdf.extract_timeslices import ExtractTimeslicesCdfTool
+
+    run_tool(ExtractTimeslicesCdfTool, {"cdf_table": state["table"], "raster_format": "tif", "output_workspace": state["out"],
+                                        "result_table_name": "cdf_extract"})
+
+    return len(state["cdfs"])
@@ -0,0 +1,664 @@
+"""
+Description
+-----------
+    A local stand-in for arcpy, for benchmarking without an ArcGIS licence
+
+    Only the part of the arcpy API that the benchmark scenarios reach is
+    provided, with the same names and call signatures. Datasets live in
+    plain files so no GDAL or ArcGIS is needed:
+
+        raster      NumPy .npy data under the raster's own path (whatever
+                    the extension) with a '<path>.aux.json' header
+        feature     JSON document of shape type, fields and rows
+        table       CSV file
+        netCDF      netCDF classic file, header read by NetCDFFileProperties
+        metadata    '<dataset>.xml' next to the dataset
+
+    Anything else raises ExecuteError, as a failed geoprocessing call would.
+    The benchmark suite puts this package on sys.path only when the real
+    arcpy can not be imported, or when asked to.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from collections import OrderedDict
+import csv
+import json
+import os
+import shutil
+import struct
+import numpy as np
+
+
+__standin__ = True
+
+HEADER_EXT = ".aux.json"
+
+interleaved_exts = [".bil", ".bsq", ".bip"]  # described as BIL, BSQ and BIP
+feature_exts = [".shp", ".geojson", ".json"]
+table_exts = [".csv", ".txt", ".dbf"]
+cdf_exts = [".nc", ".cdf"]
+
+parameter_types = {"DEFeatureClass": "Feature Class",
+                   "DEFile": "File",
+                   "DEFolder": "Folder",
+                   "DERasterDataset": "Raster Dataset",
+                   "DEWorkspace": "Workspace",
+                   "Field": "Field",
+                   "GPBoolean": "Boolean",
+                   "GPCoordinateSystem": "Coordinate System",
+                   "GPDouble": "Double",
+                   "GPExtent": "Extent",
+                   "GPFeatureLayer": "Feature Layer",
+                   "GPLinearUnit": "Linear Unit",
+                   "GPLong": "Long",
+                   "GPPoint": "Point",
+                   "GPSACellSize": "Cell Size",
+                   "GPSAGDBEnvCompression": "Compression",
+                   "GPSANeighborhood": "Neighborhood",
+                   "GPSpatialReference": "Spatial Reference",
+                   "GPString": "String",
+                   "GPTableView": "Table View",
+                   "GPType": "Data Type"}
+
+spatial_references = {4283: ("GCS_GDA_1994", "Geographic"),
+                      4326: ("GCS_WGS_1984", "Geographic"),
+                      3308: ("GDA_1994_NSW_Lambert", "Projected"),
+                      28355: ("GDA_1994_MGA_Zone_55", "Projected"),
+                      28356: ("GDA_1994_MGA_Zone_56", "Projected")}
+
+_views = {}  # table view name -> source table
+
+
+class ExecuteError(Exception):
+    pass
+
+
+class _Env(object):
+    """ arcpy.env, unset environments are None """
+
+    def __init__(self):
+        self.workspace = None
+        self.scratchWorkspace = None
+        self.overwriteOutput = True
+        self.outputCoordinateSystem = None
+        self.cellSize = None
+        self.extent = None
+        self.snapRaster = None
+        self.compression = None
+        self.pyramid = None
+        self.rasterStatistics = None
+        self.nodata = None
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+
+env = _Env()
+
+
+def _unsupported(name):
+    def f(*args, **kwargs):
+        raise ExecuteError("{} is not available in the benchmark stand-in".format(name))
+    f.__name__ = name
+    return f
+
+
+for _name in ["TableToTable_conversion", "CopyRaster_management", "MakeNetCDFRasterLayer_md", "GetRasterProperties_management",
+              "Project_management", "ProjectRaster_management", "Clip_management", "ListTransformations"]:
+    globals()[_name] = _unsupported(_name)
+
+
+def GetMessages(severity=0):
+    return ""
+
+
+def ListEnvironments():
+    return sorted(k for k in vars(env))
+
+
+def ProductInfo():
+    return "Benchmark stand-in"
+
+
+def GetInstallInfo(product=None):
+    return {"ProductName": "arcpy stand-in", "Version": "0", "InstallDir": os.path.dirname(os.path.abspath(__file__))}
+
+
+# spatial references and geometry
+
+
+class SpatialReference(object):
+    """ A spatial reference from a WKID, a name or exported text """
+
+    def __init__(self, item=None):
+        self.factoryCode = 0
+        self.name = "Unknown"
+        self.type = "Unknown"
+
+        if isinstance(item, (int, long)) or (isinstance(item, basestring) and item.isdigit()):
+            self._from_code(int(item))
+        elif isinstance(item, basestring):
+            self.loadFromString(item)
+
+    def _from_code(self, code):
+        self.factoryCode = code
+        self.name, self.type = spatial_references.get(code, ("Unknown", "Unknown"))
+
+    def exportToString(self):
+        return "{};{}".format(self.name, self.factoryCode)
+
+    def loadFromString(self, text):
+        name, _, code = text.partition(";")
+        if code.isdigit():
+            self._from_code(int(code))
+        else:
+            codes = [k for k, v in spatial_references.iteritems() if v[0] == name]
+            if codes:
+                self._from_code(codes[0])
+            else:
+                self.name = name or "Unknown"
+
+    def __eq__(self, other):
+        return isinstance(other, SpatialReference) and (self.factoryCode, self.name) == (other.factoryCode, other.name)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "<SpatialReference {}>".format(self.exportToString())
+
+
+class Point(object):
+    def __init__(self, X=0.0, Y=0.0, Z=None, M=None, ID=None):
+        self.X, self.Y, self.Z, self.M, self.ID = X, Y, Z, M, ID
+
+
+class Array(list):
+    pass
+
+
+class Extent(object):
+    def __init__(self, XMin=None, YMin=None, XMax=None, YMax=None):
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+        self.width = XMax - XMin if None not in (XMin, XMax) else None
+        self.height = YMax - YMin if None not in (YMin, YMax) else None
+        self.lowerLeft = Point(XMin, YMin)
+        self.upperRight = Point(XMax, YMax)
+        self.spatialReference = None
+
+    def projectAs(self, spatial_reference, transformation_name=None):
+        if spatial_reference != self.spatialReference:
+            raise ExecuteError("Projection is not available in the benchmark stand-in")
+        e = Extent(self.XMin, self.YMin, self.XMax, self.YMax)
+        e.spatialReference = spatial_reference
+        return e
+
+    def __repr__(self):
+        return "{} {} {} {}".format(self.XMin, self.YMin, self.XMax, self.YMax)
+
+
+class Polygon(object):
+    """ A single part polygon """
+
+    type = "polygon"
+
+    def __init__(self, inputs, spatial_reference=None):
+        self.points = [(p.X, p.Y) for p in inputs]
+        self.spatialReference = spatial_reference
+        xs, ys = zip(*self.points) if self.points else ((0.0,), (0.0,))
+        self.extent = Extent(min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def area(self):
+        p = self.points
+        return abs(sum(p[i][0] * p[i - 1][1] - p[i - 1][0] * p[i][1] for i in range(len(p)))) / 2.0
+
+
+# datasets
+
+
+def _srs_of(header):
+    code = header.get("srs") or 0
+    return SpatialReference(code)
+
+
+def _with_srs(extent, srs):
+    extent.spatialReference = srs
+    return extent
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _kind(path):
+    """ Return the dataset kind of a path, None if it does not exist """
+
+    if path in _views:
+        return "view"
+
+    if not path or not os.path.exists(path):
+        return None
+
+    if os.path.isdir(path):
+        return "gdb" if path.lower().endswith(".gdb") else "folder"
+
+    ext = os.path.splitext(path)[1].lower()
+
+    if os.path.exists(path + HEADER_EXT):
+        return "raster"
+    if ext in feature_exts:
+        return "feature"
+    if ext in table_exts:
+        return "table"
+    if ext in cdf_exts:
+        return "cdf"
+
+    return "file"
+
+
+def Exists(dataset):
+    return _kind(dataset) is not None
+
+
+def Delete_management(in_data, data_type=None):
+    if in_data in _views:
+        del _views[in_data]
+    elif os.path.isdir(in_data):
+        shutil.rmtree(in_data)
+    else:
+        for f in [in_data, in_data + HEADER_EXT, in_data + ".xml"]:
+            if os.path.exists(f):
+                os.remove(f)
+
+
+def MakeTableView_management(in_table, out_view, where_clause=None, workspace=None, field_info=None):
+    if not Exists(in_table):
+        raise ExecuteError("ERROR 000732: Input Table: Dataset {} does not exist or is not supported".format(in_table))
+    _views[out_view] = in_table
+
+
+def CreateFeatureclass_management(out_path, out_name, geometry_type=None, template=None, has_m=None, has_z=None, spatial_reference=None):
+    fc = os.path.join(out_path, out_name)
+    srs = spatial_reference.factoryCode if isinstance(spatial_reference, SpatialReference) else SpatialReference(spatial_reference).factoryCode
+    with open(fc, "w") as f:
+        json.dump({"shapeType": (geometry_type or "POLYGON").title(), "srs": srs, "fields": [], "rows": []}, f)
+
+
+def AddField_management(in_table, field_name, field_type, *args, **kwargs):
+    doc = _read_json(in_table)
+    doc["fields"].append([field_name, field_type])
+    with open(in_table, "w") as f:
+        json.dump(doc, f)
+
+
+def DefineProjection_management(in_dataset, coor_system):
+    srs = coor_system if isinstance(coor_system, SpatialReference) else SpatialReference(coor_system)
+    path = in_dataset + HEADER_EXT if _kind(in_dataset) == "raster" else in_dataset
+    doc = _read_json(path)
+    doc["srs"] = srs.factoryCode
+    with open(path, "w") as f:
+        json.dump(doc, f)
+
+
+def SetRasterProperties_management(in_raster, data_type=None, statistics=None, stats_file=None, nodata=None, key_properties=None):
+    """ Only the NoData value of band 1 is kept, as the stand-in's rasters have one band """
+
+    path = in_raster + HEADER_EXT
+    h = _read_json(path)
+    for band, value in nodata or []:
+        if str(band) == "1":
+            h["nodata"] = value
+    with open(path, "w") as f:
+        json.dump(h, f)
+
+
+class Field(object):
+    def __init__(self, name=None, type="String", length=255):
+        self.name, self.baseName, self.aliasName = name, name, name
+        self.type, self.length = type, length
+
+
+def ListFields(dataset, wild_card=None, field_type=None):
+    return Describe(dataset).fields
+
+
+class FieldMappings(object):
+    def __init__(self):
+        raise ExecuteError("FieldMappings is not available in the benchmark stand-in")
+
+
+class _Describe(object):
+    """ Describe object, missing properties raise AttributeError as arcpy's do """
+
+    def __init__(self, path, **properties):
+        name = os.path.basename(path)
+        self.catalogPath = path
+        self.path = os.path.dirname(path)
+        self.name = self.file = name
+        self.baseName, ext = os.path.splitext(name)
+        self.extension = ext.lstrip(".")
+        self.children = []
+        self.childrenExpanded = False
+        self.fullPropsRetrieved = True
+        self.metadataRetrieved = os.path.exists(path + ".xml")
+        self.__dict__.update(properties)
+
+
+def _describe_raster(path):
+    h = _read_json(path + HEADER_EXT)
+    rows, cols = h["shape"]
+    cell = h["cell"]
+    ext = Extent(h["xmin"], h["ymin"], h["xmin"] + cols * cell, h["ymin"] + rows * cell)
+
+    return _Describe(path, dataType="RasterDataset", dataElementType="DERasterDataset", format=h.get("format", "NPY"),
+                     width=cols, height=rows, bandCount=1, compressionType="None", meanCellWidth=cell, meanCellHeight=cell,
+                     noDataValue=h.get("nodata"), pixelType=h.get("pixel_type"), isInteger=np.dtype(h["dtype"]).kind in "iu",
+                     extent=_with_srs(ext, _srs_of(h)), spatialReference=_srs_of(h), permanent=True, sensorType="", primaryField=1, tableType="")
+
+
+def _describe_feature(path):
+    doc = _read_json(path)
+    pts = [xy for row in doc["rows"] for xy in row[0]]
+    ext = Extent(min(p[0] for p in pts), min(p[1] for p in pts), max(p[0] for p in pts), max(p[1] for p in pts)) if pts else Extent()
+    fields = [Field("FID", "OID"), Field("Shape", "Geometry")] + [Field(n, t) for n, t in doc["fields"]]
+
+    return _Describe(path, dataType="ShapeFile", dataElementType="DEShapeFile", shapeType=doc["shapeType"], featureType="Simple",
+                     hasM=False, hasZ=False, hasSpatialIndex=False, shapeFieldName="Shape", OIDFieldName="FID",
+                     fields=fields, indexes=[], extent=_with_srs(ext, _srs_of(doc)), spatialReference=_srs_of(doc), editorTrackingEnabled=False)
+
+
+def _describe_table(path):
+    with open(path, "rb") as f:
+        names = next(csv.reader(f), [])
+
+    return _Describe(path, dataType="TextFile", dataElementType="DETextFile", fields=[Field(n) for n in names], indexes=[],
+                     hasOID=False, OIDFieldName="")
+
+
+def Describe(value, datatype=None):
+    kind = _kind(value)
+
+    if kind is None:
+        raise IOError('"{}" does not exist'.format(value))
+    if kind == "view":
+        d = Describe(_views[value])
+        d.dataType = "TableView"
+        d.name = value
+        return d
+    if kind == "raster":
+        return _describe_raster(value)
+    if kind == "feature":
+        return _describe_feature(value)
+    if kind == "table":
+        return _describe_table(value)
+    if kind == "gdb":
+        return _Describe(value, dataType="Workspace", workspaceType="LocalDatabase", workspaceFactoryProgID="esriDataSourcesGDB.FileGDBWorkspaceFactory.1")
+    if kind == "folder":
+        return _Describe(value, dataType="Folder", workspaceType="FileSystem", workspaceFactoryProgID="")
+
+    return _Describe(value, dataType="File")
+
+
+# rasters
+
+
+class Raster(object):
+    """ A raster dataset, or an array not yet saved """
+
+    def __init__(self, in_raster, _array=None, _header=None):
+        if _array is None:
+            self.catalogPath = in_raster
+            h = _read_json(in_raster + HEADER_EXT)
+        else:
+            self.catalogPath = None
+            h = _header
+        self._array = _array
+        self._header = h
+        self.height, self.width = h["shape"]
+        self.meanCellWidth = self.meanCellHeight = h["cell"]
+        self.noDataValue = h.get("nodata")
+        self.pixelType = h.get("pixel_type")
+        self.isInteger = np.dtype(h["dtype"]).kind in "iu"
+        self.bandCount = 1
+        self.extent = Extent(h["xmin"], h["ymin"], h["xmin"] + self.width * h["cell"], h["ymin"] + self.height * h["cell"])
+        self.spatialReference = _srs_of(h)
+        self.name = os.path.basename(in_raster) if in_raster else None
+
+    def read(self):
+        return self._array if self._array is not None else np.load(self.catalogPath, mmap_mode="r")
+
+    def save(self, name):
+        a = self.read()
+        with open(name, "wb") as f:
+            np.save(f, np.ascontiguousarray(a))
+        header = dict(self._header)
+        ext = os.path.splitext(name)[1].lower()
+        if ext in interleaved_exts:
+            header["format"] = ext.lstrip(".").upper()
+        with open(name + HEADER_EXT, "w") as f:
+            json.dump(header, f)
+        self.catalogPath = name
+        self.name = os.path.basename(name)
+
+    def __str__(self):
+        return self.catalogPath or ""
+
+
+pixel_types = {"uint8": "U8", "int8": "S8", "uint16": "U16", "int16": "S16", "uint32": "U32", "int32": "S32", "float32": "F32", "float64": "F64"}
+
+
+def NumPyArrayToRaster(in_array, lower_left_corner=None, x_cell_size=1.0, y_cell_size=None, value_to_nodata=None):
+    a = np.asarray(in_array)
+    ll = lower_left_corner or Point(0.0, 0.0)
+    header = {"shape": list(a.shape[-2:]), "dtype": a.dtype.name, "xmin": ll.X, "ymin": ll.Y, "cell": float(x_cell_size),
+              "nodata": None if value_to_nodata is None else np.asscalar(np.array(value_to_nodata, dtype=a.dtype)),
+              "pixel_type": pixel_types.get(a.dtype.name, a.dtype.name), "srs": env.outputCoordinateSystem.factoryCode if env.outputCoordinateSystem else 0}
+
+    return Raster(None, _array=a, _header=header)
+
+
+def RasterToNumPyArray(in_raster, lower_left_corner=None, ncols=None, nrows=None, nodata_to_value=None):
+    r = in_raster if isinstance(in_raster, Raster) else Raster(in_raster)
+    a = r.read()
+
+    if lower_left_corner is not None:
+        cell = r.meanCellWidth
+        col = int(round((lower_left_corner.X - r.extent.XMin) / cell))
+        bottom = r.height - int(round((lower_left_corner.Y - r.extent.YMin) / cell))
+        nrows = nrows or bottom
+        ncols = ncols or r.width - col
+        a = a[max(bottom - nrows, 0):bottom, col:col + ncols]
+
+    a = np.array(a)
+
+    if nodata_to_value is not None and r.noDataValue is not None:
+        a = a.astype(np.result_type(a.dtype, np.min_scalar_type(nodata_to_value)))
+        a[a == r.noDataValue] = nodata_to_value
+
+    return a
+
+
+# metadata
+
+
+def _metadata_file(dataset):
+    return dataset if dataset.lower().endswith(".xml") else dataset + ".xml"
+
+
+def MetadataImporter_conversion(source, target):
+    src = _metadata_file(source)
+    text = open(src, "rb").read() if os.path.exists(src) else "<metadata />"
+    with open(_metadata_file(target), "wb") as f:
+        f.write(text)
+
+
+def SynchronizeMetadata_conversion(source, synctype="ALWAYS"):
+    pass
+
+
+def ParseTableName(name, workspace=None):
+    return "{}, {}, {}".format(None, None, os.path.splitext(os.path.basename(name))[0])
+
+
+def ValidateTableName(name, workspace=None):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def CreateUniqueName(base_name, workspace=None):
+    name, ext = os.path.splitext(base_name)
+    candidate, i = base_name, 0
+    while os.path.exists(os.path.join(workspace or "", candidate)):
+        candidate = "{}{}{}".format(name, i, ext)
+        i += 1
+    return candidate
+
+
+# netCDF classic header
+
+
+class NetCDFFileProperties(object):
+    """ Reads the header of a netCDF classic (CDF-1/CDF-2) file """
+
+    field_types = {1: "Short", 2: "Text", 3: "Short", 4: "Long", 5: "Float", 6: "Double"}
+    formats = {1: "b", 2: "c", 3: "h", 4: "i", 5: "f", 6: "d"}
+
+    def __init__(self, netcdf_filename):
+        self.path = netcdf_filename
+        with open(netcdf_filename, "rb") as f:
+            self._parse(f.read())
+
+    def _parse(self, buf):
+        if buf[:3] != "CDF" or buf[3] not in "\x01\x02":
+            raise ExecuteError("'{}' is not a netCDF classic file".format(self.path))
+
+        offset_size = 8 if buf[3] == "\x02" else 4
+        pos = [4]
+
+        def i32():
+            v = struct.unpack(">i", buf[pos[0]:pos[0] + 4])[0]
+            pos[0] += 4
+            return v
+
+        def name():
+            n = i32()
+            s = buf[pos[0]:pos[0] + n]
+            pos[0] += (n + 3) // 4 * 4
+            return s
+
+        def values(nc_type, n):
+            size = struct.calcsize(self.formats[nc_type])
+            raw = buf[pos[0]:pos[0] + n * size]
+            pos[0] += (n * size + 3) // 4 * 4
+            if nc_type == 2:
+                return raw.rstrip("\x00")
+            v = struct.unpack(">{}{}".format(n, self.formats[nc_type]), raw)
+            return v[0] if n == 1 else list(v)
+
+        def attributes():
+            i32()
+            atts = OrderedDict()
+            for _ in range(i32()):
+                k = name()
+                t = i32()
+                atts[k] = values(t, i32())
+            return atts
+
+        i32()  # numrecs
+        self.dimensions = OrderedDict()
+        i32()
+        for _ in range(i32()):
+            k = name()
+            self.dimensions[k] = i32()
+
+        self.attributes = {"": attributes()}
+
+        self.variables = OrderedDict()
+        i32()
+        for _ in range(i32()):
+            k = name()
+            dim_ids = [i32() for _ in range(i32())]
+            self.attributes[k] = attributes()
+            t = i32()
+            i32()  # vsize
+            begin = struct.unpack(">q" if offset_size == 8 else ">i", buf[pos[0]:pos[0] + offset_size])[0]
+            pos[0] += offset_size
+            self.variables[k] = (t, [self.dimensions.keys()[i] for i in dim_ids], begin)
+
+        self._buf = buf
+
+    def getDimensions(self):
+        return list(self.dimensions)
+
+    def getDimensionSize(self, dimension_name):
+        return self.dimensions[dimension_name]
+
+    def getVariables(self):
+        return list(self.variables)
+
+    def getDimensionsByVariable(self, variable_name):
+        return list(self.variables[variable_name][1])
+
+    def getVariablesByDimension(self, dimension_name):
+        return [k for k, v in self.variables.iteritems() if dimension_name in v[1]]
+
+    def getFieldType(self, name):
+        if name not in self.variables:
+            raise ExecuteError("'{}' is not a variable of '{}'".format(name, self.path))
+        return self.field_types[self.variables[name][0]]
+
+    def getAttributeNames(self, variable_name=""):
+        return list(self.attributes[variable_name or ""])
+
+    def getAttributeValue(self, variable_name, attribute_name):
+        return self.attributes[variable_name or ""][attribute_name]
+
+    def getDimensionValue(self, dimension_name, index):
+        t, dims, begin = self.variables[dimension_name]
+        size = struct.calcsize(self.formats[t])
+        return struct.unpack(">" + self.formats[t], self._buf[begin + index * size:begin + (index + 1) * size])[0]
+
+
+# tool parameters
+
+
+class Filter(object):
+    def __init__(self):
+        self.type = "ValueList"
+        self.list = []
+
+
+class Parameter(object):
+    """ A tool parameter, datatype keywords read back as display names as arcpy's do """
+
+    def __init__(self, name=None, displayName=None, direction=None, datatype=None, parameterType=None, enabled=True,
+                 category=None, symbology=None, multiValue=False):
+        if isinstance(datatype, (list, tuple)):
+            datatype = datatype[0]
+        self.name = name
+        self.displayName = displayName
+        self.direction = direction
+        self.datatype = parameter_types.get(datatype, datatype)
+        self.parameterType = parameterType
+        self.enabled = enabled
+        self.category = category
+        self.symbology = symbology
+        self.multiValue = multiValue
+        self.filter = Filter()
+        self.parameterDependencies = []
+        self.defaultEnvironmentName = None
+        self.value = None
+        self.altered = False
+
+    @property
+    def valueAsText(self):
+        return None if self.value in (None, "") else unicode(self.value)
+
+
+from arcpy import da  # noqa, arcpy.da is an attribute of arcpy after 'import arcpy'
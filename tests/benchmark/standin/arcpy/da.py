@@ -0,0 +1,104 @@
+"""
+Description
+-----------
+    arcpy.da of the benchmark stand-in: cursors and Walk
+
+Implementation
+--------------
+"""
+
+from arcpy import _kind, _views, _read_json, Polygon, ExecuteError, HEADER_EXT
+import csv
+import json
+import os
+
+
+walk_types = {"RasterDataset": ["raster"],
+              "FeatureClass": ["feature"],
+              "Table": ["table"],
+              "Any": ["raster", "feature", "table", "cdf", "file"]}
+
+
+class SearchCursor(object):
+    """ Reads the rows of a CSV table or feature dataset """
+
+    def __init__(self, in_table, field_names, where_clause=None, spatial_reference=None, explode_to_points=None, sql_clause=None):
+        source = _views.get(in_table, in_table)
+        kind = _kind(source)
+
+        if isinstance(field_names, basestring):
+            field_names = [field_names]
+        self.fields = tuple(field_names)
+
+        if kind == "table":
+            with open(source, "rb") as f:
+                records = list(csv.DictReader(f))
+        elif kind == "feature":
+            doc = _read_json(source)
+            names = [n for n, t in doc["fields"]]
+            records = [dict(zip(names, row[1:]), **{"SHAPE@": row[0]}) for row in doc["rows"]]
+        else:
+            raise ExecuteError("Cannot open '{}'".format(in_table))
+
+        missing = [f for f in self.fields if records and f not in records[0]]
+        if missing:
+            raise RuntimeError("A column was specified that does not exist: {}".format(missing))
+
+        self._rows = iter([tuple(r.get(f) for f in self.fields) for r in records])
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        return next(self._rows)
+
+    def reset(self):
+        raise ExecuteError("reset is not available in the benchmark stand-in")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class InsertCursor(object):
+    """ Appends rows to a feature dataset, geometry first as 'SHAPE@' """
+
+    def __init__(self, in_table, field_names):
+        self.path = in_table
+        self.doc = _read_json(in_table)
+        self.fields = list(field_names)
+
+    def insertRow(self, row):
+        values = dict(zip(self.fields, row))
+        shape = values.pop("SHAPE@", None)
+        points = shape.points if isinstance(shape, Polygon) else []
+        self.doc["rows"].append([points] + [values.get(n) for n, t in self.doc["fields"]])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        return False
+
+    def close(self):
+        with open(self.path, "w") as f:
+            json.dump(self.doc, f)
+
+
+def Walk(top, topdown=True, onerror=None, followlinks=False, datatype=None, type=None):
+    """ Walk a folder tree yielding datasets of the requested data types """
+
+    datatypes = [datatype] if isinstance(datatype, basestring) else (datatype or ["Any"])
+    kinds = set(k for d in datatypes for k in walk_types.get(d, []))
+
+    for root, dirs, files in os.walk(top, topdown=topdown, onerror=onerror, followlinks=followlinks):
+        found = []
+        for f in files:
+            if f.endswith(HEADER_EXT) or f.endswith(".xml"):
+                continue  # sidecars
+            if _kind(os.path.join(root, f)) in kinds:
+                found.append(f)
+        yield root, dirs, found
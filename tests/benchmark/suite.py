@@ -0,0 +1,267 @@
+"""
+Description
+-----------
+    Benchmark suite of the shared tool machinery over synthetic geodata
+
+    Each scenario makes its data in a temporary folder, then its run is
+    timed over several repeats. The timings are written as JSON along with
+    the commit they were measured on, so the results of two commits can be
+    compared: --compare reports each scenario's best time against a
+    baseline file and fails if any is slower by more than the tolerance.
+
+    Without ArcGIS, or with --standin, arcpy is the local stand-in in
+    tests/benchmark/standin. Scenarios whose requirements are missing are
+    recorded as skipped. Tool app data (logs, timings, caches) goes to the
+    temporary folder, so runs do not affect each other.
+
+    Usage:
+        python -m tests.benchmark.suite [scenario ...] [--output benchmark.json] [--compare baseline.json]
+                                        [--scale 1] [--repeat 3] [--tolerance 0.2] [--standin] [--keep]
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function, division
+from collections import OrderedDict
+from datetime import datetime
+from importlib import import_module
+from os.path import join, dirname, abspath
+from timeit import default_timer
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+
+standin_path = join(dirname(abspath(__file__)), "standin")
+repo_path = dirname(dirname(dirname(abspath(__file__))))
+
+
+def use_standin(force=False):
+    """ Import arcpy, the stand-in if asked for or if ArcGIS is not installed
+
+    Args:
+        force (bool): Use the stand-in even if ArcGIS is installed
+
+    Returns:
+        bool: True if the stand-in is in use
+    """
+
+    if not force:
+        try:
+            import arcpy
+            return getattr(arcpy, "__standin__", False)
+        except ImportError:
+            pass
+
+    if "arcpy" in sys.modules and not getattr(sys.modules["arcpy"], "__standin__", False):
+        raise RuntimeError("The ArcGIS arcpy is already imported, the stand-in can not replace it")
+
+    sys.path.insert(0, standin_path)
+    import arcpy
+
+    return True
+
+
+def missing_requirements(requires, standin):
+    """ Return the requirements of a scenario that are not available
+
+    Args:
+        requires (list): Module names, 'arcgis' for the real arcpy
+        standin (bool): Flag for the stand-in being in use
+
+    Returns:
+        list:
+    """
+
+    missing = []
+
+    for r in requires:
+        if r == "arcgis":
+            if standin:
+                missing.append(r)
+            continue
+        try:
+            import_module(r)
+        except ImportError:
+            missing.append(r)
+
+    return missing
+
+
+def git_state():
+    """ Return the commit of the working tree and whether it has changes
+
+    Returns:
+        tuple: (commit, dirty), (None, None) outside a git checkout
+    """
+
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=repo_path).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain", "--untracked-files=no"], cwd=repo_path).strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def time_scenario(sc, work_dir, scale, repeat):
+    """ Set up a scenario and time its runs
+
+    Args:
+        sc (Scenario): The scenario
+        work_dir (str): Folder for the scenario's data
+        scale (int): Data size multiplier
+        repeat (int): Number of timed runs
+
+    Returns:
+        OrderedDict: Timings of the scenario
+    """
+
+    t0 = default_timer()
+    state = sc.setup(work_dir, scale)
+    setup_seconds = default_timer() - t0
+
+    seconds = []
+    items = 0
+    for _ in range(repeat):
+        t0 = default_timer()
+        items = sc.run(state)
+        seconds.append(default_timer() - t0)
+
+    best = min(seconds)
+
+    return OrderedDict([("description", sc.description),
+                        ("items", items),
+                        ("setup_seconds", setup_seconds),
+                        ("seconds", seconds),
+                        ("best", best),
+                        ("median", sorted(seconds)[len(seconds) // 2]),
+                        ("items_per_second", items / best if best else None)])
+
+
+def compare(results, baseline, tolerance):
+    """ Compare best times with a baseline
+
+    Args:
+        results (dict): Scenario results of this run
+        baseline (dict): Scenario results of the baseline run
+        tolerance (float): Allowed slow down, 0.2 is 20%
+
+    Returns:
+        tuple: (report lines, names of the scenarios that regressed)
+    """
+
+    lines = []
+    regressed = []
+
+    for name, r in results.iteritems():
+        b = baseline.get(name, {})
+        if "best" not in r or "best" not in b or not b["best"]:
+            continue
+        ratio = r["best"] / b["best"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        lines.append("{:<24} {:>9.4f} s  baseline {:>9.4f} s  x{:.2f}{}".format(name, r["best"], b["best"], ratio, flag))
+
+    return lines, regressed
+
+
+def main(args=None):
+    """ Command line entry point
+
+    Args:
+        args (list): Command line arguments, defaults to sys.argv
+
+    Returns:
+        int: Exit code, the number of scenarios that failed or regressed
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmark.suite", description="Benchmark Grid Garage over synthetic geodata")
+    parser.add_argument("scenarios", nargs="*", help="Scenarios to run, all by default")
+    parser.add_argument("--output", default="benchmark.json", help="JSON results file")
+    parser.add_argument("--compare", help="JSON results file of a baseline run")
+    parser.add_argument("--scale", type=int, default=1, help="Data size multiplier")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Slow down against the baseline that counts as a regression")
+    parser.add_argument("--standin", action="store_true", help="Use the arcpy stand-in even if ArcGIS is installed")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic data folder")
+    args = parser.parse_args(args)
+
+    work_dir = tempfile.mkdtemp(prefix="gg_benchmark_")
+    os.environ["USERPROFILE"] = join(work_dir, "profile")  # tool app data
+
+    standin = use_standin(args.standin)
+
+    from tests.benchmark.scenarios import scenarios
+
+    unknown = set(args.scenarios) - set(scenarios)
+    if unknown:
+        parser.error("unknown scenario(s) {}, expected some of {}".format(sorted(unknown), list(scenarios)))
+
+    commit, dirty = git_state()
+    results = OrderedDict()
+    failed = 0
+
+    print("arcpy: {}".format("stand-in" if standin else "ArcGIS"))
+
+    try:
+        for name, sc in scenarios.iteritems():
+            if args.scenarios and name not in args.scenarios:
+                continue
+
+            missing = missing_requirements(sc.requires, standin)
+            if missing:
+                results[name] = OrderedDict([("description", sc.description), ("skipped", "needs {}".format(", ".join(missing)))])
+                print("{:<24} skipped, needs {}".format(name, ", ".join(missing)))
+                continue
+
+            try:
+                results[name] = time_scenario(sc, join(work_dir, name), args.scale, args.repeat)
+                r = results[name]
+                print("{:<24} {:>9.4f} s best {:>9.4f} s median {:>10.1f} items/s".format(name, r["best"], r["median"], r["items_per_second"] or 0))
+            except Exception as e:
+                failed += 1
+                results[name] = OrderedDict([("description", sc.description), ("error", "{}: {}".format(type(e).__name__, e))])
+                print("{:<24} FAILED {}".format(name, results[name]["error"]))
+
+    finally:
+        if args.keep:
+            print("Synthetic data kept in {}".format(work_dir))
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    doc = OrderedDict([("created", datetime.now().isoformat()),
+                       ("commit", commit),
+                       ("dirty", dirty),
+                       ("python", sys.version.split()[0]),
+                       ("platform", platform.platform()),
+                       ("arcpy", "stand-in" if standin else "ArcGIS"),
+                       ("scale", args.scale),
+                       ("repeat", args.repeat),
+                       ("scenarios", results)])
+
+    with open(args.output, "w") as f:
+        json.dump(doc, f, indent=2)
+    print("Results written to {}".format(args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("arcpy") != doc["arcpy"] or baseline.get("scale") != doc["scale"]:
+            print("Baseline ran with arcpy {} at scale {}, times may not be comparable".format(baseline.get("arcpy"), baseline.get("scale")))
+        lines, regressed = compare(results, baseline.get("scenarios", {}), args.tolerance)
+        print("\n".join(["Against {} ({})".format(args.compare, baseline.get("commit"))] + lines))
+        failed += len(regressed)
+
+    return failed
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Description
+-----------
+    Generators of synthetic geodata for the benchmark suite
+
+    Rasters, feature classes and metadata are made through the arcpy API,
+    so the same generators serve the real arcpy and the stand-in. Tables
+    are CSV files and netCDF files are written in the netCDF classic
+    format, which ArcGIS and netCDF4 both read.
+
+    Everything is seeded, a scenario sees the same data on every run.
+
+Implementation
+--------------
+"""
+
+from __future__ import print_function
+from collections import OrderedDict
+import csv
+import os
+import struct
+import numpy as np
+import arcpy
+
+
+WKID = 3308  # GDA94 NSW Lambert
+
+nc_types = {"b": 1, "c": 2, "h": 3, "i": 4, "f": 5, "d": 6}  # numpy dtype character -> netCDF type
+
+
+def make_rasters(folder, count, rows=256, cols=256, seed=42, ext=".tif"):
+    """ Make float32 rasters of smooth noise with a band of NoData
+
+    Args:
+        folder (str): Output folder
+        count (int): Number of rasters
+        rows (int): Rows per raster
+        cols (int): Columns per raster
+        seed (int): Random seed
+        ext (str): Raster extension, decides the format with the real arcpy
+
+    Returns:
+        list: Raster paths
+    """
+
+    rs = np.random.RandomState(seed)
+    srs = arcpy.SpatialReference(WKID)
+    paths = []
+
+    for i in range(count):
+        a = np.cumsum(rs.standard_normal((rows, cols)).astype(np.float32), axis=1)
+        a[:rows // 16, :] = -9999.0
+        r = arcpy.NumPyArrayToRaster(a, arcpy.Point(9000000.0 + 25.0 * cols * i, 4200000.0), 25.0, 25.0, -9999.0)
+        path = os.path.join(folder, "ras_{:04d}{}".format(i, ext))
+        r.save(path)
+        del r
+        arcpy.DefineProjection_management(path, srs)
+        paths.append(path)
+
+    return paths
+
+
+def make_features(folder, count, polygons=50, vertices=32, seed=42):
+    """ Make polygon shapefiles of random star-shaped polygons
+
+    Args:
+        folder (str): Output folder
+        count (int): Number of feature classes
+        polygons (int): Polygons per feature class
+        vertices (int): Vertices per polygon
+        seed (int): Random seed
+
+    Returns:
+        list: Feature class paths
+    """
+
+    rs = np.random.RandomState(seed)
+    srs = arcpy.SpatialReference(WKID)
+    angles = np.linspace(0.0, 2 * np.pi, vertices, endpoint=False)
+    paths = []
+
+    for i in range(count):
+        name = "poly_{:04d}.shp".format(i)
+        arcpy.CreateFeatureclass_management(folder, name, "POLYGON", spatial_reference=srs)
+        fc = os.path.join(folder, name)
+        arcpy.AddField_management(fc, "zone", "LONG")
+
+        with arcpy.da.InsertCursor(fc, ["SHAPE@", "zone"]) as cursor:
+            for j in range(polygons):
+                cx, cy = 9000000.0 + rs.uniform(0, 50000), 4200000.0 + rs.uniform(0, 50000)
+                radii = rs.uniform(200.0, 1000.0, vertices)
+                ring = [arcpy.Point(cx + r * np.cos(t), cy + r * np.sin(t)) for r, t in zip(radii, angles)]
+                ring.append(ring[0])
+                cursor.insertRow([arcpy.Polygon(arcpy.Array(ring), srs), j])
+
+        paths.append(fc)
+
+    return paths
+
+
+def make_metadata(datasets, keywords=20, paragraphs=5):
+    """ Give datasets an ISO/ESRI style metadata document
+
+    Args:
+        datasets (list): Dataset paths
+        keywords (int): Keywords per document
+        paragraphs (int): Abstract paragraphs per document
+
+    Returns:
+        list: The datasets
+    """
+
+    for i, ds in enumerate(datasets):
+        keys = "".join("<keyword>key{}</keyword>".format(k) for k in range(keywords))
+        abstract = "".join("<para>Synthetic paragraph {} of dataset {}.</para>".format(p, i) for p in range(paragraphs))
+        xml = ('<?xml version="1.0" encoding="UTF-8"?>'
+               '<metadata xml:lang="en"><Esri><CreaDate>20170101</CreaDate><ArcGISFormat>1.0</ArcGISFormat></Esri>'
+               '<dataIdInfo><idCitation><resTitle>Synthetic {0}</resTitle></idCitation><idAbs>{1}</idAbs>'
+               '<searchKeys>{2}</searchKeys><idPurp>Benchmark</idPurp></dataIdInfo>'
+               '<mdDateSt Sync="TRUE">20170101</mdDateSt></metadata>').format(i, abstract, keys)
+        xml_file = ds + ".import.xml"
+        with open(xml_file, "w") as f:
+            f.write(xml)
+        arcpy.MetadataImporter_conversion(xml_file, ds)
+        os.remove(xml_file)
+
+    return datasets
+
+
+def make_iso_xml(folder, count, padding=200):
+    """ Make ISO 19139 metadata XML files as exported for the asset register
+
+    Args:
+        folder (str): Output folder
+        count (int): Number of files
+        padding (int): Keywords after the identification, bulk a reader can skip
+
+    Returns:
+        list: XML paths
+    """
+
+    paths = []
+
+    for i in range(count):
+        keys = "".join("<gmd:keyword><gco:CharacterString>key{}</gco:CharacterString></gmd:keyword>".format(k) for k in range(padding))
+        xml = ('<?xml version="1.0" encoding="UTF-8"?>'
+               '<gmd:MD_Metadata xmlns:gmd="http://www.isotc211.org/2005/gmd" xmlns:gco="http://www.isotc211.org/2005/gco">'
+               '<gmd:fileIdentifier><gco:CharacterString>{{{0:08X}-0000-0000-0000-000000000000}}</gco:CharacterString></gmd:fileIdentifier>'
+               '<gmd:dataSetURI><gco:CharacterString>file:///data/ds_{0}.tif</gco:CharacterString></gmd:dataSetURI>'
+               '<gmd:identificationInfo><gmd:MD_DataIdentification><gmd:citation><gmd:CI_Citation>'
+               '<gmd:title><gco:CharacterString>Synthetic {0}</gco:CharacterString></gmd:title></gmd:CI_Citation></gmd:citation>'
+               '</gmd:MD_DataIdentification></gmd:identificationInfo>'
+               '<gmd:distributionInfo><gmd:MD_Keywords>{1}</gmd:MD_Keywords></gmd:distributionInfo></gmd:MD_Metadata>').format(i, keys)
+        path = os.path.join(folder, "iso_{:05d}.xml".format(i))
+        with open(path, "w") as f:
+            f.write(xml)
+        paths.append(path)
+
+    return paths
+
+
+def make_tree(root, depth=3, breadth=3, rasters_per_folder=2, rows=16, cols=16):
+    """ Make a folder tree with small rasters in every folder, for walking
+
+    Args:
+        root (str): Root folder, created if necessary
+        depth (int): Folder levels below the root
+        breadth (int): Sub-folders per folder
+        rasters_per_folder (int): Rasters in each folder
+        rows (int): Raster rows
+        cols (int): Raster columns
+
+    Returns:
+        int: Number of rasters made
+    """
+
+    if not os.path.exists(root):
+        os.makedirs(root)
+
+    made = len(make_rasters(root, rasters_per_folder, rows, cols))
+
+    for f in ["readme.txt", "notes.doc"]:  # files a walk has to skip
+        open(os.path.join(root, f), "w").close()
+
+    if depth:
+        for b in range(breadth):
+            made += make_tree(os.path.join(root, "d{}".format(b)), depth - 1, breadth, rasters_per_folder, rows, cols)
+
+    return made
+
+
+def write_netcdf(path, dimensions, variables, attributes=None):
+    """ Write a netCDF classic (CDF-1) file, no record dimension
+
+    Args:
+        path (str): Output path
+        dimensions (OrderedDict): Dimension names and sizes
+        variables (OrderedDict): Variable name -> (dimension names, numpy array, attribute dict)
+        attributes (dict): Global attributes
+
+    Returns:
+        str: The path
+    """
+
+    def pad(b):
+        return b + "\x00" * (-len(b) % 4)
+
+    def name(s):
+        return struct.pack(">i", len(s)) + pad(s)
+
+    def values(v):
+        if isinstance(v, basestring):
+            return struct.pack(">ii", nc_types["c"], len(v)) + pad(v)
+        a = np.atleast_1d(np.asarray(v))
+        a = a.astype(">f{}".format(a.dtype.itemsize) if a.dtype.kind == "f" else ">i4")
+        return struct.pack(">ii", nc_types[a.dtype.char], a.size) + pad(a.tostring())
+
+    def att_list(atts):
+        if not atts:
+            return struct.pack(">ii", 0, 0)
+        return struct.pack(">ii", 12, len(atts)) + "".join(name(k) + values(v) for k, v in atts.iteritems())
+
+    dim_ids = {k: i for i, k in enumerate(dimensions)}
+    header = "CDF\x01" + struct.pack(">i", 0)
+    header += struct.pack(">ii", 10, len(dimensions)) + "".join(name(k) + struct.pack(">i", n) for k, n in dimensions.iteritems())
+    header += att_list(attributes)
+
+    data = []
+    var_headers = []
+    for k, (dims, a, atts) in variables.iteritems():
+        a = np.asarray(a)
+        a = a.astype(a.dtype.newbyteorder(">"))
+        if a.shape != tuple(dimensions[d] for d in dims):
+            raise ValueError("Variable '{}' shape {} does not match its dimensions {}".format(k, a.shape, dims))
+        raw = pad(a.tostring())
+        data.append(raw)
+        var_headers.append((name(k) + struct.pack(">i", len(dims)) + "".join(struct.pack(">i", dim_ids[d]) for d in dims) +
+                            att_list(atts) + struct.pack(">ii", nc_types[a.dtype.char], len(raw)), len(raw)))
+
+    header += struct.pack(">ii", 11, len(variables)) if variables else struct.pack(">ii", 0, 0)
+    begin = len(header) + sum(len(h) + 4 for h, n in var_headers)
+
+    with open(path, "wb") as f:
+        f.write(header)
+        for h, n in var_headers:
+            f.write(h + struct.pack(">i", begin))
+            begin += n
+        for raw in data:
+            f.write(raw)
+
+    return path
+
+
+def make_cdfs(folder, count, times=12, lats=40, lons=60, seed=42):
+    """ Make gridded monthly climate-like netCDF files
+
+    Args:
+        folder (str): Output folder
+        count (int): Number of files
+        times (int): Time steps
+        lats (int): Latitudes
+        lons (int): Longitudes
+        seed (int): Random seed
+
+    Returns:
+        list: netCDF paths
+    """
+
+    rs = np.random.RandomState(seed)
+    paths = []
+
+    dims = OrderedDict([("time", times), ("lat", lats), ("lon", lons)])
+
+    for i in range(count):
+        variables = OrderedDict()
+        variables["time"] = (["time"], np.arange(times, dtype=np.float64) * 30.0, {"units": "days since 2000-01-01", "calendar": "standard"})
+        variables["lat"] = (["lat"], np.linspace(-37.5, -28.0, lats), {"units": "degrees_north"})
+        variables["lon"] = (["lon"], np.linspace(141.0, 153.6, lons), {"units": "degrees_east"})
+        variables["tasmax"] = (["time", "lat", "lon"], (20.0 + 8.0 * rs.standard_normal((times, lats, lons))).astype(np.float32),
+                               {"units": "K", "long_name": "Maximum temperature", "_FillValue": np.float32(1.0e20)})
+
+        path = os.path.join(folder, "cdf_{:04d}.nc".format(i))
+        write_netcdf(path, dims, variables, {"title": "Synthetic {}".format(i), "Conventions": "CF-1.6"})
+        paths.append(path)
+
+    return paths
+
+
+def write_table(path, field, values):
+    """ Write a single field CSV table, the input table of a tool run
+
+    Args:
+        path (str): Output path
+        field (str): Field name
+        values (list): Field values
+
+    Returns:
+        str: The path
+    """
+
+    with open(path, "wb") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow([field])
+        w.writerows([v] for v in values)
+
+    return path
@@ -0,0 +1,148 @@
+"""
+Description
+-----------
+    Tests of the block reductions behind Aggregate and Block Statistics
+
+    A 5 x 5 integer raster holding 1 to 25 row by row, with one NoData
+    cell, is reduced in 2 x 2 blocks and compared with results worked out
+    by hand. Blocks are aligned to the lower left corner, as in arcpy.sa,
+    so EXPAND pads the top row and right column and TRUNCATE drops the
+    bottom row and left column.
+
+        python -m unittest tests.test_raster_blocks
+
+    The arcpy stand-in of the benchmark suite is used when ArcGIS is not
+    installed.
+
+Implementation
+--------------
+"""
+
+from tests.benchmark.suite import use_standin
+use_standin()
+
+from unittest import TestCase, main
+from base.raster_io import get_raster_grid
+from base.raster_blocks import block_layout, block_reduce, expand_block_strips, output_array, INTEGER_NODATA, FLOAT_NODATA
+import numpy as np
+import arcpy
+import os
+import shutil
+import tempfile
+
+
+NODATA = -9999
+nan = np.nan
+
+# 1 to 25 row by row, the cell holding 12 is NoData
+values = np.arange(1, 26, dtype=np.int32).reshape(5, 5)
+values[2, 1] = NODATA
+
+
+class TestRasterBlocks(TestCase):
+    """
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        path = os.path.join(cls.folder, "blocks.tif")
+        arcpy.NumPyArrayToRaster(values, arcpy.Point(100.0, 200.0), 10.0, 10.0, NODATA).save(path)
+        cls.grid = get_raster_grid(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.folder, ignore_errors=True)
+
+    def reduce(self, method, **kwargs):
+        return block_reduce(self.grid, 2, 2, method, workers=1, **kwargs)[1]
+
+    def assertCells(self, actual, expected):
+        np.testing.assert_allclose(actual, np.array(expected, dtype=np.float64))
+
+    def test_expand_layout(self):
+        layout = block_layout(self.grid, 2, 2)
+        self.assertEqual((layout.out_rows, layout.out_cols, layout.top_pad, layout.left_skip), (3, 3, 1, 0))
+        self.assertEqual((layout.xmin, layout.ymin), (100.0, 200.0))
+
+    def test_truncate_layout(self):
+        layout = block_layout(self.grid, 2, 2, truncate=True)
+        self.assertEqual((layout.out_rows, layout.out_cols, layout.top_pad, layout.left_skip), (2, 2, 0, 1))
+        self.assertEqual((layout.xmin, layout.ymin), (110.0, 210.0))
+
+    def test_truncate_too_small(self):
+        with self.assertRaises(ValueError):
+            block_layout(self.grid, 6, 6, truncate=True)
+
+    def test_expand_sum_data(self):
+        self.assertCells(self.reduce("SUM"),
+                         [[3, 7, 5],
+                          [24, 44, 25],
+                          [76, 84, 45]])
+
+    def test_expand_sum_nodata(self):
+        # blocks holding NoData or padding are NoData, as Aggregate with NODATA
+        self.assertCells(self.reduce("SUM", ignore_nodata=False),
+                         [[nan, nan, nan],
+                          [nan, 44, nan],
+                          [76, 84, nan]])
+
+    def test_edge_blocks_nodata(self):
+        # padding is not NoData, as Block Statistics with NODATA
+        self.assertCells(self.reduce("SUM", ignore_nodata=False, pad_is_nodata=False),
+                         [[3, 7, 5],
+                          [nan, 44, 25],
+                          [76, 84, 45]])
+
+    def test_truncate_sum(self):
+        self.assertCells(self.reduce("SUM", truncate=True),
+                         [[20, 28],
+                          [48, 68]])
+        self.assertCells(self.reduce("SUM", truncate=True, ignore_nodata=False),
+                         [[20, 28],
+                          [nan, 68]])
+
+    def test_methods_skip_nodata(self):
+        # the block of 6, 7, 11 and NoData
+        expected = {"SUM": 24, "MEAN": 8, "MAXIMUM": 11, "MINIMUM": 6, "RANGE": 5, "MEDIAN": 7, "STD": np.sqrt(14 / 3.0)}
+        for method, value in expected.items():
+            self.assertAlmostEqual(self.reduce(method)[1, 0], value, msg=method)
+
+    def test_methods_edge_block(self):
+        # the top right block holds 5 and three padding cells
+        for method, value in {"SUM": 5, "MEAN": 5, "MAXIMUM": 5, "RANGE": 0, "STD": 0}.items():
+            self.assertAlmostEqual(self.reduce(method)[0, 2], value, msg=method)
+
+    def test_workers_agree(self):
+        for method in ["SUM", "MEDIAN", "STD"]:
+            np.testing.assert_array_equal(block_reduce(self.grid, 2, 2, method, workers=1)[1],
+                                          block_reduce(self.grid, 2, 2, method, workers=4)[1])
+
+    def test_output_array(self):
+        arr, ndv = output_array(self.grid, self.reduce("SUM", ignore_nodata=False), "SUM")
+        self.assertEqual((arr.dtype, ndv), (np.int32, INTEGER_NODATA))
+        self.assertEqual(arr[0, 0], INTEGER_NODATA)
+
+        arr, ndv = output_array(self.grid, self.reduce("MEAN", ignore_nodata=False), "MEAN")
+        self.assertEqual((arr.dtype, ndv), (np.float32, FLOAT_NODATA))
+        self.assertEqual(arr[1, 1], 11)
+
+    def test_expand_block_strips(self):
+        layout, res = block_reduce(self.grid, 2, 2, "SUM", ignore_nodata=False, pad_is_nodata=False, workers=1)
+        arr, ndv = output_array(self.grid, res, "SUM")
+
+        n = ndv
+        expected = [[3, 3, 7, 7, 5],
+                    [n, n, 44, 44, 25],
+                    [n, n, 44, 44, 25],
+                    [76, 76, 84, 84, 45],
+                    [76, 76, 84, 84, 45]]
+
+        for rows_per_strip in [1, 2, 3, 5]:
+            strips = list(expand_block_strips(layout, arr, 5, 5, rows_per_strip))
+            self.assertEqual([first for first, _ in strips], range(0, 5, rows_per_strip))
+            np.testing.assert_array_equal(np.vstack([s for _, s in strips]), expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ import collections
 import arcpy
 import base.utils
 from base.decorators import input_output_table, input_tableview, parameter
+from base.extent_index import ExtentIndex, ExtentCache, DISJOINT, relations, box_of
+from base.utils import srs_key
+from os.path import join
 
 tool_settings = {"label": "Compare Extents",
                  "description": "Compare Extents...",
@@ -10,6 +13,10 @@ tool_settings = {"label": "Compare Extents",
                  "category": "Geodata"}
 
 
+def box_string(box, srs_name):
+    return "{0} {1} {2} {3} {4}".format(box[0], box[1], box[2], box[3], srs_name)
+
+
 class CompareExtentsGeodataTool(BaseTool):
     """
     """
@@ -23,14 +30,16 @@ class CompareExtentsGeodataTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.initialise, self.iterate]
-        self.aoi_extent = None
-        self.aoi_srs_name = None
-        self.aoi_extent_string = None
+        self.aoi_list = []
+        self.aoi_strings = {}
+        self.aoi_groups = []  # (spatial reference, ExtentIndex) of the areas of interest in each spatial reference
+        self.extent_cache = None
 
         return
 
     @input_tableview()
-    @parameter("aoi_dataset", "Dataset (Area of Interest) to compare with", ["DEFeatureClass", "DERasterDataset"], "Required", False, "Input", None, None, None, None)
+    @parameter("aoi_dataset", "Datasets (Areas of Interest) to compare with", ["DEFeatureClass", "DERasterDataset"], "Required", True, "Input", None, None, None, None)
+    @parameter("workers", "Number of datasets to compare at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -42,15 +51,31 @@ class CompareExtentsGeodataTool(BaseTool):
         return BaseTool.getParameterInfo(self)
 
     def initialise(self):
-        """
+        """ Index the areas of interest, grouped by spatial reference
+
+        Each dataset is compared with an area of interest in the spatial
+        reference of that area, as with a single area of interest.
 
         Returns:
 
         """
 
-        self.aoi_extent = arcpy.Describe(self.aoi_dataset).extent
-        self.aoi_srs_name = self.aoi_extent.spatialReference.name
-        self.aoi_extent_string = "{0} {1}".format(self.aoi_extent, self.aoi_srs_name)
+        self.aoi_list = [a.strip("'") for a in self.aoi_dataset.split(";") if a]
+        self.extent_cache = ExtentCache(join(self.appdata_path, "extent_cache.json"))
+
+        groups = collections.OrderedDict()  # srs key -> (srs, [(aoi, box)])
+        for aoi in self.aoi_list:
+            extent = arcpy.Describe(aoi).extent
+            srs = extent.spatialReference
+            if srs.name == "Unknown":
+                raise ValueError("Area of interest '{}' has an unknown spatial reference".format(aoi))
+            box = box_of(extent)
+            self.aoi_strings[aoi] = box_string(box, srs.name)
+            groups.setdefault(srs_key(srs), (srs, []))[1].append((aoi, box))
+
+        self.aoi_groups = [(srs, ExtentIndex(boxes)) for srs, boxes in groups.itervalues()]
+        for srs, index in self.aoi_groups:
+            self.info("{} areas of interest indexed in '{}'".format(len(index), srs.name))
 
         return
 
@@ -61,7 +86,14 @@ class CompareExtentsGeodataTool(BaseTool):
 
         """
 
-        self.iterate_function_on_tableview(self.compare, return_to_results=True)
+        try:
+            self.iterate_function_on_tableview(self.compare, return_to_results=True)
+        finally:
+            self.info(self.extent_cache.summary())
+            try:
+                self.extent_cache.save()
+            except Exception as e:
+                self.warn("Extents not saved: {}".format(e))
 
         return
 
@@ -72,41 +104,48 @@ class CompareExtentsGeodataTool(BaseTool):
             data:
 
         Returns:
-
+            OrderedDict: The comparison with a single area of interest, otherwise a list of one per area of interest
         """
 
         ds_in = data["geodata"]
         base.utils.validate_geodata(ds_in, srs_known=True)
 
-        try:
-            ds_extent = arcpy.Describe(ds_in).extent
-        except:
-            raise ValueError("Could not obtain extent from {0}".format(ds_in))
-
-        # default results
-        con = dis = ovr = equ = wit = tch = "Unknown"
-        ds_extent_trx = "Unknown"
-        ds_extent_raw = "{0} {1}".format(ds_extent, ds_extent.spatialReference.name)
-
-        if ds_extent.spatialReference.name != "Unknown":
-            x = ds_extent.projectAs(self.aoi_extent.spatialReference)
-            con = x.contains(self.aoi_extent)
-            dis = x.disjoint(self.aoi_extent)
-            ovr = x.overlaps(self.aoi_extent)
-            equ = x.equals(self.aoi_extent)
-            wit = x.within(self.aoi_extent)
-            tch = x.touches(self.aoi_extent)
-            ds_extent_trx = "{0} {1}".format(x, x.spatialReference.name)
-
-        r = collections.OrderedDict([
-            ("geodata", ds_in),
-            ("extent_aoi", self.aoi_extent_string),
-            ("extent_dataset_raw", ds_extent_raw),
-            ("extent_dataset_trx", ds_extent_trx),
-            ("contains_aoi", con), ("within_aoi", wit),
-            ("disjoint_aoi", dis), ("overlaps_aoi", ovr),
-            ("equals_aoi", equ), ("touches_aoi", tch)])
-
-        # self.info(self.result.add_pass(r))
-
-        return r
+        relations_of = {}  # aoi -> (projected dataset extent string, relations or None if unknown)
+        ds_extent_raw = None
+
+        for srs, index in self.aoi_groups:
+            try:
+                raw, srs_name, box = self.extent_cache.extent(ds_in, srs)
+            except Exception:
+                raise ValueError("Could not obtain extent from {0}".format(ds_in))
+
+            ds_extent_raw = box_string(raw, srs_name)
+            ds_extent_trx = box_string(box, srs.name) if box else "Unknown"
+
+            # exact tests only for the areas of interest the extent meets, the rest are disjoint
+            found = index.query(box) if box else {}
+
+            for aoi in index.keys:
+                relations_of[aoi] = (ds_extent_trx, found.get(aoi, DISJOINT) if box else None)
+
+        results = []
+        for aoi in self.aoi_list:
+            ds_extent_trx, rel = relations_of[aoi]
+            if rel:
+                con, wit, dis, ovr, equ, tch = [rel[k] for k in relations]
+            else:
+                con = dis = ovr = equ = wit = tch = "Unknown"
+
+            r = collections.OrderedDict([("geodata", ds_in)])
+            if len(self.aoi_list) > 1:
+                r["aoi"] = aoi
+            r.update([
+                ("extent_aoi", self.aoi_strings[aoi]),
+                ("extent_dataset_raw", ds_extent_raw),
+                ("extent_dataset_trx", ds_extent_trx),
+                ("contains_aoi", con), ("within_aoi", wit),
+                ("disjoint_aoi", dis), ("overlaps_aoi", ovr),
+                ("equals_aoi", equ), ("touches_aoi", tch)])
+            results.append(r)
+
+        return results if len(results) > 1 else results[0]
@@ -1,9 +1,11 @@
 from base.base_tool import BaseTool
 
 from base.utils import split_up_filename, validate_geodata
-from base.decorators import input_tableview, input_output_table
+from base.decorators import input_tableview, input_output_table, parameter
 import arcpy
-from os.path import exists, join
+import os
+from os.path import dirname, join, exists
+from threading import Lock
 from hermes import Paperwork
 
 
@@ -23,7 +25,12 @@ class AuditMetadataTool(BaseTool):
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
 
+        self.workspaces = {}  # workspace path -> (workspace type, {lower case file name: file name})
+        self.workspace_locks = {}
+        self.workspace_lock = Lock()
+
     @input_tableview()
+    @parameter("workers", "Number of datasets to audit at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -41,10 +48,36 @@ class AuditMetadataTool(BaseTool):
 
         """
 
+        self.workspaces = {}
+        self.workspace_locks = {}
+
         self.iterate_function_on_tableview(self.audit, return_to_results=True)
 
         return
 
+    def workspace_info(self, workspace):
+        """ Return the type and file names of a workspace, looked up once for all its datasets
+
+        Args:
+            workspace (str): Path to the workspace
+
+        Returns:
+            tuple: (workspace type, {lower case file name: file name}), the names only for file system workspaces,
+                the type is None if the path is not a workspace
+        """
+
+        with self.workspace_lock:
+            lock = self.workspace_locks.setdefault(workspace, Lock())
+
+        with lock:  # datasets of other workspaces are not held up
+            info = self.workspaces.get(workspace)
+            if info is None:
+                workspace_type = getattr(arcpy.Describe(workspace), "workspaceType", None)
+                names = {n.lower(): n for n in os.listdir(workspace)} if workspace_type == "FileSystem" else {}
+                info = self.workspaces[workspace] = (workspace_type, names)
+
+        return info
+
     def audit(self, data):
         """
 
@@ -61,32 +94,33 @@ class AuditMetadataTool(BaseTool):
 
         self.info("Auditing {0}".format(geodata))
 
-        desc = arcpy.Describe(geodata)
-        self.info(str(desc))
-
-        pw = Paperwork(dataset=geodata)
-        self.info(str(pw))
+        pw = Paperwork(dataset=geodata, read_only=True)  # an audit does not change the metadata
+        self.debug(str(pw))
 
         meta = pw.convert()
         # meta['metadata']['grid_garage'] = {}
         # meta['metadata']['grid_garage']['metadata_audit'] = {"@date": datetime.now().time(), }
 
-        pw.save(meta)
-
         tip_file = tip = None
         xml_file = xml = None
 
-        workspace_type = arcpy.Describe(desc.path).workspaceType
+        workspace = dirname(geodata)
+        workspace_type, names = self.workspace_info(workspace) if workspace and exists(workspace) else (None, {})
+
+        if workspace_type is None:  # e.g. a layer name, its dataset's workspace
+            workspace = arcpy.Describe(geodata).path
+            workspace_type, names = self.workspace_info(workspace)
 
         if workspace_type == "FileSystem":
             gd_path,  gd_base, gd_name, gd_ext = split_up_filename(geodata)
+            gd_path = workspace
 
-            xml_file = join(gd_path, gd_base + ".xml")
-            if exists(xml_file):
+            # sidecar files are looked up in the workspace listing, not on disk
+            xml_file = names.get((gd_base + ".xml").lower())
+            if xml_file:
+                xml_file = join(gd_path, xml_file)
                 with open(xml_file, "r") as xmlfile:
-                    xml = "".join(line.rstrip() for line in xmlfile)
-            else:
-                xml_file = None
+                    xml = "".join(line.rstrip() for line in xmlfile.read().splitlines())
 
             # html_file = join(gd_path, gd_name + ".html")
             # if exists(html_file):
@@ -101,11 +135,9 @@ class AuditMetadataTool(BaseTool):
             # else:
             #     pdf_file = "{0} does not exist".format(pdf_file)
 
-            tip_file = join(gd_path, gd_name + ".tip")
-            if exists(tip_file):
-                pass
-            else:
-                tip_file = None
+            tip_file = names.get((gd_name + ".tip").lower())
+            if tip_file:
+                tip_file = join(gd_path, tip_file)
         #     # lines = [line.rstrip() for line in open(tip_file)]
         #     # lines = [l.replace(":", "=", 1) for l in lines]
         #     # # lines = ["title={0}".format(l) for l in lines if not ":"]
@@ -1,7 +1,7 @@
 from base.base_tool import BaseTool
-from base.utils import validate_geodata, describe, describe_property_groups
+from base.utils import validate_geodata, describe_attributes, describe_properties
 from base.decorators import input_tableview, input_output_table, parameter
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
 
 tool_settings = {"label": "Create Tips Table",
@@ -9,6 +9,32 @@ tool_settings = {"label": "Create Tips Table",
                  "can_run_background": "False",
                  "category": "Metadata"}
 
+TipToken = namedtuple("TipToken", "field index text")
+
+
+def compile_tip_token(value):
+    """ Parse a '$field:index#text$' tip template value
+
+    Args:
+        value (str): Template value, e.g. '$table_fields:2#.html$'
+
+    Returns:
+        TipToken: Describe attribute, 0-based list index or None, and appended text.
+                  The field is None if the index is not a number.
+    """
+
+    v = value.strip().strip('"').strip("$")     # table_fields:2#.html
+    v = v.split("#")                            # ['table_fields:2', .html]
+    text = v[1] if len(v) > 1 else ""           # .html
+
+    v = v[0].split(":")                         # [table_fields, 2]
+    try:
+        idx = int(v[1]) - 1 if len(v) > 1 else None
+    except ValueError:
+        return TipToken(None, None, text)
+
+    return TipToken(v[0], idx, text)
+
 
 class CreateTipsTableMetadataTool(BaseTool):
     """
@@ -23,6 +49,7 @@ class CreateTipsTableMetadataTool(BaseTool):
         self.base_tips = None
         self.tip_order = []
         self.extractions = None
+        self.describe_fields = []
 
     @input_tableview()
     @parameter("tip_template", "Tip Template", "GPTableView", "Required", False, "Input", None, None, None, None, None)
@@ -67,7 +94,22 @@ class CreateTipsTableMetadataTool(BaseTool):
             code = code.strip().strip('"').strip("'")
             return string.startswith(code) and string.endswith(code)
 
-        self.extractions = {k: v for k, v in self.base_tips.iteritems() if startsnends(v, "$")}
+        known = set(a for v in describe_properties().itervalues() for a in v) | {"geodata"}
+
+        self.extractions = OrderedDict()
+        for k, v in self.base_tips.iteritems():
+            if not startsnends(v, "$"):
+                continue
+            token = compile_tip_token(v)
+            if token.field is None:
+                self.warn("Bad format '{}', use list:index (1-based)".format(v))
+            elif token.field not in known:
+                self.warn("'{}' is not a describe property, tip '{}' will be '{}'".format(token.field, k, token.text))
+                token = token._replace(field=None)
+            self.extractions[k] = token
+
+        self.describe_fields = sorted(set(t.field for t in self.extractions.itervalues() if t.field and t.field != "geodata"))
+
         self.info("Field values extraction from describe will: {}".format(self.extractions))
 
         return
@@ -108,41 +150,23 @@ class CreateTipsTableMetadataTool(BaseTool):
 
         r.update(new_tips)
 
-        all_property_groups = describe_property_groups()
+        # only the attributes the template uses, cached across rows of the same dataset
+        values = describe_attributes(geodata, self.describe_fields) if self.describe_fields else {}
+        values["geodata"] = geodata
 
         fld_tips = {}
-        for k, v in self.extractions.iteritems():   # "$table_fields,2#.html$"
-            v = v.strip().strip('"').strip("$")     # table_fields,2#.html
-            v = v.split("#")                        # ['table_fields,2', .html]
-            text = v[1] if len(v) > 1 else ""       # .html
-
-            v = v[0].split(":")                     # [table_fields, 2]
-            field = v[0]                            # table_fields
-            try:
-                idx = int(v[1])-1 if len(v) > 1 else None      # 2
-            except Exception as e:
-                self.warn("Bad format '{}', use list:index (1-based)".format(v))
-                fld_tips[k] = "{}{}".format("", text)
-                continue
+        for k, t in self.extractions.iteritems():
+            new_val = values[t.field] if t.field else ""
 
-            desc = describe(geodata, comprehensive=True, flatten=all_property_groups)
-            try:
-                new_val = desc[field]
-            except [KeyError, AttributeError] as e:
-                self.warn(": '{}' not in {}".format(field, desc.keys()))
-                fld_tips[k] = "{}{}".format("", text)
-                continue
-
-            if idx:
+            if t.field and t.index is not None:
+                items = "{}".format(new_val).split(",")
                 try:
-                    new_val = new_val.split(",")
-                    new_val = new_val[idx].strip()
-                except IndexError as e:
-                    self.warn("{} out of range {}: {}".format(idx+1, range(1, len(new_val)+1), new_val))
-                    fld_tips[k] = "{}{}".format("", text)
-                    continue
-
-            fld_tips[k] = "{}{}".format(new_val, text)
+                    new_val = items[t.index].strip()
+                except IndexError:
+                    self.warn("{} out of range {}: {}".format(t.index + 1, range(1, len(items) + 1), items))
+                    new_val = ""
+
+            fld_tips[k] = "{}{}".format(new_val, t.text)
 
         self.info("Extracted field values: {}".format(fld_tips))
 
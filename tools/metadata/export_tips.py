@@ -1,6 +1,7 @@
 from base.base_tool import BaseTool
 from base import utils
 from base.decorators import input_tableview, input_output_table, parameter
+from base.tips import write_tips
 from collections import OrderedDict
 
 
@@ -25,6 +26,8 @@ class ExportTipsToFileMetadataTool(BaseTool):
     @input_tableview()
     @parameter("include_fields", "Include Fields", "Field", "Required", True, "Input", None, None, ["geodata_table"], None, None)
     @parameter("tip_folder", "Folder for Tip Files", "DEFolder", "Required", False, "Input", None, None, None, None, None)
+    @parameter("validate", "Validate datasets", "GPBoolean", "Optional", False, "Input", None, None, None, True, "Options")
+    @parameter("workers", "Number of tip files to write at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -42,10 +45,12 @@ class ExportTipsToFileMetadataTool(BaseTool):
 
         """
         nks = [s.strip() for s in self.include_fields.split(";")]
+        self.include_fields = set(nks)
 
         self.info(nks)
 
-        self.iterate_function_on_tableview(self.export, nonkey_names=nks, return_to_results=True)
+        # the order is always needed, whether or not it was picked
+        self.iterate_function_on_tableview(self.export, nonkey_names=nks if "tip_order" in nks else nks + ["tip_order"], return_to_results=True)
 
         return
 
@@ -61,7 +66,8 @@ class ExportTipsToFileMetadataTool(BaseTool):
 
         geodata = data["geodata"]
 
-        utils.validate_geodata(geodata)
+        if self.validate:  # only text is written, the dataset itself is not needed
+            utils.validate_geodata(geodata)
 
         self.info("Creating TIP file for {0}".format(geodata))
 
@@ -77,9 +83,7 @@ class ExportTipsToFileMetadataTool(BaseTool):
 
         tip_file = utils.join_up_filename(self.tip_folder, fbase, ".tip")
 
-        with open(tip_file, "w") as tipfile:
-            for k, v in tip_dic.iteritems():
-                tipfile.write("{0}: {1}\n".format(k, v))
+        write_tips(tip_file, tip_dic)
 
         return {"geodata": geodata, "tip_file": tip_file}
 
@@ -4,8 +4,14 @@ from base.utils import validate_geodata, split_up_filename, join_up_filename
 from base.decorators import input_tableview, input_output_table, parameter
 import arcpy
 from os.path import join, exists
+from threading import Lock, local
 from hermes import Paperwork
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 
 tool_settings = {"label": "Export Metadata",
                  "description": "Exports data source metadata to xml/html",
@@ -17,6 +23,23 @@ install_dir = arcpy.GetInstallInfo("desktop")["InstallDir"]
 # default_translator = join(install_dir, "Metadata", "Translator", "ARCGIS2ISO19139.xml")  # ESRI_ISO2ISO19139.xml")
 default_stylesheet = join(install_dir, "Metadata", "Stylesheets", "ArcGIS.xsl")  # ESRI_ISO2ISO19139.xml")
 
+upgrades = ["ESRIISO_TO_ARCGIS", "FGDC_TO_ARCGIS"]
+
+
+def is_arcgis_format(md):
+    """ Return whether converted metadata is already in the ArcGIS format
+
+    Args:
+        md (dict): Metadata as Paperwork.convert returns it
+
+    Returns:
+        bool:
+    """
+
+    esri = (md.get("metadata") or {}).get("Esri")
+
+    return isinstance(esri, dict) and "ArcGISFormat" in esri
+
 
 class ExportXmlMetadataTool(BaseTool):
     """
@@ -30,10 +53,15 @@ class ExportXmlMetadataTool(BaseTool):
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
 
+        self.upgraded = {}  # dataset -> upgrade used, None if none was needed or none worked
+        self.upgrade_lock = Lock()
+        self.transforms = local()  # the compiled stylesheet of each worker thread
+
     @input_tableview()
     @parameter("xml_folder", "Output Folder", "DEFolder", "Required", False, "Input", None, None, None, None)
     # @parameter("translator", "Translator", "DEFile", "Required", False, "Input", None, None, None, default_translator, None)
     @parameter("stylesheet", "Style Sheet", "DEFile", "Required", False, "Input", None, None, None, default_stylesheet, None)
+    @parameter("workers", "Number of datasets to export at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -57,10 +85,64 @@ class ExportXmlMetadataTool(BaseTool):
         if not exists(self.stylesheet):
             raise ValueError("Stylesheet '{}' does not exist".format(self.stylesheet))
 
+        self.upgraded = {}
+
+        if not self.get_transform():
+            self.info("Stylesheet will be applied by XSLTransform_conversion")
+
         self.iterate_function_on_tableview(self.export, return_to_results=True)
 
         return
 
+    def get_transform(self):
+        """ Return the stylesheet compiled with lxml, once per thread
+
+        Returns:
+            lxml.etree.XSLT: None if lxml is not installed or cannot compile the stylesheet
+        """
+
+        if etree is None:
+            return None
+
+        if not hasattr(self.transforms, "xslt"):
+            try:
+                self.transforms.xslt = etree.XSLT(etree.parse(self.stylesheet))
+            except (etree.XSLTParseError, etree.XMLSyntaxError) as e:
+                self.debug("lxml cannot compile '{}': {}".format(self.stylesheet, e))
+                self.transforms.xslt = None
+
+        return self.transforms.xslt
+
+    def upgrade(self, geodata, pw):
+        """ Upgrade metadata to the ArcGIS format, once per dataset and only if it needs it
+
+        Args:
+            geodata (str): Dataset
+            pw (Paperwork): Read only Paperwork of the dataset
+
+        Returns:
+            Paperwork: Of the upgraded metadata if there was an upgrade
+        """
+
+        with self.upgrade_lock:
+            done = geodata in self.upgraded
+            self.upgraded.setdefault(geodata, None)
+
+        if done or is_arcgis_format(pw.convert()):
+            return pw
+
+        self.info("Attempting metadata upgrade")
+        for u in upgrades:
+            try:
+                arcpy.UpgradeMetadata_conversion(geodata, u)
+                with self.upgrade_lock:
+                    self.upgraded[geodata] = u
+                return Paperwork(dataset=geodata, read_only=True)
+            except Exception as e:
+                self.warn("Upgrade {} failed: {}".format(u, e))
+
+        return pw
+
     def export(self, data):
         """
 
@@ -82,38 +164,34 @@ class ExportXmlMetadataTool(BaseTool):
         xml_file = join_up_filename(self.xml_folder, fname, ".xml")
         html_file = join_up_filename(self.xml_folder, fbase, ".html")
 
-        self.info("Attempting metadata upgrade")
-        try:
-            arcpy.UpgradeMetadata_conversion(geodata, "ESRIISO_TO_ARCGIS")
-        except Exception as e:
-            self.warn("Upgrade ESRIISO_TO_ARCGIS failed: {}".format(e))
-            try:
-                arcpy.UpgradeMetadata_conversion(geodata, "FGDC_TO_ARCGIS")
-            except Exception as e:
-                self.warn("Upgrade FGDC_TO_ARCGIS failed: {}".format(e))
-
         self.info("Creating metadata xml")
+        xml = None
         try:
-            pw = Paperwork(dataset=geodata)
-            md = pw.convert()
-            # pw.save(d=md)
-            pw.exportToXML(self.xml_folder, fbase)
+            pw = self.upgrade(geodata, Paperwork(dataset=geodata, read_only=True))
+            xml = pw.toXML()
+            with open(xml_file, "wb") as f:
+                f.write(xml)
             self.info("XML file '{}' created".format(xml_file))
         except Exception as e:
             xml_file = "Error creating '{}': {}".format(xml_file, e)
             self.warn(xml_file)
 
         self.info("Creating metadata html")
+        transform = self.get_transform()
         try:
-            arcpy.XSLTransform_conversion(xml_file, self.stylesheet, html_file, "#")
+            done = False
+            if transform and xml:
+                try:
+                    transform(etree.fromstring(xml)).write(html_file, method="html", encoding="UTF-8")
+                    done = True
+                except etree.XSLTApplyError as e:
+                    self.debug("lxml cannot apply '{}' to {}, using XSLTransform_conversion: {}".format(self.stylesheet, geodata, e))
+            if not done:  # from the xml file if there is one, otherwise from the dataset
+                arcpy.XSLTransform_conversion(xml_file if xml else geodata, self.stylesheet, html_file, "#")
             self.info("HTML file '{}' created".format(html_file))
-        except:
-            try:
-                arcpy.XSLTransform_conversion(geodata, self.stylesheet, html_file, "#")
-                self.info("HTML file '{}' created".format(html_file))
-            except Exception as e:
-                html_file = "Error creating '{}': {}".format(html_file, e)
-                self.warn(html_file)
+        except Exception as e:
+            html_file = "Error creating '{}': {}".format(html_file, e)
+            self.warn(html_file)
 
         return {"geodata": geodata, "xml_file": xml_file, "html_file": html_file}
 
@@ -1,7 +1,7 @@
 from base.base_tool import BaseTool
 
 import os
-from base.decorators import input_tableview, input_output_table
+from base.decorators import input_tableview, input_output_table, parameter
 import xml.etree.cElementTree as et
 
 tool_settings = {"label": "Get IAR ID From XML",
@@ -9,6 +9,56 @@ tool_settings = {"label": "Get IAR ID From XML",
                  "can_run_background": "False",
                  "category": "Metadata"}
 
+GMD = "{http://www.isotc211.org/2005/gmd}"
+GCO = "{http://www.isotc211.org/2005/gco}"
+
+# element paths of the values read, from gmd:MD_Metadata
+iar_paths = {
+    # 1.	FileID: /gmd:MD_Metadata/gmd:fileIdentifier/gco:CharacterString
+    (GMD + "MD_Metadata", GMD + "fileIdentifier", GCO + "CharacterString"): "file_id",
+    # 2.	Title: /gmd:MD_Metadata/gmd:identificationInfo/gmd:MD_DataIdentification/gmd:citation/gmd:CI_Citation/gmd:title/gco:CharacterString
+    (GMD + "MD_Metadata", GMD + "identificationInfo", GMD + "MD_DataIdentification", GMD + "citation", GMD + "CI_Citation", GMD + "title", GCO + "CharacterString"): "title",
+    # 3.	Dataset location: /gmd:MD_Metadata/gmd:dataSetURI
+    (GMD + "MD_Metadata", GMD + "dataSetURI", GCO + "CharacterString"): "dataset_uri"}
+
+
+def read_iar_values(xmlfile):
+    """ Return the file identifier, title and dataset URI of an ISO 19139 XML file
+
+    The file is parsed as a stream and reading stops as soon as all three
+    are found, elements are cleared as they close.
+
+    Args:
+        xmlfile (str): Path to the XML file
+
+    Returns:
+        dict: 'file_id', 'title' and 'dataset_uri'
+    """
+
+    found = {}
+    path = []
+
+    with open(xmlfile, "rb") as f:
+        for event, elem in et.iterparse(f, events=("start", "end")):
+            if event == "start":
+                path.append(elem.tag)
+                continue
+
+            key = iar_paths.get(tuple(path))
+            if key and key not in found:
+                found[key] = elem.text
+                if len(found) == len(iar_paths):
+                    break
+
+            path.pop()
+            elem.clear()
+
+    missing = sorted(set(iar_paths.values()) - set(found))
+    if missing:
+        raise ValueError("XML file '{}' has no {}".format(xmlfile, ", ".join(missing)))
+
+    return found
+
 
 class GetIARIDFromXmlTool(BaseTool):
     """
@@ -20,8 +70,10 @@ class GetIARIDFromXmlTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
+        self.cache_parameters = []  # unchanged XML files are not read again
 
     @input_tableview(data_type="xml")
+    @parameter("workers", "Number of XML files to read at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -39,7 +91,7 @@ class GetIARIDFromXmlTool(BaseTool):
 
         """
 
-        self.iterate_function_on_parameter(self.get_ids, return_to_results=True)
+        self.iterate_function_on_tableview(self.get_ids, return_to_results=True)
 
         return
 
@@ -58,23 +110,12 @@ class GetIARIDFromXmlTool(BaseTool):
         if not os.path.exists(xmlfile):
             raise ValueError("XML file '{}' does not exist".format(xmlfile))
 
-        self.info("Parsing {0}".format(xmlfile))
+        self.debug("Parsing {0}".format(xmlfile))
 
-        tree = et.parse(xmlfile)
-        root = tree.getroot()
-
-        # 1.	FileID: /gmd:MD_Metadata/gmd:fileIdentifier/gco:CharacterString
-        file_id = root.find('{http://www.isotc211.org/2005/gmd}fileIdentifier').find('{http://www.isotc211.org/2005/gco}CharacterString').text
-
-        # 2.	Title: /gmd:MD_Metadata/gmd:identificationInfo/gmd:MD_DataIdentification/gmd:citation/gmd:CI_Citation/gmd:title/gco:CharacterString
-        title = root.find('{http://www.isotc211.org/2005/gmd}identificationInfo').find('{http://www.isotc211.org/2005/gmd}MD_DataIdentification').find('{http://www.isotc211.org/2005/gmd}citation').find('{http://www.isotc211.org/2005/gmd}CI_Citation').find('{http://www.isotc211.org/2005/gmd}title').find('{http://www.isotc211.org/2005/gco}CharacterString').text
-
-        # 3.	Dataset location: /gmd:MD_Metadata/gmd:dataSetURI
-        ds_uri = root.find('{http://www.isotc211.org/2005/gmd}dataSetURI').find('{http://www.isotc211.org/2005/gco}CharacterString').text
+        values = read_iar_values(xmlfile)
 
         # https://iar.environment.nsw.gov.au/dataset/1BBFF75D-20EB-49F2-8653-FD6E688DDD3C/html
         # https://iar.environment.nsw.gov.au/dataset/7B00ED2AC4-F887-4655-86BA-CD9B24AB4E797D/html
-        html_link = "https://iar.environment.nsw.gov.au/dataset/{0}/html".format(file_id[1:-1])
-
-        return {"xml": xmlfile, "file_id": file_id, "title": title, "dataset_uri": ds_uri, "html_link": html_link}
+        html_link = "https://iar.environment.nsw.gov.au/dataset/{0}/html".format(values["file_id"][1:-1])
 
+        return {"xml": xmlfile, "file_id": values["file_id"], "title": values["title"], "dataset_uri": values["dataset_uri"], "html_link": html_link}
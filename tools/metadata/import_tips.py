@@ -1,8 +1,7 @@
 from base.base_tool import BaseTool
 from base import utils
-from base.decorators import input_tableview, input_output_table
-from collections import OrderedDict
-import os
+from base.decorators import input_tableview, input_output_table, parameter
+from base.tips import TipFolders, read_tips
 
 
 tool_settings = {"label": "Import Tip Files to Table",
@@ -21,8 +20,11 @@ class ImportTipFilesToTableMetadataTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
+        self.tip_folders = TipFolders()
 
     @input_tableview()
+    @parameter("validate", "Validate datasets", "GPBoolean", "Optional", False, "Input", None, None, None, True, "Options")
+    @parameter("workers", "Number of tip files to read at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table()
     def getParameterInfo(self):
         """
@@ -40,6 +42,8 @@ class ImportTipFilesToTableMetadataTool(BaseTool):
 
         """
 
+        self.tip_folders = TipFolders()  # each folder is listed once
+
         self.iterate_function_on_tableview(self.import_tip, return_to_results=True)
 
         return
@@ -55,34 +59,20 @@ class ImportTipFilesToTableMetadataTool(BaseTool):
         """
 
         geodata = data["geodata"]
-        utils.validate_geodata(geodata)
+
+        if self.validate:  # the tip file is found from the path alone
+            utils.validate_geodata(geodata)
 
         fpath, fname, fbase, fext = utils.split_up_filename(geodata)
 
-        tip_file = utils.join_up_filename(fpath, fbase, ".tip")
+        tip_file = self.tip_folders.find(fpath, fbase)
 
-        if not os.path.exists(tip_file):
-            raise ValueError("Tip file '{}' does not exist".format(tip_file))
+        if not tip_file:
+            raise ValueError("Tip file '{}' does not exist".format(utils.join_up_filename(fpath, fbase, ".tip")))
 
         self.info("Parsing {0}".format(tip_file))
 
-        tips = OrderedDict()
-        tips["header"] = ""
-
-        with open(tip_file, "r") as tipfile:
-            buf = "header"
-            for line in tipfile:
-                s = line.strip().encode("ascii").split(":", 1)
-                if len(s) > 1:
-                    s1, s2 = s[0].strip(), s[1].strip()
-                    buf = s1
-                else:
-                    s1 = s[0].strip()
-                    s2 = None
-                if not s2:
-                    tips[buf] += s1.strip()
-                else:
-                    tips[s1] = s2.strip()
+        tips = read_tips(tip_file)
 
         tips["tip_order"] = ",".join(tips.keys())
 
@@ -90,5 +80,3 @@ class ImportTipFilesToTableMetadataTool(BaseTool):
         res.update(tips)
 
         return res
-
-
@@ -2,6 +2,8 @@ from base.base_tool import BaseTool
 
 from base import utils
 from base.decorators import input_tableview, input_output_table, parameter, raster_formats, aggregation_methods, data_nodata, expand_trunc
+from base.raster_io import get_raster_grid, save_array
+from base.raster_blocks import block_reduce, block_methods, output_array, threads_per_row
 from arcpy.sa import Aggregate
 
 
@@ -26,6 +28,8 @@ class AggregateRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
@@ -34,6 +38,7 @@ class AggregateRasterTool(BaseTool):
     @parameter("extent_handling", "Extent Boundary", "GPString", "Optional", False, "Input", expand_trunc, None, None, expand_trunc[0], "Options")
     @parameter("ignore_nodata", "No Data Treatment", "GPString", "Optional", False, "Input", data_nodata, None, None, data_nodata[0], "Options")
     @parameter("raster_format", "Format for output rasters", "GPString", "Required", False, "Input", raster_formats, None, None, raster_formats[0])
+    @parameter("workers", "Number of rasters to process at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table(affixing=True)
     def getParameterInfo(self):
         """
@@ -75,9 +80,22 @@ class AggregateRasterTool(BaseTool):
 
         self.info("Aggregating {} -->> {} ...".format(ras, ras_out))
 
-        out = Aggregate(ras, self.cell_factor, self.aggregation_type, self.extent_handling, self.ignore_nodata)
+        grid = get_raster_grid(ras)
+
+        if grid.band_count != 1 or self.aggregation_type not in block_methods:
+            self.info("Falling back to arcpy.sa.Aggregate")
+            out = Aggregate(ras, self.cell_factor, self.aggregation_type, self.extent_handling, self.ignore_nodata)
+            out.save(ras_out)
+            return {"raster": ras_out, "source_raster": ras}
+
+        f = self.cell_factor
+
+        layout, res = block_reduce(grid, f, f, self.aggregation_type, self.ignore_nodata != "NODATA", self.extent_handling == "TRUNCATE",
+                                   workers=threads_per_row(self.workers))
+
+        arr, ndv = output_array(grid, res, self.aggregation_type)
 
-        out.save(ras_out)
+        save_array(arr, ras_out, layout.xmin, layout.ymin, f * grid.cell_width, f * grid.cell_height, ndv, utils.get_srs(ras, as_object=True))
 
         return {"raster": ras_out, "source_raster": ras}
 
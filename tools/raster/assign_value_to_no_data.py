@@ -25,6 +25,8 @@ class AssignValueToNodataRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
@@ -2,7 +2,9 @@ from base.base_tool import BaseTool
 
 from base.decorators import input_tableview, input_output_table, parameter, stats_type, data_nodata, raster_formats
 from arcpy.sa import BlockStatistics
-from base.utils import validate_geodata, make_table_name
+from base.utils import validate_geodata, make_table_name, get_srs
+from base.raster_io import get_raster_grid, save_array_strips
+from base.raster_blocks import block_reduce, block_methods, output_array, expand_block_strips, parse_neighbourhood, threads_per_row
 
 tool_settings = {"label": "Block Statistics",
                  "description": "Block Statistics...",
@@ -25,6 +27,8 @@ class BlockStatisticsRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
@@ -32,6 +36,7 @@ class BlockStatisticsRasterTool(BaseTool):
     @parameter("statistics_type", "Statistics", "GPString", "Optional", False, "Input", stats_type, None, None, stats_type[0], "Options")
     @parameter("ignore_nodata", "No Data Treatment", "GPString", "Optional", False, "Input", data_nodata, None, None, data_nodata[0], "Options")
     @parameter("raster_format", "Format for output rasters", "GPString", "Required", False, "Input", raster_formats, None, None, raster_formats[0])
+    @parameter("workers", "Number of rasters to process at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table(affixing=True)
     def getParameterInfo(self):
         """
@@ -73,11 +78,28 @@ class BlockStatisticsRasterTool(BaseTool):
 
         self.info("Calculating block statistics on {0}...".format(ras))
 
-        out = BlockStatistics(ras, self.neighbourhood, self.statistics_type, self.ignore_nodata)
+        grid = get_raster_grid(ras)
+
+        block = parse_neighbourhood(self.neighbourhood, grid)
+
+        if not block or grid.band_count != 1 or self.statistics_type not in block_methods:
+            self.info("Falling back to arcpy.sa.BlockStatistics")
+            out = BlockStatistics(ras, self.neighbourhood, self.statistics_type, self.ignore_nodata)
+            self.info("Saving to {0}...".format(ras_out))
+            out.save(ras_out)
+            return {"raster": ras_out, "source_geodata": ras}
+
+        # partial blocks at the top and right edges only hold the cells inside the raster
+        layout, res = block_reduce(grid, block[0], block[1], self.statistics_type, self.ignore_nodata != "NODATA", pad_is_nodata=False,
+                                   workers=threads_per_row(self.workers))
+
+        arr, ndv = output_array(grid, res, self.statistics_type)
 
         self.info("Saving to {0}...".format(ras_out))
 
-        out.save(ras_out)
+        # the output has the source's cells, it is spread and written a strip at a time
+        save_array_strips(expand_block_strips(layout, arr, grid.nrows, grid.ncols), ras_out, grid.nrows, grid.xmin, grid.ymin, grid.cell_width, grid.cell_height,
+                          ndv, get_srs(ras, as_object=True))
 
         return {"raster": ras_out, "source_geodata": ras}
 
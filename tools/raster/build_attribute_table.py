@@ -26,6 +26,8 @@ class BuildAttributeTableRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
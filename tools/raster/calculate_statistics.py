@@ -24,6 +24,7 @@ class CalculateStatisticsRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
+        self.row_validation = ("raster", {"raster": True})
 
         return
 
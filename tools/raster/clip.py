@@ -1,8 +1,10 @@
 from base.base_tool import BaseTool
 
 from base.decorators import input_tableview, input_output_table, parameter, raster_formats
+from base.utils import get_srs, validate_geodata, make_table_name, describe_attributes, srs_key, find_transformation
+from base.extent_index import box_of
+from threading import Lock
 import arcpy
-from base.utils import get_srs, validate_geodata, compare_srs, make_table_name
 
 
 tool_settings = {"label": "Clip",
@@ -10,6 +12,26 @@ tool_settings = {"label": "Clip",
                  "can_run_background": "True",
                  "category": "Raster"}
 
+
+def union_all(shapes):
+    """ Return the union of geometries, unioned in pairs level by level
+
+    A running union grows with every shape, pairing them as a balanced
+    tree keeps each union small.
+
+    Args:
+        shapes (list): Geometries
+
+    Returns:
+        arcpy.Geometry:
+    """
+
+    while len(shapes) > 1:
+        shapes = [shapes[i].union(shapes[i + 1]) if i + 1 < len(shapes) else shapes[i] for i in range(0, len(shapes), 2)]
+
+    return shapes[0]
+
+
 # """ MAINTAIN_EXTENT - Adjust the number of columns and rows, then resample pixels so as to exactly match the clipping extent specified.
 #     NO_MAINTAIN_EXTENT - Maintain the cell alignment as the input raster and adjust the output extent accordingly."""
 
@@ -26,8 +48,13 @@ class ClipRasterTool(BaseTool):
         """
 
         BaseTool.__init__(self, tool_settings)
-        self.execution_list = [self.iterate]
+        self.execution_list = [self.initialise, self.iterate]
+        self.row_validation = ("raster", {"raster": True, "srs_known": True})
         self.polygon_srs = None
+        self.clip_geometry = None
+        self.clip_box = None
+        self.projected = {}  # raster srs key -> (clip geometry, clip box) in that srs
+        self.projected_lock = Lock()
 
         return
 
@@ -38,6 +65,7 @@ class ClipRasterTool(BaseTool):
     @parameter("no_data_val", "Value for 'NoData'", "GPString", "Optional", False, "Input", None, "nodata", None, None, "Options")
     @parameter("maintain_extent", "Maintain clipping extent", "GPString", "Optional", False, "Input", ["MAINTAIN_EXTENT", "NO_MAINTAIN_EXTENT"], None, None, None, "Options")
     @parameter("raster_format", "Format for output rasters", "GPString", "Required", False, "Input", raster_formats, None, None, None)
+    @parameter("workers", "Number of rasters to clip at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table(affixing=True)
     def getParameterInfo(self):
         """
@@ -48,8 +76,11 @@ class ClipRasterTool(BaseTool):
 
         return BaseTool.getParameterInfo(self)
 
-    def iterate(self):
-        """
+    def initialise(self):
+        """ Prepare the clip geometry once for all rasters
+
+        The polygons are read and dissolved into one geometry here, and
+        projected into each raster spatial reference when first needed.
 
         Returns:
 
@@ -57,15 +88,73 @@ class ClipRasterTool(BaseTool):
 
         if self.clipping_geometry:
             self.clipping_geometry = "ClippingGeometry"
-            self.polygon_srs = get_srs(self.polygons, raise_unknown_error=True) if self.polygons != "#" else None
+            self.polygon_srs = get_srs(self.polygons, raise_unknown_error=True, as_object=True) if self.polygons != "#" else None
         else:
             self.clipping_geometry = "NONE"
             self.polygons = "#"
 
+        if self.polygons != "#":
+            shapes = [row[0] for row in arcpy.da.SearchCursor(self.polygons, ["SHAPE@"]) if row[0]]
+            if not shapes:
+                raise ValueError("'{}' has no polygons to clip by".format(self.polygons))
+            self.clip_geometry = union_all(shapes)
+            self.info("{} polygons dissolved for clipping".format(len(shapes)))
+        else:
+            try:
+                self.clip_box = tuple(float(v) for v in str(self.rectangle).split()[:4])
+            except (ValueError, TypeError):
+                self.clip_box = None  # no quick extent tests
+
+        return
+
+    def iterate(self):
+        """
+
+        Returns:
+
+        """
+
         self.iterate_function_on_tableview(self.clip, return_to_results=True)
 
         return
 
+    def clip_for(self, ras_srs):
+        """ Return the clip geometry and its box in a raster spatial reference
+
+        Args:
+            ras_srs (arcpy.SpatialReference): Spatial reference of the raster
+
+        Returns:
+            tuple: (geometry or None, (xmin, ymin, xmax, ymax) or None)
+        """
+
+        if self.clip_geometry is None:
+            return None, self.clip_box
+
+        key = srs_key(ras_srs)
+
+        with self.projected_lock:
+            clip = self.projected.get(key)
+
+        if clip is None:
+            if srs_key(self.polygon_srs) == key:
+                geometry = self.clip_geometry
+            else:
+                try:  # across datums the clip must be transformed, or it is shifted
+                    tx = find_transformation(self.polygon_srs, ras_srs)
+                    geometry = self.clip_geometry.projectAs(ras_srs) if tx == "#" else self.clip_geometry.projectAs(ras_srs, tx)
+                    self.info("Clip geometry projected to '{0}' with transformation '{1}'".format(ras_srs.name, tx))
+                except ValueError as e:
+                    geometry = e  # the same for every raster in this spatial reference
+            clip = (geometry, None) if isinstance(geometry, ValueError) else (geometry, box_of(geometry.extent))
+            with self.projected_lock:
+                self.projected[key] = clip
+
+        if isinstance(clip[0], ValueError):
+            raise ValueError("The clip geometry can not be projected to '{0}': {1}".format(ras_srs.name, clip[0]))
+
+        return clip
+
     def clip(self, data):
         """
 
@@ -78,20 +167,36 @@ class ClipRasterTool(BaseTool):
 
         ras = data["raster"]
         validate_geodata(ras, raster=True, srs_known=True)
-        ras_srs = get_srs(ras, raise_unknown_error=True)
-        self.debug("raster srs = {}".format(ras_srs))
+        ras_srs = get_srs(ras, raise_unknown_error=True, as_object=True)
+        self.debug("raster srs = {}".format(ras_srs.name))
 
-        if self.polygons != "#":
-            compare_srs(ras_srs, self.polygon_srs, raise_no_match_error=True, other_condition=(self.clipping_geometry != "NONE"))
+        geometry, box = self.clip_for(ras_srs)
 
         ws = self.output_file_workspace or self.output_workspace
 
         ras_out = make_table_name(ras, ws, self.raster_format, self.output_filename_prefix, self. output_filename_suffix)
 
+        # quick extent tests, rasters outside the clip are skipped and rasters inside it copied
+        if box:
+            e = describe_attributes(ras, ["extent"])["extent"]
+            if e.XMax < box[0] or box[2] < e.XMin or e.YMax < box[1] or box[3] < e.YMin:
+                self.info("Skipping {0}, outside the clip extent {1}".format(ras, " ".join(str(v) for v in box)), extra={"outcome": "skipped"})
+                return {"raster": None, "source_geodata": ras, "method": "skipped"}
+
+            inside = box[0] <= e.XMin and box[1] <= e.YMin and e.XMax <= box[2] and e.YMax <= box[3]
+            if inside and geometry is not None and self.clipping_geometry != "NONE":
+                inside = geometry.contains(e.polygon)
+
+            if inside and self.maintain_extent != "MAINTAIN_EXTENT":
+                self.info("Copying {0}, inside the clip extent -->> {1} ...".format(ras, ras_out))
+                arcpy.CopyRaster_management(ras, ras_out, nodata_value=self.no_data_val)
+                return {"raster": ras_out, "source_geodata": ras, "method": "copied"}
+
         self.info("Clipping {0} -->> {1} ...".format(ras, ras_out))
-        arcpy.Clip_management(ras, self.rectangle, ras_out, self.polygons, self.no_data_val, self.clipping_geometry, self.maintain_extent)
+        template = geometry if geometry is not None else self.polygons
+        arcpy.Clip_management(ras, self.rectangle, ras_out, template, self.no_data_val, self.clipping_geometry, self.maintain_extent)
 
-        return {"raster": ras_out, "source_geodata": ras}
+        return {"raster": ras_out, "source_geodata": ras, "method": "clipped"}
 
 # import arcpy
 # arcpy.Clip_management(
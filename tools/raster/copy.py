@@ -34,6 +34,8 @@ class CopyRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
@@ -23,6 +23,7 @@ class ExtractValuesToPointsRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.initialise, self.iterate]
+        self.row_validation = ("raster", {"raster": True, "srs_known": True})
         self.point_rows = None
         self.points_srs = None
         self.result_dict = {}
@@ -25,6 +25,7 @@ class LookupByTableRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
+        self.row_validation = ("raster", {"raster": True})
 
         return
 
@@ -24,6 +24,8 @@ class ReclassByTableRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         self.from_value_field = None
         self.to_value_field = None
         self.output_value_field = None
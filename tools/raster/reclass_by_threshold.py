@@ -26,6 +26,8 @@ class ReclassByThresholdRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster", other_fields="thresholds Thresholds Required thresholds")
@@ -1,7 +1,8 @@
 from base.base_tool import BaseTool
 
-from base.utils import raster_formats, resample_methods, validate_geodata, make_table_name, get_transformation
+from base.utils import raster_formats, resample_methods, validate_geodata, make_table_name, TransformationResolver
 from base.decorators import input_tableview, input_output_table, parameter
+from os.path import join
 import arcpy
 
 tool_settings = {"label": "Reproject",
@@ -22,6 +23,9 @@ class ReprojectRasterTool(BaseTool):
         """
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.initialise, self.iterate]
+        self.transformations = None
+        self.row_validation = ("raster", {"raster": True, "srs_known": True})
+        self.cache_parameters = ["output_cs", "cell_size", "resample_type", "rego_point", "overrides", "raster_format"]
 
         return
 
@@ -52,15 +56,18 @@ class ReprojectRasterTool(BaseTool):
         self.output_cs = self.parameters[2].value  # need the object for later code to work
         self.cell_size = str(self.cell_size)  # this seemed to solve an issue with unicode... strange
 
-        if self.overrides != "#":
+        if self.overrides and self.overrides != "#":
             try:
                 self.overrides = self.overrides.replace(" ", "").split(",")  # now a list "a:b, c:d, ..."
-                self.overrides = {k: v for k, v in (override.split(",") for override in self.overrides)}   #if self.overrides else {"none": None}  # now a dict {a:b, c:d, ...}
+                self.overrides = {k: v for k, v in (override.split(":") for override in self.overrides)}  # now a dict {a:b, c:d, ...}
             except:
                 raise ValueError("There is a problem with specified overrides. should be something like 'a:b, c:d,...'")
 
         self.info(["Transformation overrides: {0}".format(self.overrides), "Output CS: {0}".format(self.output_cs.name)])
 
+        # one transformation per source spatial reference, remembered between runs
+        self.transformations = TransformationResolver(self.output_cs, self.overrides, join(self.appdata_path, "transformations.json"))
+
         return
 
     def iterate(self):
@@ -70,7 +77,14 @@ class ReprojectRasterTool(BaseTool):
 
         """
 
-        self.iterate_function_on_tableview(self.reproject, return_to_results=True)
+        try:
+            self.iterate_function_on_tableview(self.reproject, return_to_results=True)
+        finally:
+            self.info(["Transformations by source spatial reference:"] + self.transformations.summary())
+            try:
+                self.transformations.save()
+            except Exception as e:
+                self.warn("Transformations not saved: {}".format(e))
 
         return
 
@@ -92,7 +106,7 @@ class ReprojectRasterTool(BaseTool):
 
         r_out = make_table_name(r_in, ws, self.raster_format, self.output_filename_prefix, self.output_filename_suffix)
 
-        tx = get_transformation(r_in, self.output_cs, self.overrides)
+        tx = self.transformations.resolve(r_in)
 
         self.info("Projecting {0} into {1} -> {2}".format(r_in, self.output_cs.name, r_out))
 
@@ -25,6 +25,9 @@ class ResampleRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+        self.cache_parameters = ["resample_type", "cell_size", "raster_format"]
+
         return
 
     @input_tableview(data_type="raster")
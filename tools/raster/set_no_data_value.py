@@ -1,7 +1,11 @@
 from base.base_tool import BaseTool
 from base import utils
 from base.decorators import input_tableview, input_output_table, parameter, raster_formats
+from os.path import splitext, exists
+from os import remove
 import arcpy
+import numpy as np
+import re
 
 
 tool_settings = {"label": "Set NoData Value",
@@ -9,6 +13,189 @@ tool_settings = {"label": "Set NoData Value",
                  "can_run_background": "True",
                  "category": "Raster"}
 
+native_formats = ["BIL", "BSQ", "BIP"]  # band interleaved formats, described by a text .hdr file
+
+_header_nodata = re.compile(r"^\s*(NODATA|NODATA_VALUE)\s+(\S+)", re.IGNORECASE)
+_aux_nodata = re.compile(r"<NoDataValue[^>]*>[^<]*</NoDataValue>")
+_aux_statistics = re.compile(r"\s*(<Histograms>.*?</Histograms>|<MDI key=\"STATISTICS_[^\"]*\">[^<]*</MDI>)", re.DOTALL)
+
+
+def pixel_range(pixel_type):
+    """ Return the smallest and largest values of an integer pixel type
+
+    Args:
+        pixel_type (str): Describe pixelType, e.g. 'U8'
+
+    Returns:
+        tuple: (minimum, maximum), None for other pixel types
+    """
+
+    if not pixel_type or pixel_type[0] not in "US" or not pixel_type[1:].isdigit():
+        return None
+
+    bits = int(pixel_type[1:])
+
+    return (0, 2 ** bits - 1) if pixel_type[0] == "U" else (-2 ** (bits - 1), 2 ** (bits - 1) - 1)
+
+
+def nodata_for(ndv, is_integer, pixel_type=None):
+    """ Return a NoData value as the raster's pixels hold it
+
+    Args:
+        ndv (float): NoData value
+        is_integer (bool): Whether the raster holds integers
+        pixel_type (str): Describe pixelType, integer values must fit it
+
+    Returns:
+        int or float:
+    """
+
+    if not is_integer:
+        return float(ndv)
+
+    if float(ndv) != int(ndv):
+        raise ValueError("NoData value {} is not a whole number, the raster holds integers".format(ndv))
+
+    limits = pixel_range(pixel_type)
+    if limits and not limits[0] <= int(ndv) <= limits[1]:
+        raise ValueError("NoData value {} does not fit pixel type {}, which holds {} to {}".format(int(ndv), pixel_type, limits[0], limits[1]))
+
+    return int(ndv)
+
+
+def nodata_text(ndv):
+    """ Return a NoData value as written to a header, floats with all their digits
+
+    Args:
+        ndv (int or float): NoData value
+
+    Returns:
+        str:
+    """
+
+    return repr(ndv) if isinstance(ndv, float) else str(ndv)
+
+
+def same_nodata(a, b, pixel_type):
+    """ Return whether two NoData values are the same at a raster's precision
+
+    Args:
+        a: NoData value, number or text
+        b: NoData value, number or text
+        pixel_type (str): Describe pixelType, e.g. 'F32'
+
+    Returns:
+        bool:
+    """
+
+    if a is None or b is None:
+        return False
+
+    dtype = np.float32 if pixel_type == "F32" else np.float64
+
+    return dtype(float(a)) == dtype(float(b))
+
+
+def header_file(raster):
+    """ Return the .hdr file of a band interleaved raster """
+
+    return splitext(raster)[0] + ".hdr"
+
+
+def read_header_nodata(hdr):
+    """ Return the NoData value of a .hdr file
+
+    Args:
+        hdr (str): Header file path
+
+    Returns:
+        str: The value as written, None if there is none
+    """
+
+    with open(hdr) as f:
+        for line in f:
+            m = _header_nodata.match(line)
+            if m:
+                return m.group(2)
+
+    return None
+
+
+def write_header_nodata(hdr, ndv):
+    """ Set the NoData value of a .hdr file, and of its raster's .aux.xml if that has one
+
+    The header applies one NoData value to all bands. Each file is read
+    and written once.
+
+    Args:
+        hdr (str): Header file path
+        ndv (int or float): NoData value
+
+    Returns:
+        str: The previous value, None if there was none
+    """
+
+    with open(hdr) as f:
+        lines = f.read().splitlines()
+
+    previous = None
+    out = []
+    for line in lines:
+        m = _header_nodata.match(line)
+        if not m:
+            out.append(line)
+        elif previous is None:
+            previous = m.group(2)
+            out.append("{0} {1}".format(m.group(1), nodata_text(ndv)))
+
+    if previous is None:
+        out.append("NODATA {}".format(nodata_text(ndv)))
+
+    with open(hdr, "w") as f:
+        f.write("\n".join(out) + "\n")
+
+    return previous
+
+
+def write_aux_nodata(aux, ndv):
+    """ Set the band NoData values of an .aux.xml file that holds them, removing its statistics
+
+    Statistics and histograms were computed without the cells of the old
+    NoData value, they are removed so they are computed again.
+
+    Args:
+        aux (str): .aux.xml file path
+        ndv (int or float): NoData value
+
+    Returns:
+        bool: Whether the file held statistics
+    """
+
+    with open(aux) as f:
+        text = f.read()
+
+    text, n = _aux_nodata.subn("<NoDataValue>{}</NoDataValue>".format(nodata_text(ndv)), text)
+    text, stats = _aux_statistics.subn("", text)
+
+    if n or stats:
+        with open(aux, "w") as f:
+            f.write(text)
+
+    return bool(stats)
+
+
+def pyramid_files(raster):
+    """ Return the existing pyramid files of a raster
+
+    Args:
+        raster (str): Raster path
+
+    Returns:
+        list: .ovr file paths
+    """
+
+    return [f for f in [raster + ".ovr", splitext(raster)[0] + ".ovr"] if exists(f)]
+
 
 class SetNodataValueRasterTool(BaseTool):
     """
@@ -25,10 +212,13 @@ class SetNodataValueRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
     @parameter("ndv", "NoData Value", "GPDouble", "Required", False, "Input", None, None, None, None)
+    @parameter("workers", "Number of rasters to update at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table(affixing=False, out_file_workspace=False)
     def getParameterInfo(self):
         """
@@ -51,7 +241,12 @@ class SetNodataValueRasterTool(BaseTool):
         return
 
     def set_ndv(self, data):
-        """
+        """ Set the NoData value of all bands of a raster, in place
+
+        Band interleaved rasters have their .hdr edited directly, and lose
+        the statistics and pyramids made with the old value. Others get one
+        SetRasterProperties call for all bands. The result is checked with
+        one read.
 
         Args:
             data:
@@ -67,20 +262,41 @@ class SetNodataValueRasterTool(BaseTool):
         # should we, in the future, make a copy of data rather than in-situ changes... an option...?
         # out_ras = utils.make_raster_name(in_ras, self.output_file_workspace, self.raster_format, self.output_filename_prefix, self.output_filename_suffix)
 
-        ndv = int(self.ndv)
-        bands = [1]  # at another time this can be updated to accommodate multi-band data
-
-        ndvs = [[str(b), ndv] for b in bands]
-
-        r = arcpy.Raster(in_ras)
-        self.info("NDV on {0} is {1}".format(in_ras, r.noDataValue))
-        del r
-
-        self.info("Setting NDV {0} on {1}".format(ndv, in_ras))
-        arcpy.SetRasterProperties_management(in_raster=in_ras, nodata=ndvs)
-
-        r = arcpy.Raster(in_ras)
-        self.info("NDV is now {0}".format(r.noDataValue))
-        del r
-
-        return {"raster": in_ras, "source_geodata": in_ras}
+        d = utils.describe_attributes(in_ras, ["bandCount", "format", "isInteger", "pixelType"])
+
+        bands = d["bandCount"] if isinstance(d["bandCount"], int) else 1
+        if isinstance(d["isInteger"], bool):
+            is_integer = d["isInteger"]
+        elif d["pixelType"] != "N/A":
+            is_integer = d["pixelType"][0] in "US"
+        else:
+            is_integer = float(self.ndv).is_integer()
+
+        ndv = nodata_for(self.ndv, is_integer, d["pixelType"])
+
+        hdr = header_file(in_ras)
+
+        if d["format"] in native_formats and exists(hdr):
+            previous = write_header_nodata(hdr, ndv)
+            if exists(in_ras + ".aux.xml") and write_aux_nodata(in_ras + ".aux.xml", ndv):
+                self.info("Statistics of {} removed, they counted the old NoData value".format(in_ras))
+            for ovr in pyramid_files(in_ras):
+                remove(ovr)
+                self.info("Pyramids {} removed, they were built with the old NoData value".format(ovr))
+            self.info("NDV on {0} was {1}, header set to {2}".format(in_ras, previous, ndv))
+            method = "header"
+            now = read_header_nodata(hdr)
+        else:
+            self.info("Setting NDV {0} on {1} bands of {2}".format(ndv, bands, in_ras))
+            arcpy.SetRasterProperties_management(in_raster=in_ras, nodata=[[str(b), ndv] for b in range(1, bands + 1)])
+            method = "SetRasterProperties"
+            r = arcpy.Raster(in_ras)
+            now = r.noDataValue
+            del r
+
+        utils.forget_geodata(in_ras)
+
+        if not same_nodata(now, ndv, d["pixelType"]):
+            raise ValueError("NDV on {0} is {1} after setting {2}".format(in_ras, now, ndv))
+
+        return {"raster": in_ras, "source_geodata": in_ras, "bands": bands, "nodata": ndv, "method": method}
@@ -2,7 +2,9 @@ from base.base_tool import BaseTool
 
 from base import utils
 from base.decorators import input_tableview, input_output_table, parameter, data_nodata, raster_formats
-import arcpy
+from base.raster_io import get_raster_grid
+from base.raster_stats import slice_breaks
+from arcpy.sa import Reclassify, RemapRange
 
 tool_settings = {"label": "Slice",
                  "description": "Slice raster",
@@ -25,6 +27,8 @@ class SliceRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
@@ -79,8 +83,18 @@ class SliceRasterTool(BaseTool):
 
         self.info("Slicing {0} -->> {1}...".format(ras, ras_out))
 
-        arcpy.Slice_3d(ras, ras_out, self.num_zones, self.slice_type, self.base_output_zone)
+        # breaks come from a streaming histogram, the raster is never sorted
+        lower, breaks = slice_breaks(get_raster_grid(ras), self.num_zones, self.slice_type)
+
+        self.info("Class breaks are {}".format(breaks))
+
+        remap = []
+        for zone, upper in enumerate(breaks, start=self.base_output_zone):
+            remap.append([lower, upper, zone])
+            lower = upper
+
+        out = Reclassify(ras, "VALUE", RemapRange(remap), "NODATA")
 
-        return {"raster": ras_out, "source_geodata": ras}
+        out.save(ras_out)
 
-#  Slice_3d (in_raster, out_raster, number_zones, {slice_type}, {base_output_zone})
+        return {"raster": ras_out, "source_geodata": ras, "slice_type": self.slice_type, "breaks": ",".join(str(b) for b in breaks)}
@@ -2,7 +2,7 @@ from base.base_tool import BaseTool
 
 from base import utils
 from base.decorators import input_tableview, input_output_table, parameter, raster_formats, pixel_type, raster_formats2
-import arcpy
+from base.raster_io import raster_to_ascii
 
 
 tool_settings = {"label": "To ASCII",
@@ -26,9 +26,14 @@ class ToAsciiRasterTool(BaseTool):
 
         self.execution_list = [self.iterate]
 
+        self.row_validation = ("raster", {"raster": True})
+
         return
 
     @input_tableview(data_type="raster")
+    @parameter("compress", "Compress output (gzip)", "GPBoolean", "Optional", False, "Input", None, None, None, None, "Options")
+    @parameter("precision", "Significant digits for floating point values", "GPLong", "Optional", False, "Input", ["Range", 1, 17], None, None, 9, "Options")
+    @parameter("workers", "Number of rasters to export at once", "GPLong", "Optional", False, "Input", ["Range", 1, 32], None, None, 1, "Options")
     @input_output_table(affixing=True)
     def getParameterInfo(self):
         """
@@ -72,9 +77,12 @@ class ToAsciiRasterTool(BaseTool):
         if ras_out[-4:] == "_asc":
             ras_out = ras_out[:-4] + ".asc"
 
+        if self.compress:
+            ras_out += ".gz"
+
         self.info("Converting {0} -->> {1} ...".format(ras, ras_out))
 
-        arcpy.RasterToASCII_conversion(ras, ras_out)
+        raster_to_ascii(ras, ras_out, compress=self.compress, precision=self.precision or 9)
 
         return {"raster": ras_out, "source_geodata": ras}
 
@@ -23,6 +23,8 @@ class TransformRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.iterate]
+        self.row_validation = ("raster", {"raster": True})
+        self.cache_parameters = ["method", "max_stretch", "min_stretch", "raster_format"]
 
         return
 
@@ -23,6 +23,7 @@ class TweakValuesRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.initialise, self.iterate]
+        self.row_validation = ("raster", {"raster": True})
 
         return
 
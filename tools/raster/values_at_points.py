@@ -25,6 +25,7 @@ class ValuesAtPointsRasterTool(BaseTool):
 
         BaseTool.__init__(self, tool_settings)
         self.execution_list = [self.initialise, self.iterate, self.finish]
+        self.row_validation = ("raster", {"raster": True, "srs_known": True})
         self.point_rows = None
         self.points_srs = None
         self.result_dict = {}
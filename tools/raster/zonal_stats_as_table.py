@@ -2,7 +2,15 @@ from base.base_tool import BaseTool
 
 from base.decorators import input_tableview, input_output_table, parameter
 import arcpy
-from base.utils import validate_geodata, make_table_name, stats_type
+from base.utils import validate_geodata, make_table_name, stats_type, file_fingerprint, split_up_filename, DoesNotExistError
+from base.raster_io import get_raster_grid, is_integer_grid
+from base.raster_stats import zonal_accumulate, zonal_statistics, zonal_value_statistics, ZONE_NODATA
+from collections import OrderedDict
+from hashlib import sha1
+from os.path import join, exists, splitext, getsize, getmtime
+from os import makedirs, remove, listdir, utime
+import numpy as np
+import csv
 
 
 tool_settings = {"label": "Zonal Statistics As Table",
@@ -10,6 +18,15 @@ tool_settings = {"label": "Zonal Statistics As Table",
                  "can_run_background": "True",
                  "category": "Raster"}
 
+# statistics that are not grouped reductions on their own, these are left to arcpy.sa
+# 'ALL' gives them from counts of each value in each zone, for integer rasters as arcpy does
+arcpy_only_statistics = ["MAJORITY", "MEDIAN", "VARIETY"]
+
+MAX_ZONE_CACHE_BYTES = 2 * 1024 ** 3  # zone grids kept on disk, least recently used removed beyond this
+
+statistics_columns = {"ALL": zonal_statistics, "MEAN": ["MEAN"], "MAXIMUM": ["MAX"], "MINIMUM": ["MIN"],
+                      "RANGE": ["RANGE"], "STD": ["STD"], "SUM": ["SUM"]}
+
 
 class ZonalStatisticsAsTableTool(BaseTool):
     """
@@ -23,8 +40,15 @@ class ZonalStatisticsAsTableTool(BaseTool):
         """
 
         BaseTool.__init__(self, tool_settings)
-        self.execution_list = [self.iterate]
-        self.polygon_srs = None
+        self.execution_list = [self.initialise, self.iterate, self.write_zonal_table]
+        self.row_validation = ("raster", {"raster": True})
+        self.zone_cache_path = join(self.appdata_path, "zone_cache")
+        self.zone_arrays = {}
+        self.zone_source = None
+        self.zonal_columns = OrderedDict()
+        self.zonal_rows = {}
+        self.zonal_csv = None
+        self.zonal_table = None
 
         return
 
@@ -43,6 +67,36 @@ class ZonalStatisticsAsTableTool(BaseTool):
 
         return BaseTool.getParameterInfo(self)
 
+    def initialise(self):
+        """
+
+        Returns:
+
+        """
+
+        if self.statistics_type in arcpy_only_statistics:
+            self.info("Statistic '{}' is not a grouped reduction, arcpy.sa.ZonalStatisticsAsTable will be used".format(self.statistics_type))
+            return
+
+        if not exists(self.zone_cache_path):
+            makedirs(self.zone_cache_path)
+
+        self.zone_source = self.zone_source_key()
+        if self.zone_source is None:
+            self.info("Zone grids of '{}' will not be cached between runs".format(self.zones))
+
+        zonal_name = self.result.pass_table_name + "_ZONAL"
+        self.zonal_csv = join(split_up_filename(self.result.pass_csv)[0], zonal_name + ".csv")
+
+        if self.result.output_workspace_type == "LocalDatabase":
+            self.zonal_table = join(self.result.output_workspace, zonal_name)
+        else:
+            self.zonal_table = self.zonal_csv
+
+        self.info("Zonal statistics of all rasters will be merged into '{}'".format(self.zonal_table))
+
+        return
+
     def iterate(self):
         """
 
@@ -50,10 +104,136 @@ class ZonalStatisticsAsTableTool(BaseTool):
 
         """
 
-        self.iterate_function_on_tableview(self.calc, return_to_results=True)
+        func = self.calc_arcpy if self.statistics_type in arcpy_only_statistics else self.calc
+
+        self.iterate_function_on_tableview(func, return_to_results=True)
+
+        return
+
+    def zone_source_key(self):
+        """ Return what identifies the zones, for keys of cached zone grids
+
+        Layers are identified by their dataset, definition query and
+        selection. Shapefiles include their .dbf, which holds the zone field.
+
+        Returns:
+            tuple: None if the zones can not be fingerprinted, zone grids are then not cached on disk
+        """
+
+        desc = arcpy.Describe(self.zones)
+        source = getattr(desc, "catalogPath", None) or self.zones
+
+        try:
+            stamp = [file_fingerprint(source)[1:]]
+            dbf = splitext(source)[0] + ".dbf"
+            if source.lower().endswith(".shp") and exists(dbf):
+                stamp.append(file_fingerprint(dbf)[1:])
+        except (DoesNotExistError, OSError):
+            return None
+
+        return source, stamp, getattr(desc, "whereClause", None), getattr(desc, "FIDSet", None)
+
+    def trim_zone_cache(self, keep):
+        """ Remove the least recently used zone grids beyond the size limit
+
+        Args:
+            keep (str): Path of the zone grid in use, never removed
+
+        Returns:
+
+        """
+
+        grids = []
+        for f in listdir(self.zone_cache_path):
+            if f.endswith(".npy"):
+                path = join(self.zone_cache_path, f)
+                grids.append((getmtime(path), getsize(path), path))
+
+        total = sum(size for _, size, _ in grids)
+
+        for _, size, path in sorted(grids):
+            if total <= MAX_ZONE_CACHE_BYTES:
+                break
+            if path == keep:
+                continue
+            try:
+                remove(path)
+                total -= size
+            except OSError:
+                pass  # in use, e.g. memory mapped by another run
 
         return
 
+    def get_zone_array(self, grid):
+        """ Return the zone ids rasterised on the grid of a raster
+
+        Zones are rasterised once per snap grid, the array is cached on disk
+        (keyed by the zone dataset, its modification, definition query and
+        selection, and the grid) so later runs over rasters on the same grid
+        can memory map it directly.
+
+        Args:
+            grid (RasterGrid): Grid properties of the value raster
+
+        Returns:
+            numpy.ndarray: Zone ids, ZONE_NODATA outside every zone
+        """
+
+        srs = arcpy.Describe(grid.raster).spatialReference
+
+        key = sha1(repr((self.zone_source or self.zones, self.zone_field,
+                         grid.ncols, grid.nrows, grid.xmin, grid.ymin, grid.cell_width, grid.cell_height,
+                         srs.exportToString()))).hexdigest()
+
+        if key in self.zone_arrays:
+            return self.zone_arrays[key]
+
+        npy = join(self.zone_cache_path, key + ".npy")
+
+        if self.zone_source and exists(npy):
+            self.info("Using cached zone grid '{}'".format(npy))
+            utime(npy, None)  # recently used
+
+        else:
+            self.info("Rasterising zones '{}' on the grid of '{}'".format(self.zones, grid.raster))
+
+            tmp = r"in_memory\zone_grid"
+            env_keys = ["extent", "snapRaster", "cellSize", "outputCoordinateSystem"]
+            env_old = {k: getattr(arcpy.env, k) for k in env_keys}
+
+            try:
+                arcpy.env.extent = grid.raster
+                arcpy.env.snapRaster = grid.raster
+                arcpy.env.cellSize = grid.raster
+                arcpy.env.outputCoordinateSystem = srs
+
+                if arcpy.Describe(self.zones).dataType in ["RasterDataset", "RasterLayer"]:
+                    arcpy.sa.Lookup(self.zones, self.zone_field).save(tmp)
+                else:
+                    arcpy.PolygonToRaster_conversion(self.zones, self.zone_field, tmp, "CELL_CENTER", "NONE", grid.cell_width)
+
+                zone_array = arcpy.RasterToNumPyArray(tmp, arcpy.Point(grid.xmin, grid.ymin), grid.ncols, grid.nrows, ZONE_NODATA)
+
+            finally:
+                for k, v in env_old.iteritems():
+                    setattr(arcpy.env, k, v)
+                if arcpy.Exists(tmp):
+                    arcpy.Delete_management(tmp)
+
+            if zone_array.dtype.kind not in "iu":
+                raise ValueError("Zone field '{}' must be an integer field".format(self.zone_field))
+
+            if not self.zone_source:
+                self.zone_arrays[key] = zone_array.astype(np.int32)
+                return self.zone_arrays[key]
+
+            np.save(npy, zone_array.astype(np.int32))
+            self.trim_zone_cache(npy)
+
+        self.zone_arrays[key] = np.load(npy, mmap_mode="r")
+
+        return self.zone_arrays[key]
+
     def calc(self, data):
         """
 
@@ -68,10 +248,82 @@ class ZonalStatisticsAsTableTool(BaseTool):
 
         validate_geodata(ras, raster=True)
 
-        tab_out = make_table_name(ras, self.output_file_workspace, None, self.output_file_workspace, self. output_filename_suffix)
+        grid = get_raster_grid(ras)
+
+        self.info("Extracting statistics from raster '{0}' ...".format(ras))
+
+        value_counts = self.statistics_type == "ALL" and is_integer_grid(grid)
+
+        acc = zonal_accumulate(grid, self.get_zone_array(grid), value_counts=value_counts)
+        stats = acc.statistics(grid.cell_width * grid.cell_height, self.ignore_no_data != "NODATA")
+
+        # raster names become column prefixes of the merged table, keep them unique
+        prefix = base_prefix = split_up_filename(ras)[2]
+        i = 1
+        while prefix in self.zonal_columns:
+            i += 1
+            prefix = "{}_{}".format(base_prefix, i)
+
+        columns = statistics_columns.get(self.statistics_type, zonal_statistics)
+        if value_counts:
+            columns = columns + zonal_value_statistics
+        self.zonal_columns[prefix] = columns
+
+        for zone, zone_stats in stats.iteritems():
+            row = self.zonal_rows.setdefault(zone, {})
+            for c in columns:
+                row["{}_{}".format(prefix, c)] = zone_stats[c]
+
+        self.info("{} zones summarised".format(len(stats)))
+
+        return {"geodata": self.zonal_table, "source_geodata": ras, "column_prefix": prefix, "zones": self.zones, "zone_field": self.zone_field, "no_data_handling": self.ignore_no_data, "statistics_type": self.statistics_type}
+
+    def calc_arcpy(self, data):
+        """
+
+        Args:
+            data:
+
+        Returns:
+
+        """
+
+        ras = data["raster"]
+
+        validate_geodata(ras, raster=True)
+
+        tab_out = make_table_name(ras, self.output_file_workspace, None, self.output_filename_prefix, self.output_filename_suffix)
 
         self.info("Extracting statistics from raster '{0}' into table '{1}' ...".format(ras, tab_out))
 
         arcpy.sa.ZonalStatisticsAsTable(self.zones, self.zone_field, ras, tab_out, self.ignore_no_data, self.statistics_type)
 
         return {"geodata": tab_out, "source_geodata": ras, "zones": self.zones, "zone_field": self.zone_field, "no_data_handling": self.ignore_no_data, "statistics_type": self.statistics_type}
+
+    def write_zonal_table(self):
+        """ Write the statistics of all rasters into one wide table
+
+        Returns:
+
+        """
+
+        if not self.zonal_rows:
+            return
+
+        fieldnames = [self.zone_field] + ["{}_{}".format(p, c) for p, cols in self.zonal_columns.iteritems() for c in cols]
+
+        with open(self.zonal_csv, "wb") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=fieldnames, lineterminator='\n')
+            writer.writeheader()
+            for zone in sorted(self.zonal_rows):
+                row = {self.zone_field: zone}
+                row.update(self.zonal_rows[zone])
+                writer.writerow(row)
+
+        if self.zonal_table != self.zonal_csv:
+            self.result.table_conversion(self.zonal_csv, self.result.output_workspace, split_up_filename(self.zonal_table)[2])
+            remove(self.zonal_csv)
+
+        self.info("Zonal statistics for {} rasters and {} zones written to '{}'".format(len(self.zonal_columns), len(self.zonal_rows), self.zonal_table))
+
+        return